@@ -2,12 +2,26 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from datetime import datetime, time as dt_time
+from datetime import datetime
 import plotly.graph_objects as go
 import plotly.express as px
 import os
+import json
+import time
 from typing import Dict, Any, Optional
 
+from sam_baselines import z_column
+from sam_data import DataValidationError
+from sam_load import LOAD_METRIC
+from sam_plotting import WINDOW_MIN_DAYS, FigureCache, aggregate_periods, downsample_series, thin_points, window
+from sam_zones import ZoneClassifier
+from sam_records import RecordRow
+from sam_rules import format_alert
+from sam_state import DataSnapshot, WorkbookState
+from sam_team import ROSTER_PAGE_SIZES, ROSTER_SORTS, ZONE_FILTERS, athlete_card_html, filter_team, readiness_score, roster_page, sort_team
+from sam_telemetry import TELEMETRY, RunLog, begin_run, count, observe, prometheus_text, timer, write_prometheus
+from sam_watch import SourceWatcher
+
 # -------------------------------
 # 1. Set Page Config
 # -------------------------------
@@ -18,6 +32,10 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+# Hot-path timings of this script run (process-wide totals are kept alongside)
+run_started = time.perf_counter()
+run_telemetry = begin_run()
+
 # Custom CSS for better styling
 st.markdown("""
 <style>
@@ -113,10 +131,32 @@ st.markdown("<h1 class='main-header'>🧬 SAM Recovery Intelligence</h1>", unsaf
 # 2. Load Excel Data with Error Handling
 # -------------------------------
 EXCEL_FILE = "SAM_Recovery_Data_Template.xlsx"
-
-@st.cache_data
-def load_data():
-    """Load and cache Excel data with comprehensive error handling"""
+# Memory-optimized load mode: biometrics held in compact dtypes, expanded per athlete on demand
+COMPACT_MEMORY = os.environ.get("SAM_COMPACT_MEMORY", "").lower() in ("1", "true", "yes")
+# Embedded SQL backend for the sheets ("sqlite", or "duckdb" when installed); per-athlete reads then query it
+SQL_BACKEND = os.environ.get("SAM_SQL_BACKEND", "").lower() or None
+# Drop folder for wearable CSV / JSON-lines exports, ingested in chunks on each refresh
+INGEST_DIR = os.environ.get("SAM_INGEST_DIR") or None
+# Seconds between background checks of the data sources; open dashboards rerun when a new version lands (0 = off)
+WATCH_INTERVAL = float(os.environ.get("SAM_WATCH_INTERVAL", "2") or 0)
+# Athlete tabs render only the open one (switching tabs reruns); SAM_LAZY_TABS=0 renders all for instant switching
+LAZY_TABS = os.environ.get("SAM_LAZY_TABS", "1").lower() not in ("0", "false", "no")
+# Instrumentation: timings sidebar (also ?debug=1), and a rotating run log + Prometheus textfile in this directory
+DEBUG_PANEL = os.environ.get("SAM_DEBUG", "").lower() in ("1", "true", "yes")
+TELEMETRY_DIR = os.environ.get("SAM_TELEMETRY_DIR")
+
+@st.cache_resource(show_spinner=False)
+def get_workbook_state() -> WorkbookState:
+    """Process-wide workbook state; new biometric days are appended instead of reloaded"""
+    return WorkbookState(EXCEL_FILE, compact=COMPACT_MEMORY, sql_backend=SQL_BACKEND, ingest_dir=INGEST_DIR)
+
+@st.cache_resource(show_spinner=False)
+def get_source_watcher() -> SourceWatcher:
+    """One background watcher per process, refreshing the shared workbook state"""
+    return SourceWatcher(get_workbook_state(), WATCH_INTERVAL).start()
+
+def load_data() -> DataSnapshot:
+    """Current shared data snapshot (refreshed incrementally when possible) with comprehensive error handling"""
     if not os.path.exists(EXCEL_FILE):
         st.error(f"❌ Excel file not found: `{EXCEL_FILE}`")
         st.markdown("**Please ensure the Excel file exists in the same folder as this script.**")
@@ -124,56 +164,20 @@ def load_data():
         st.stop()
 
     try:
-        # Load all sheets
-        athletes_df = pd.read_excel(EXCEL_FILE, sheet_name="athlete_profiles")
-        genetics_df = pd.read_excel(EXCEL_FILE, sheet_name="genetic_profiles")
-        biometrics_df = pd.read_excel(EXCEL_FILE, sheet_name="biometric_daily")
-        metrics_config = pd.read_excel(EXCEL_FILE, sheet_name="sam_metrics_config")
-        rules_df = pd.read_excel(EXCEL_FILE, sheet_name="predictive_rules")
-        
-        # Validate required columns
-        required_athlete_cols = ['athlete_id', 'name', 'sport', 'age', 'team']
-        missing_cols = [col for col in required_athlete_cols if col not in athletes_df.columns]
-        if missing_cols:
-            st.error(f"Missing columns in athlete_profiles: {missing_cols}")
-            st.stop()
-        
-        # Process biometric data with better error handling
-        if 'date' in biometrics_df.columns:
-            biometrics_df['date'] = pd.to_datetime(biometrics_df['date'], errors='coerce')
-            biometrics_df = biometrics_df.dropna(subset=['date'])
-        else:
-            st.error("Missing 'date' column in biometric_daily sheet")
-            st.stop()
-
-        # Handle time columns safely
-        def safe_time_convert(time_str):
-            """Safely convert time strings to datetime.time objects"""
-            try:
-                if pd.isna(time_str) or time_str == '' or time_str is None:
-                    return None
-                if isinstance(time_str, str):
-                    return pd.to_datetime(time_str, format='%H:%M:%S').time()
-                elif isinstance(time_str, pd.Timestamp):
-                    return time_str.time()
-                elif isinstance(time_str, dt_time):
-                    return time_str
-                else:
-                    return pd.to_datetime(str(time_str)).time()
-            except Exception:
-                return None
-
-        if 'sleep_onset_time' in biometrics_df.columns:
-            biometrics_df['sleep_onset_time'] = biometrics_df['sleep_onset_time'].apply(safe_time_convert)
-        if 'wake_time' in biometrics_df.columns:
-            biometrics_df['wake_time'] = biometrics_df['wake_time'].apply(safe_time_convert)
-
-        # Process athlete baseline dates
-        if 'baseline_start_date' in athletes_df.columns:
-            athletes_df['baseline_start_date'] = pd.to_datetime(athletes_df['baseline_start_date'], errors='coerce').dt.date
-        
-        return athletes_df, genetics_df, biometrics_df, metrics_config, rules_df
+        # Typed columnar snapshot on cold start, then only newly appended rows on later runs
+        state = get_workbook_state()
+        with timer("load_data"):
+            state.refresh()
+        if WATCH_INTERVAL > 0:
+            get_source_watcher()  # started after the first load so it never races the cold start
+        return state.snapshot  # pinned for this script run; later refreshes swap in a new one
         
+    except DataValidationError as e:
+        st.error(str(e))
+        st.stop()
+    except KeyError as e:
+        st.error(f"Missing required columns in biometric data: {e}")
+        st.stop()
     except Exception as e:
         st.error(f"❌ Error reading Excel file: {e}")
         st.markdown("**Common issues:**")
@@ -183,162 +187,197 @@ def load_data():
         st.stop()
 
 # Load data
-athletes_df, genetics_df, biometrics_df, metrics_config, rules_df = load_data()
-
-# Create pivot table for easy access
-try:
-    biometrics_pivot = biometrics_df.set_index(['athlete_id', 'date']).sort_index()
-except KeyError as e:
-    st.error(f"Missing required columns in biometric data: {e}")
-    st.stop()
+snapshot = load_data()
+
+if WATCH_INTERVAL > 0:
+    @st.fragment(run_every=WATCH_INTERVAL)
+    def follow_data_updates() -> None:
+        """Rerun the page once the watcher has published a newer data version"""
+        if get_workbook_state().version != snapshot.version:
+            count("watch.reruns")
+            st.rerun()
+
+    follow_data_updates()
+athletes_df = snapshot.frames["athlete_profiles"]
+genetics_df = snapshot.frames["genetic_profiles"]
+metrics_config = snapshot.frames["sam_metrics_config"]
+rules_df = snapshot.frames["predictive_rules"]
+
+# Derived per-athlete tables, built once per data version and shared read-only by all sessions
+biometrics_state = snapshot.biometrics
+alerts_history = biometrics_state.alerts_history
+rule_engine = biometrics_state.engine
+genotype_store = snapshot.genotypes
+
+# Zone bands compiled once per data version instead of re-filtering the config per value
+zone_classifier = snapshot.zones
 
 # -------------------------------
 # 3. Helper Functions with Error Handling
 # -------------------------------
 
-def get_zone_status(value: float, metric_name: str, thresholds: pd.DataFrame) -> str:
-    """Get zone status with better error handling"""
-    try:
-        if pd.isna(value):
-            return "⚪ No Data"
-        
-        matching_rows = thresholds[thresholds['metric_name'] == metric_name]
-        if matching_rows.empty:
-            return "⚪ No Config"
-        
-        row = matching_rows.iloc[0]
-        
-        # Check red zones
-        red_ranges = [(row.get('red_low', float('inf')), row.get('red_high', float('-inf')))]
-        if 'red_low2' in row and pd.notna(row['red_low2']):
-            red_ranges.append((row['red_low2'], row['red_high2']))
-        
-        for r_low, r_high in red_ranges:
-            if not (pd.isna(r_low) or pd.isna(r_high)) and r_low <= value <= r_high:
-                return "🔴 Red"
-        
-        # Check yellow zones
-        yellow_ranges = [(row.get('yellow_low', float('inf')), row.get('yellow_high', float('-inf')))]
-        if 'yellow_low2' in row and pd.notna(row['yellow_low2']):
-            yellow_ranges.append((row['yellow_low2'], row['yellow_high2']))
-        
-        for y_low, y_high in yellow_ranges:
-            if not (pd.isna(y_low) or pd.isna(y_high)) and y_low <= value <= y_high:
-                return "🟡 Yellow"
-        
-        # Check green zone
-        green_low, green_high = row.get('green_low', float('inf')), row.get('green_high', float('-inf'))
-        if not (pd.isna(green_low) or pd.isna(green_high)) and green_low <= value <= green_high:
-            return "🟢 Green"
-        
-        return "⚪ Unknown"
-        
-    except Exception:
-        return "⚪ Error"
-
-def safe_get_value(df: pd.DataFrame, column: str, default: Any = 0) -> Any:
-    """Safely get value from dataframe"""
+def get_zone_status(value: float, metric_name: str, classifier: Optional[ZoneClassifier] = None) -> str:
+    """Get zone status from the compiled zone classifier"""
+    with timer("get_zone_status"):
+        try:
+            return (classifier or zone_classifier).status(value, metric_name)
+        except Exception:
+            return "⚪ Error"
+
+def baseline_deviation(record: Optional[RecordRow], metric_name: str, baseline_window: str = '28d') -> str:
+    """Card line with the latest value's z-score against the athlete's own baseline"""
+    z = record.get(z_column(metric_name, baseline_window)) if record is not None else None
+    if z is None:
+        return ""
+    return f"<p><strong>vs {baseline_window} baseline:</strong> {z:+.1f} SD</p>"
+
+def load_ratio(record: Optional[RecordRow]) -> str:
+    """Card line with the acute:chronic workload ratio behind the training load"""
+    acwr = record.get('acwr') if record is not None else None
+    if acwr is None:
+        return ""
+    return (f"<p><strong>ACWR:</strong> {acwr:.2f} (acute {record.get('load_acute', 0):.0f}"
+            f" / chronic {record.get('load_chronic', 0):.0f})</p>")
+
+def safe_get_value(source, column: str, default: Any = 0) -> Any:
+    """Safely get the latest value from a record view or dataframe"""
     try:
-        if column in df.columns:
-            value = df[column].iloc[-1] if len(df) > 0 else default
+        if isinstance(source, RecordRow):
+            return source.get(column, default)
+        if column in source.columns:
+            value = source[column].iloc[-1] if len(source) > 0 else default
             return value if not pd.isna(value) else default
         return default
     except Exception:
         return default
 
-def generate_alert(athlete_id: str, df: pd.DataFrame, genetic_dict: Dict) -> Dict[str, str]:
-    """Generate predictive alerts with better error handling"""
-    try:
-        if len(df) == 0:
-            return {
-                "type": "no_data",
-                "title": "📊 No Data",
-                "cause": "No recent biometric data available",
-                "rec": "Please ensure data collection is active."
-            }
-        
-        latest = df.iloc[-1]
-        
-        # Get values safely
-        hrv_night = safe_get_value(df, 'hrv_night', 50)
-        resting_hr = safe_get_value(df, 'resting_hr', 60)
-        temp_trend_c = safe_get_value(df, 'temp_trend_c', 36.5)
-        spo2_night = safe_get_value(df, 'spo2_night', 97)
-        deep_sleep_pct = safe_get_value(df, 'deep_sleep_pct', 20)
-        rem_sleep_pct = safe_get_value(df, 'rem_sleep_pct', 20)
-        sleep_duration_h = safe_get_value(df, 'sleep_duration_h', 8)
-        resp_rate_night = safe_get_value(df, 'resp_rate_night', 15)
-        sleep_onset_time = safe_get_value(df, 'sleep_onset_time', None)
-        
-        # Deviation logic with safe comparison
-        if len(df) >= 2:
-            prev = df.iloc[-2]
-            prev_hrv = safe_get_value(pd.DataFrame([prev]), 'hrv_night', 50)
-            prev_rhr = safe_get_value(pd.DataFrame([prev]), 'resting_hr', 60)
+def generate_alert(athlete_id: str) -> Dict[str, str]:
+    """Latest day's predictive alert for an athlete, as scored by the rule engine into the alert history"""
+    with timer("generate_alert"):
+        try:
+            record = snapshot.records.get(athlete_id)
+            if record is None:
+                return {
+                    "type": "no_data",
+                    "title": "📊 No Data",
+                    "cause": "No recent biometric data available",
+                    "rec": "Please ensure data collection is active."
+                }
+
+            # Latest day's alert was already scored (with baselines and loads) into the alert history
+            count("alert.precomputed")
+            alert_type = record.get('alert_type')
+            if not isinstance(alert_type, str):
+                alert_type = 'green'  # no history row: no rules or no scored day
+            return format_alert(alert_type, record, rule_engine.by_id.get(record.get('rule_id')))
             
-            hrv_drop = (prev_hrv - hrv_night) / prev_hrv > 0.15 if prev_hrv > 0 else False
-            rhr_rise = (resting_hr - prev_rhr) / prev_rhr > 0.05 if prev_rhr > 0 else False
-        else:
-            hrv_drop = hrv_night < 40  # Absolute threshold if no comparison
-            rhr_rise = resting_hr > 70
-        
-        # Alert conditions
-        temp_high = temp_trend_c >= 37.0
-        spo2_low = spo2_night <= 94
-        deep_low = deep_sleep_pct < 17
-        rem_low = rem_sleep_pct < 16
-        sleep_short = sleep_duration_h < 7.0
-        resp_high = resp_rate_night >= 17
-        
-        # Safe time comparison
-        ref_time = dt_time(23, 30)  # 11:30 PM
-        sleep_late = sleep_onset_time is not None and sleep_onset_time > ref_time
-        
-        # Apply alert rules
-        if hrv_drop and rhr_rise and temp_high and spo2_low:
-            return {
-                "type": "inflammation",
-                "title": "⚠️ Inflammation/Illness Risk",
-                "cause": f"HRV↓({hrv_night:.0f}) + RHR↑({resting_hr:.0f}) + Temp↑({temp_trend_c:.1f}) + SpO₂↓({spo2_night:.1f})",
-                "rec": "Prioritize rest, hydration, anti-inflammatory nutrition. Monitor temperature closely."
-            }
-        elif hrv_drop and deep_low and sleep_late:
-            onset_str = sleep_onset_time.strftime('%H:%M') if sleep_onset_time else 'Late'
-            return {
-                "type": "circadian",
-                "title": "🌙 Circadian Misalignment",
-                "cause": f"HRV↓ + Deep Sleep↓({deep_sleep_pct:.1f}%) + Late Sleep({onset_str})",
-                "rec": "Advance bedtime by 45min, increase morning light exposure, avoid screens after 9PM."
-            }
-        elif hrv_drop and rem_low and not temp_high:
-            return {
-                "type": "nutrition",
-                "title": "🥗 Possible Nutrient Gap",
-                "cause": f"HRV↓ + REM↓({rem_sleep_pct:.1f}%) with stable temperature",
-                "rec": "Check iron, magnesium, omega-3, B12 status. Increase nutrient-dense foods."
-            }
-        elif spo2_low and resp_high:
-            return {
-                "type": "airway",
-                "title": "🌬️ Airway/Respiratory Stress",
-                "cause": f"SpO₂={spo2_night:.1f}% + Resp Rate={resp_rate_night:.1f}/min",
-                "rec": "Evaluate sleep environment, nasal breathing. Consider air quality assessment."
-            }
-        else:
+        except Exception as e:
             return {
-                "type": "green",
-                "title": "🟢 Optimal Recovery State",
-                "cause": "All metrics within target ranges",
-                "rec": "Maintain current training and recovery protocols."
+                "type": "error",
+                "title": "❌ Analysis Error",
+                "cause": f"Error processing data: {str(e)[:50]}...",
+                "rec": "Check data quality and try refreshing the dashboard."
             }
-            
-    except Exception as e:
-        return {
-            "type": "error",
-            "title": "❌ Analysis Error",
-            "cause": f"Error processing data: {str(e)[:50]}...",
-            "rec": "Check data quality and try refreshing the dashboard."
-        }
+
+# Athlete page figures
+SLEEP_COLS = ['deep_sleep_pct', 'rem_sleep_pct', 'light_sleep_pct']
+CORRELATION_COLS = ['resting_hr', 'hrv_night', 'temp_trend_c', 'spo2_night', 'sleep_duration_h']
+
+@st.cache_resource(show_spinner=False)
+def get_figure_cache() -> FigureCache:
+    """Serialized figures shared by every session of this server process"""
+    return FigureCache()
+
+def cached_figure(kind: str, athlete_id: str, window_key, build) -> Dict:
+    """Figure dict for one chart, built once per (athlete, data version, window)"""
+    key = (kind, athlete_id, snapshot.version, window_key)
+
+    def build_json() -> str:
+        count("figure_cache.miss")
+        with timer(f"chart_build.{kind}"):
+            return build().to_json()
+
+    count("figure_cache.lookup")
+    return json.loads(get_figure_cache().get_or_build(key, build_json))
+
+def show_figure(kind: str, athlete_id: str, window_key, build) -> None:
+    """Render a memoized chart, timing lookup/build plus Streamlit serialization"""
+    with timer(f"chart.{kind}"):
+        st.plotly_chart(cached_figure(kind, athlete_id, window_key, build), use_container_width=True)
+
+def build_trend_figure(plot_df: pd.DataFrame) -> go.Figure:
+    """HRV and RHR trend (LTTB keeps peaks and dips while capping points per trace)"""
+    hrv_line = downsample_series(plot_df['hrv_night'])
+    rhr_line = downsample_series(plot_df['resting_hr'])
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=hrv_line.index, y=hrv_line, 
+        mode='lines+markers', name='HRV (ms)', 
+        line=dict(color='#2ECC71', width=3),
+        marker=dict(size=8)
+    ))
+    fig.add_trace(go.Scatter(
+        x=rhr_line.index, y=rhr_line, 
+        mode='lines+markers', name='RHR (bpm)', 
+        line=dict(color='#E74C3C', width=3),
+        marker=dict(size=8),
+        yaxis='y2'
+    ))
+    fig.update_layout(
+        title="HRV & Resting Heart Rate Trends",
+        xaxis_title="Date",
+        yaxis_title="HRV (ms)",
+        yaxis2=dict(title="RHR (bpm)", overlaying='y', side='right'),
+        template="plotly_white",
+        height=400,
+        showlegend=True
+    )
+    return fig
+
+def build_sleep_figure(plot_df: pd.DataFrame) -> go.Figure:
+    """Sleep architecture (bars averaged per week/month/... once there are too many days)"""
+    sleep_bars, period = aggregate_periods(plot_df, SLEEP_COLS)
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=sleep_bars.index, y=sleep_bars['deep_sleep_pct'], name='Deep Sleep', marker_color='#3498DB'))
+    fig.add_trace(go.Bar(x=sleep_bars.index, y=sleep_bars['rem_sleep_pct'], name='REM Sleep', marker_color='#9B59B6'))
+    fig.add_trace(go.Bar(x=sleep_bars.index, y=sleep_bars['light_sleep_pct'], name='Light Sleep', marker_color='#F39C12'))
+    fig.update_layout(
+        barmode='stack',
+        title="Sleep Architecture Distribution" + (f" ({period} Averages)" if period != "Daily" else ""),
+        xaxis_title="Date",
+        yaxis_title="Sleep Percentage (%)",
+        template="plotly_white",
+        height=400
+    )
+    return fig
+
+def build_correlation_figure(plot_df: pd.DataFrame) -> go.Figure:
+    """Multi-dimensional correlation plot"""
+    fig = px.scatter(
+        thin_points(plot_df).reset_index(), 
+        x='resting_hr', 
+        y='hrv_night', 
+        size='temp_trend_c', 
+        color='spo2_night',
+        hover_data=['date', 'sleep_duration_h'], 
+        title="HRV vs RHR Analysis (Size = Temperature, Color = SpO₂)",
+        labels={'resting_hr': 'Resting HR (bpm)', 'hrv_night': 'HRV (ms)'}
+    )
+    fig.update_layout(template="plotly_white", height=400)
+    return fig
+
+def athlete_tabs(labels: list) -> list:
+    """Athlete page tabs; in lazy mode they track the selection so hidden tabs can be skipped"""
+    if LAZY_TABS:
+        try:
+            return st.tabs(labels, key="athlete_tab", on_change="rerun")
+        except TypeError:
+            pass  # Streamlit without stateful tabs: every tab renders
+    return st.tabs(labels)
+
+def tab_open(tab) -> bool:
+    """Whether a tab's body should run (always, unless the tabs track state and it is hidden)"""
+    return getattr(tab, "open", None) is not False
 
 # -------------------------------
 # 4. Navigation
@@ -356,6 +395,16 @@ def go_home():
     st.session_state.page = 'home'
     st.session_state.athlete_id = None
 
+# Roster grid paging
+def reset_roster_page():
+    st.session_state.roster_page = 1
+
+def filter_options(roster: pd.DataFrame, column: str) -> list:
+    """Sorted distinct values of a roster column for a filter control"""
+    if column not in roster.columns:
+        return []
+    return sorted(roster[column].dropna().astype(str).unique())
+
 # -------------------------------
 # 5. Enhanced Main Page: Team Overview
 # -------------------------------
@@ -366,32 +415,24 @@ if st.session_state.page == 'home':
     st.markdown("<h3 class='team-overview-header'>📊 Team Performance Dashboard</h3>", unsafe_allow_html=True)
     
     try:
-        # Get latest data for each athlete
-        latest_data = biometrics_df.sort_values('date').groupby('athlete_id').last().reset_index()
+        # Team snapshot: one precomputed row per athlete for this data version
+        team_snapshot = snapshot.team
         
-        if latest_data.empty:
+        if team_snapshot.empty:
             st.warning("⚠️ No biometric data available for any athletes.")
             st.info("Please ensure biometric data is properly loaded in the Excel file.")
         else:
             # Team-level statistics
             col1, col2, col3, col4 = st.columns(4)
             
-            total_athletes = len(latest_data)
-            avg_hrv = latest_data['hrv_night'].mean()
-            avg_sleep = latest_data['sleep_duration_h'].mean()
+            total_athletes = len(team_snapshot)
+            avg_hrv = team_snapshot['hrv_night'].mean()
+            avg_sleep = team_snapshot['sleep_duration_h'].mean()
             
             # Count alerts by type
-            alert_counts = {"inflammation": 0, "circadian": 0, "nutrition": 0, "airway": 0, "green": 0, "error": 0}
-            
-            for _, row in latest_data.iterrows():
-                athlete_id = row['athlete_id']
-                try:
-                    genetic_dict = genetics_df[genetics_df.athlete_id == athlete_id].set_index('gene')['genotype'].to_dict()
-                    df = biometrics_pivot.loc[athlete_id].sort_index() if athlete_id in biometrics_pivot.index.get_level_values(0) else pd.DataFrame()
-                    alert = generate_alert(athlete_id, df, genetic_dict)
-                    alert_counts[alert["type"]] += 1
-                except Exception:
-                    alert_counts["error"] += 1
+            alert_counts = {"inflammation": 0, "circadian": 0, "nutrition": 0, "airway": 0, "overtraining": 0, "green": 0, "error": 0}
+            for alert_type, n in team_snapshot['alert_type'].value_counts().items():
+                alert_counts[alert_type] = alert_counts.get(alert_type, 0) + int(n)
             
             with col1:
                 st.markdown("""
@@ -442,7 +483,7 @@ if st.session_state.page == 'home':
                 """, unsafe_allow_html=True)
             
             with alert_col2:
-                medium_risk = alert_counts["circadian"] + alert_counts["nutrition"]
+                medium_risk = alert_counts["circadian"] + alert_counts["nutrition"] + alert_counts["overtraining"]
                 st.markdown(f"""
                 <div class='alert-summary alert-medium'>
                     <h4>🟡 Monitor Closely</h4>
@@ -463,61 +504,48 @@ if st.session_state.page == 'home':
             st.markdown("---")
             st.markdown("### 👥 Individual Athlete Status")
             
+            # Filter, sort and page the snapshot server-side; only the visible page of cards is rendered
+            roster = filter_team(team_snapshot)
+            filter_cols = st.columns(5)
+            with filter_cols[0]:
+                alert_filter = st.multiselect("Alert", filter_options(roster, 'alert_type'), key="roster_alerts", on_change=reset_roster_page)
+            with filter_cols[1]:
+                sport_filter = st.multiselect("Sport", filter_options(roster, 'sport'), key="roster_sports", on_change=reset_roster_page)
+            with filter_cols[2]:
+                team_filter = st.multiselect("Team", filter_options(roster, 'team'), key="roster_teams", on_change=reset_roster_page)
+            with filter_cols[3]:
+                zone_filter = st.multiselect("Worst zone", ZONE_FILTERS, key="roster_zones", on_change=reset_roster_page)
+            with filter_cols[4]:
+                sort_by = st.selectbox("Sort by", list(ROSTER_SORTS), key="roster_sort", on_change=reset_roster_page)
+            
+            visible = sort_team(filter_team(roster, alert_filter, sport_filter, team_filter, zone_filter), sort_by)
+            page_size = st.session_state.get("roster_page_size", ROSTER_PAGE_SIZES[0])
+            page_rows, page, pages = roster_page(visible, st.session_state.get("roster_page", 1), page_size)
+            
+            nav_col1, nav_col2, nav_col3 = st.columns([2, 1, 1])
+            with nav_col1:
+                first_shown = (page - 1) * page_size + 1 if len(visible) else 0
+                st.caption(f"Showing {first_shown}–{first_shown + len(page_rows) - 1 if len(visible) else 0} of {len(visible)} athletes ({len(roster)} on roster)")
+            with nav_col2:
+                if pages > 1:
+                    st.session_state.roster_page = page  # clamp before the widget reads it
+                    st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, step=1, key="roster_page")
+            with nav_col3:
+                st.selectbox("Per page", ROSTER_PAGE_SIZES, key="roster_page_size", on_change=reset_roster_page)
+            
+            if visible.empty:
+                st.info("No athletes match the selected filters.")
+            
             # Display athletes in a responsive grid
             num_cols = 3
             cols = st.columns(num_cols)
+            cards_started = time.perf_counter()
             
-            for idx, (_, row) in enumerate(latest_data.iterrows()):
+            for idx, row in enumerate(page_rows.to_dict('records')):
                 athlete_id = row['athlete_id']
                 
-                # Get athlete info safely
-                athlete_matches = athletes_df[athletes_df.athlete_id == athlete_id]
-                if athlete_matches.empty:
-                    continue
-                    
-                athlete_row = athlete_matches.iloc[0]
-                
-                try:
-                    genetic_dict = genetics_df[genetics_df.athlete_id == athlete_id].set_index('gene')['genotype'].to_dict()
-                    df = biometrics_pivot.loc[athlete_id].sort_index() if athlete_id in biometrics_pivot.index.get_level_values(0) else pd.DataFrame()
-                    alert = generate_alert(athlete_id, df, genetic_dict)
-                except Exception as e:
-                    alert = {
-                        "type": "error",
-                        "title": "❌ Data Error",
-                        "cause": "Unable to process data",
-                        "rec": "Check data integrity"
-                    }
-                
-                # Color coding and icons
-                color_map = {
-                    "inflammation": "#E74C3C", "airway": "#E74C3C",
-                    "circadian": "#F39C12", "nutrition": "#F39C12", 
-                    "green": "#28A745", "error": "#6C757D", "no_data": "#6C757D"
-                }
-                icon_map = {
-                    "inflammation": "🔴", "airway": "🔴",
-                    "circadian": "🟡", "nutrition": "🟡",
-                    "green": "🟢", "error": "⚪", "no_data": "⚪"
-                }
-                
-                color = color_map.get(alert["type"], "#6C757D")
-                icon = icon_map.get(alert["type"], "⚪")
-                
                 with cols[idx % num_cols]:
-                    st.markdown(f"""
-                    <div class='athlete-card'>
-                        <h4 style='margin-bottom: 0.5rem; color: #2C3E50;'>{athlete_row['name']}</h4>
-                        <p style='color: #6c757d; margin-bottom: 1rem;'>{athlete_row['sport']} | Age {athlete_row['age']}</p>
-                        <div style='display: flex; justify-content: space-between; margin-bottom: 1rem; color: #495057;'>
-                            <span><strong>HRV:</strong> {row.get('hrv_night', 'N/A'):.0f} ms</span>
-                            <span><strong>Sleep:</strong> {row.get('sleep_duration_h', 'N/A'):.1f}h</span>
-                        </div>
-                        <div class='status-indicator' style='color: {color};'>
-                            {icon} {alert['title'].replace('🔴', '').replace('🟡', '').replace('🟢', '').replace('❌', '').replace('📊', '').strip()}
-                        </div>
-                    </div>
-                    """, unsafe_allow_html=True)
+                    st.markdown(athlete_card_html(row), unsafe_allow_html=True)
                     
                     st.button(
                         "📊 View Dashboard", 
@@ -526,6 +554,7 @@ if st.session_state.page == 'home':
                         args=(athlete_id,),
                         use_container_width=True
                     )
+            observe("team_overview.cards", time.perf_counter() - cards_started)
     
     except Exception as e:
         st.error(f"Error loading team overview: {e}")
@@ -548,11 +577,8 @@ else:
     athlete_row = athlete_matches.iloc[0]
     
     try:
-        genetic_dict = genetics_df[genetics_df.athlete_id == aid].set_index('gene')['genotype'].to_dict()
-        if aid in biometrics_pivot.index.get_level_values(0):
-            df = biometrics_pivot.loc[aid].sort_index()
-        else:
-            df = pd.DataFrame()
+        genetic_dict = genotype_store.get(aid)
+        df = biometrics_state.athlete_frame(aid)
     except Exception as e:
         st.error(f"Error loading athlete data: {e}")
         genetic_dict = {}
@@ -563,8 +589,8 @@ else:
         st.button("⬅️ Back to Team Overview", on_click=go_home)
         st.stop()
     
-    latest = df.iloc[-1]
-    alert = generate_alert(aid, df, genetic_dict)
+    latest = snapshot.records.get(aid)
+    alert = generate_alert(aid)
 
     # Header with improved layout
     col1, col2, col3 = st.columns([3, 3, 1])
@@ -588,256 +614,231 @@ else:
     # Display current alert status prominently
     if alert["type"] in ["inflammation", "airway"]:
         st.error(f"**{alert['title']}**\n\n**Cause**: {alert['cause']}\n\n**Recommendation**: {alert['rec']}")
-    elif alert["type"] in ["circadian", "nutrition"]:
+    elif alert["type"] in ["circadian", "nutrition", "overtraining"]:
         st.warning(f"**{alert['title']}**\n\n**Cause**: {alert['cause']}\n\n**Recommendation**: {alert['rec']}")
     else:
         st.success(f"**{alert['title']}**\n\n{alert['rec']}")
 
-    # Tabs for detailed information
-    tab1, tab2, tab3 = st.tabs(["📊 Current Metrics", "📈 Trends & Analysis", "🧠 Predictive Insights"])
+    # Tabs for detailed information (lazily rendered: hidden tabs skip their figures and tables)
+    tab1, tab2, tab3 = athlete_tabs(["📊 Current Metrics", "📈 Trends & Analysis", "🧠 Predictive Insights"])
 
     with tab1:
-        st.subheader("Today's Readiness Metrics")
+        if tab_open(tab1):
+            st.subheader("Today's Readiness Metrics")
         
-        # Metrics with better organization
-        metrics_map = {
-            "HRV (Night)": ("hrv_night", "ms"),
-            "Resting HR": ("resting_hr", "bpm"),
-            "SpO₂ (Night)": ("spo2_night", "%"),
-            "Respiratory Rate": ("resp_rate_night", "/min"),
-            "Deep Sleep %": ("deep_sleep_pct", "%"),
-            "REM Sleep %": ("rem_sleep_pct", "%"),
-            "Sleep Duration": ("sleep_duration_h", "h"),
-            "Temperature": ("temp_trend_c", "°C"),
-            "Training Load": ("training_load_pct", "%")
-        }
-
-        cols = st.columns(3)
-        for i, (name, (key, unit)) in enumerate(metrics_map.items()):
-            val = safe_get_value(pd.DataFrame([latest]), key, 0)
+            # Metrics with better organization
+            metrics_map = {
+                "HRV (Night)": ("hrv_night", "ms"),
+                "Resting HR": ("resting_hr", "bpm"),
+                "SpO₂ (Night)": ("spo2_night", "%"),
+                "Respiratory Rate": ("resp_rate_night", "/min"),
+                "Deep Sleep %": ("deep_sleep_pct", "%"),
+                "REM Sleep %": ("rem_sleep_pct", "%"),
+                "Sleep Duration": ("sleep_duration_h", "h"),
+                "Temperature": ("temp_trend_c", "°C"),
+                "Training Load": ("training_load_pct", "%")
+            }
+
+            cols = st.columns(3)
+            for i, (name, (key, unit)) in enumerate(metrics_map.items()):
+                val = safe_get_value(latest, key, 0) if latest is not None else safe_get_value(df, key, 0)
             
-            # Get status with proper metric name formatting
-            metric_name_formatted = key.replace("_", " ").title()
-            status = get_zone_status(val, metric_name_formatted, metrics_config)
+                status = get_zone_status(val, key)
             
-            with cols[i % 3]:
-                st.markdown(f"""
-                <div class='metric-card'>
-                    <h3>{name}</h3>
-                    <h2 style='color: #2C3E50;'>{val:.1f} {unit}</h2>
-                    <p><strong>Status:</strong> {status}</p>
-                </div>
-                """, unsafe_allow_html=True)
+                with cols[i % 3]:
+                    st.markdown(f"""
+                    <div class='metric-card'>
+                        <h3>{name}</h3>
+                        <h2 style='color: #2C3E50;'>{val:.1f} {unit}</h2>
+                        <p><strong>Status:</strong> {status}</p>{baseline_deviation(latest, key)}{load_ratio(latest) if key == LOAD_METRIC else ""}
+                    </div>
+                    """, unsafe_allow_html=True)
 
     with tab2:
-        st.subheader("7-Day Performance Trends")
+        if tab_open(tab2):
+            st.subheader("7-Day Performance Trends")
         
-        if len(df) >= 2:
-            # HRV and RHR trend
-            fig1 = go.Figure()
-            fig1.add_trace(go.Scatter(
-                x=df.index, y=df['hrv_night'], 
-                mode='lines+markers', name='HRV (ms)', 
-                line=dict(color='#2ECC71', width=3),
-                marker=dict(size=8)
-            ))
-            fig1.add_trace(go.Scatter(
-                x=df.index, y=df['resting_hr'], 
-                mode='lines+markers', name='RHR (bpm)', 
-                line=dict(color='#E74C3C', width=3),
-                marker=dict(size=8),
-                yaxis='y2'
-            ))
-            fig1.update_layout(
-                title="HRV & Resting Heart Rate Trends",
-                xaxis_title="Date",
-                yaxis_title="HRV (ms)",
-                yaxis2=dict(title="RHR (bpm)", overlaying='y', side='right'),
-                template="plotly_white",
-                height=400,
-                showlegend=True
-            )
-            st.plotly_chart(fig1, use_container_width=True)
-
-            # Sleep architecture
-            if all(col in df.columns for col in ['deep_sleep_pct', 'rem_sleep_pct', 'light_sleep_pct']):
-                fig2 = go.Figure()
-                fig2.add_trace(go.Bar(x=df.index, y=df['deep_sleep_pct'], name='Deep Sleep', marker_color='#3498DB'))
-                fig2.add_trace(go.Bar(x=df.index, y=df['rem_sleep_pct'], name='REM Sleep', marker_color='#9B59B6'))
-                fig2.add_trace(go.Bar(x=df.index, y=df['light_sleep_pct'], name='Light Sleep', marker_color='#F39C12'))
-                fig2.update_layout(
-                    barmode='stack',
-                    title="Sleep Architecture Distribution",
-                    xaxis_title="Date",
-                    yaxis_title="Sleep Percentage (%)",
-                    template="plotly_white",
-                    height=400
-                )
-                st.plotly_chart(fig2, use_container_width=True)
-
-            # Multi-dimensional correlation plot
-            if all(col in df.columns for col in ['resting_hr', 'hrv_night', 'temp_trend_c', 'spo2_night', 'sleep_duration_h']):
-                fig3 = px.scatter(
-                    df.reset_index(), 
-                    x='resting_hr', 
-                    y='hrv_night', 
-                    size='temp_trend_c', 
-                    color='spo2_night',
-                    hover_data=['date', 'sleep_duration_h'], 
-                    title="HRV vs RHR Analysis (Size = Temperature, Color = SpO₂)",
-                    labels={'resting_hr': 'Resting HR (bpm)', 'hrv_night': 'HRV (ms)'}
-                )
-                fig3.update_layout(template="plotly_white", height=400)
-                st.plotly_chart(fig3, use_container_width=True)
-        else:
-            st.info("📊 Need at least 2 days of data to show trends. Current data points: {}".format(len(df)))
+            if len(df) >= 2:
+                # Long histories: the date window is re-queried and downsampled on every change
+                plot_df = df
+                first_day, last_day = df.index.min().date(), df.index.max().date()
+                if (last_day - first_day).days > WINDOW_MIN_DAYS:
+                    start_day, end_day = st.slider(
+                        "Date range", min_value=first_day, max_value=last_day,
+                        value=(first_day, last_day), key=f"trend_window_{aid}"
+                    )
+                    plot_df = window(df, start_day, end_day)
+                    if len(plot_df) < 2:
+                        plot_df = df
+
+                # Figures are memoized per (athlete, data version, window) across sessions
+                window_key = (plot_df.index.min().date(), plot_df.index.max().date())
+                show_figure("trend", aid, window_key, lambda: build_trend_figure(plot_df))
+
+                if all(col in plot_df.columns for col in SLEEP_COLS):
+                    show_figure("sleep", aid, window_key, lambda: build_sleep_figure(plot_df))
+
+                if all(col in plot_df.columns for col in CORRELATION_COLS):
+                    show_figure("correlation", aid, window_key, lambda: build_correlation_figure(plot_df))
+            else:
+                st.info("📊 Need at least 2 days of data to show trends. Current data points: {}".format(len(df)))
 
     with tab3:
-        st.subheader("🧠 AI-Powered Recovery Insights")
+        if tab_open(tab3):
+            st.subheader("🧠 AI-Powered Recovery Insights")
         
-        # Current alert details
-        st.markdown("#### Current Status Analysis")
-        if alert["type"] in ["inflammation", "airway"]:
-            st.error(f"**{alert['title']}**")
-            st.markdown(f"**Root Cause:** {alert['cause']}")
-            st.markdown(f"**Action Plan:** {alert['rec']}")
-        elif alert["type"] in ["circadian", "nutrition"]:
-            st.warning(f"**{alert['title']}**")
-            st.markdown(f"**Contributing Factors:** {alert['cause']}")
-            st.markdown(f"**Optimization Strategy:** {alert['rec']}")
-        else:
-            st.success(f"**{alert['title']}**")
-            st.markdown(f"**Status:** {alert['cause']}")
-            st.markdown(f"**Maintenance Plan:** {alert['rec']}")
+            # Current alert details
+            st.markdown("#### Current Status Analysis")
+            if alert["type"] in ["inflammation", "airway"]:
+                st.error(f"**{alert['title']}**")
+                st.markdown(f"**Root Cause:** {alert['cause']}")
+                st.markdown(f"**Action Plan:** {alert['rec']}")
+            elif alert["type"] in ["circadian", "nutrition", "overtraining"]:
+                st.warning(f"**{alert['title']}**")
+                st.markdown(f"**Contributing Factors:** {alert['cause']}")
+                st.markdown(f"**Optimization Strategy:** {alert['rec']}")
+            else:
+                st.success(f"**{alert['title']}**")
+                st.markdown(f"**Status:** {alert['cause']}")
+                st.markdown(f"**Maintenance Plan:** {alert['rec']}")
         
-        st.markdown("---")
+            # Alert timeline from the materialized history
+            if not alerts_history.empty:
+                athlete_alerts = alerts_history[(alerts_history['athlete_id'] == aid) & (alerts_history['alert_type'] != 'green')]
+                if not athlete_alerts.empty:
+                    st.markdown("#### 📅 Alert Timeline")
+                    st.dataframe(
+                        athlete_alerts.sort_values('date', ascending=False)[['date', 'alert_type', 'rule_id', 'conditions']],
+                        use_container_width=True,
+                        hide_index=True,
+                        height=min(300, 40 + 35 * len(athlete_alerts))
+                    )
         
-        # Personalized insights based on genetics
-        st.markdown("#### 🧬 Genotype-Specific Recommendations")
-        if genetic_dict:
-            genetic_insights = []
+            st.markdown("---")
+        
+            # Personalized insights based on genetics
+            st.markdown("#### 🧬 Genotype-Specific Recommendations")
+            if genetic_dict:
+                genetic_insights = []
             
-            # PER3 gene insights
-            if genetic_dict.get("PER3") == "long":
-                genetic_insights.append({
-                    "gene": "PER3 (Long variant)",
-                    "trait": "Natural night owl tendency",
-                    "recommendation": "Allow later bedtimes when possible, prioritize consistent wake times, use bright light therapy in morning"
-                })
-            elif genetic_dict.get("PER3") == "short":
-                genetic_insights.append({
-                    "gene": "PER3 (Short variant)", 
-                    "trait": "Natural early bird tendency",
-                    "recommendation": "Optimize early morning training, avoid late evening intense exercise, maintain regular early bedtime"
-                })
+                # PER3 gene insights
+                if genetic_dict.get("PER3") == "long":
+                    genetic_insights.append({
+                        "gene": "PER3 (Long variant)",
+                        "trait": "Natural night owl tendency",
+                        "recommendation": "Allow later bedtimes when possible, prioritize consistent wake times, use bright light therapy in morning"
+                    })
+                elif genetic_dict.get("PER3") == "short":
+                    genetic_insights.append({
+                        "gene": "PER3 (Short variant)", 
+                        "trait": "Natural early bird tendency",
+                        "recommendation": "Optimize early morning training, avoid late evening intense exercise, maintain regular early bedtime"
+                    })
             
-            # CLOCK gene insights
-            if genetic_dict.get("CLOCK") == "AA":
-                genetic_insights.append({
-                    "gene": "CLOCK (AA genotype)",
-                    "trait": "Enhanced circadian sensitivity",
-                    "recommendation": "Maintain strict sleep schedule, minimize blue light exposure 2h before bed, prioritize sleep environment optimization"
-                })
+                # CLOCK gene insights
+                if genetic_dict.get("CLOCK") == "AA":
+                    genetic_insights.append({
+                        "gene": "CLOCK (AA genotype)",
+                        "trait": "Enhanced circadian sensitivity",
+                        "recommendation": "Maintain strict sleep schedule, minimize blue light exposure 2h before bed, prioritize sleep environment optimization"
+                    })
             
-            # ACTN3 gene insights
-            if genetic_dict.get("ACTN3") == "XX":
-                genetic_insights.append({
-                    "gene": "ACTN3 (XX genotype)",
-                    "trait": "Enhanced endurance capacity",
-                    "recommendation": "Focus on aerobic base building, longer recovery periods between high-intensity sessions, emphasize mitochondrial health"
-                })
-            elif genetic_dict.get("ACTN3") == "RR":
-                genetic_insights.append({
-                    "gene": "ACTN3 (RR genotype)",
-                    "trait": "Enhanced power/sprint capacity", 
-                    "recommendation": "Optimize explosive training, shorter but more intense sessions, focus on neuromuscular recovery"
-                })
+                # ACTN3 gene insights
+                if genetic_dict.get("ACTN3") == "XX":
+                    genetic_insights.append({
+                        "gene": "ACTN3 (XX genotype)",
+                        "trait": "Enhanced endurance capacity",
+                        "recommendation": "Focus on aerobic base building, longer recovery periods between high-intensity sessions, emphasize mitochondrial health"
+                    })
+                elif genetic_dict.get("ACTN3") == "RR":
+                    genetic_insights.append({
+                        "gene": "ACTN3 (RR genotype)",
+                        "trait": "Enhanced power/sprint capacity", 
+                        "recommendation": "Optimize explosive training, shorter but more intense sessions, focus on neuromuscular recovery"
+                    })
             
-            for insight in genetic_insights:
-                st.markdown(f"""
-                <div style='background: #f8f9fa; border-left: 4px solid #007bff; padding: 1rem; margin: 0.5rem 0; border-radius: 5px;'>
-                    <h5 style='color: #007bff; margin-bottom: 0.5rem;'>{insight['gene']}</h5>
-                    <p style='margin-bottom: 0.5rem;'><strong>Trait:</strong> {insight['trait']}</p>
-                    <p style='margin-bottom: 0;'><strong>Strategy:</strong> {insight['recommendation']}</p>
-                </div>
-                """, unsafe_allow_html=True)
-        else:
-            st.info("🧬 Genetic data not available. Consider genetic testing for personalized insights.")
+                for insight in genetic_insights:
+                    st.markdown(f"""
+                    <div style='background: #f8f9fa; border-left: 4px solid #007bff; padding: 1rem; margin: 0.5rem 0; border-radius: 5px;'>
+                        <h5 style='color: #007bff; margin-bottom: 0.5rem;'>{insight['gene']}</h5>
+                        <p style='margin-bottom: 0.5rem;'><strong>Trait:</strong> {insight['trait']}</p>
+                        <p style='margin-bottom: 0;'><strong>Strategy:</strong> {insight['recommendation']}</p>
+                    </div>
+                    """, unsafe_allow_html=True)
+            else:
+                st.info("🧬 Genetic data not available. Consider genetic testing for personalized insights.")
         
-        st.markdown("---")
+            st.markdown("---")
         
-        # Predictive rules reference
-        st.markdown("#### 📋 Evidence-Based Recovery Framework")
-        if not rules_df.empty:
-            st.markdown("**Decision Matrix for Recovery Interventions:**")
+            # Predictive rules reference
+            st.markdown("#### 📋 Evidence-Based Recovery Framework")
+            if not rules_df.empty:
+                st.markdown("**Decision Matrix for Recovery Interventions:**")
             
-            # Format rules dataframe for better display
-            display_rules = rules_df.copy()
-            if 'metric_drop' in display_rules.columns:
-                display_rules = display_rules.rename(columns={
-                    'metric_drop': 'Biometric Pattern',
-                    'genetic_condition': 'Genetic Context',
-                    'cause': 'Likely Root Cause',
-                    'recommendation': 'Intervention Protocol'
-                })
+                # Format rules dataframe for better display
+                display_rules = rules_df.copy()
+                if 'metric_drop' in display_rules.columns:
+                    display_rules = display_rules.rename(columns={
+                        'metric_drop': 'Biometric Pattern',
+                        'genetic_condition': 'Genetic Context',
+                        'cause': 'Likely Root Cause',
+                        'recommendation': 'Intervention Protocol'
+                    })
             
-            st.dataframe(
-                display_rules,
-                use_container_width=True,
-                hide_index=True,
-                height=300
-            )
-        else:
-            st.info("📋 Predictive rules configuration not available.")
+                st.dataframe(
+                    display_rules,
+                    use_container_width=True,
+                    hide_index=True,
+                    height=300
+                )
+            else:
+                st.info("📋 Predictive rules configuration not available.")
         
-        # Performance prediction
-        st.markdown("---")
-        st.markdown("#### 🔮 Performance Readiness Forecast")
+            # Performance prediction
+            st.markdown("---")
+            st.markdown("#### 🔮 Performance Readiness Forecast")
         
-        if len(df) >= 3:
-            # Simple trend analysis
-            recent_hrv = df['hrv_night'].tail(3).mean()
-            recent_rhr = df['resting_hr'].tail(3).mean()
-            recent_sleep = df['sleep_duration_h'].tail(3).mean()
+            if len(df) >= 3:
+                # Simple trend analysis
+                recent = biometrics_state.rolling.loc[aid].iloc[-1]
+                recent_hrv = recent['hrv_night']
+                recent_rhr = recent['resting_hr']
+                recent_sleep = recent['sleep_duration_h']
             
-            # Calculate trend direction
-            hrv_trend = "↗️" if df['hrv_night'].iloc[-1] > df['hrv_night'].iloc[-2] else "↘️"
-            rhr_trend = "↗️" if df['resting_hr'].iloc[-1] > df['resting_hr'].iloc[-2] else "↘️"
-            sleep_trend = "↗️" if df['sleep_duration_h'].iloc[-1] > df['sleep_duration_h'].iloc[-2] else "↘️"
+                # Calculate trend direction
+                hrv_trend = "↗️" if df['hrv_night'].iloc[-1] > df['hrv_night'].iloc[-2] else "↘️"
+                rhr_trend = "↗️" if df['resting_hr'].iloc[-1] > df['resting_hr'].iloc[-2] else "↘️"
+                sleep_trend = "↗️" if df['sleep_duration_h'].iloc[-1] > df['sleep_duration_h'].iloc[-2] else "↘️"
             
-            col1, col2 = st.columns(2)
+                col1, col2 = st.columns(2)
             
-            with col1:
-                st.markdown("""
-                <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 1.5rem; border-radius: 10px;'>
-                    <h4>🎯 Readiness Indicators</h4>
-                    <p><strong>HRV Trend:</strong> {:.1f} ms {}</p>
-                    <p><strong>RHR Trend:</strong> {:.1f} bpm {}</p>
-                    <p><strong>Sleep Trend:</strong> {:.1f}h {}</p>
-                </div>
-                """.format(recent_hrv, hrv_trend, recent_rhr, rhr_trend, recent_sleep, sleep_trend), 
-                unsafe_allow_html=True)
+                with col1:
+                    st.markdown("""
+                    <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 1.5rem; border-radius: 10px;'>
+                        <h4>🎯 Readiness Indicators</h4>
+                        <p><strong>HRV Trend:</strong> {:.1f} ms {}</p>
+                        <p><strong>RHR Trend:</strong> {:.1f} bpm {}</p>
+                        <p><strong>Sleep Trend:</strong> {:.1f}h {}</p>
+                    </div>
+                    """.format(recent_hrv, hrv_trend, recent_rhr, rhr_trend, recent_sleep, sleep_trend), 
+                    unsafe_allow_html=True)
             
-            with col2:
-                # Simple readiness score
-                hrv_score = 1 if recent_hrv > 45 else 0.5 if recent_hrv > 35 else 0
-                rhr_score = 1 if recent_rhr < 65 else 0.5 if recent_rhr < 75 else 0
-                sleep_score = 1 if recent_sleep > 7.5 else 0.5 if recent_sleep > 6.5 else 0
+                with col2:
+                    # Simple readiness score
+                    overall_score = float(readiness_score(recent_hrv, recent_rhr, recent_sleep))
                 
-                overall_score = (hrv_score + rhr_score + sleep_score) / 3 * 100
+                    score_color = "#28a745" if overall_score > 75 else "#ffc107" if overall_score > 50 else "#dc3545"
+                    score_emoji = "🟢" if overall_score > 75 else "🟡" if overall_score > 50 else "🔴"
                 
-                score_color = "#28a745" if overall_score > 75 else "#ffc107" if overall_score > 50 else "#dc3545"
-                score_emoji = "🟢" if overall_score > 75 else "🟡" if overall_score > 50 else "🔴"
-                
-                st.markdown("""
-                <div style='background: white; border: 2px solid {}; padding: 1.5rem; border-radius: 10px; text-align: center;'>
-                    <h4>📊 Readiness Score</h4>
-                    <h2 style='color: {}; margin: 1rem 0;'>{} {:.0f}%</h2>
-                    <p style='margin: 0;'>Based on HRV, RHR & Sleep</p>
-                </div>
-                """.format(score_color, score_color, score_emoji, overall_score), unsafe_allow_html=True)
-        else:
-            st.info("🔮 Need at least 3 days of data for performance forecasting.")
+                    st.markdown("""
+                    <div style='background: white; border: 2px solid {}; padding: 1.5rem; border-radius: 10px; text-align: center;'>
+                        <h4>📊 Readiness Score</h4>
+                        <h2 style='color: {}; margin: 1rem 0;'>{} {:.0f}%</h2>
+                        <p style='margin: 0;'>Based on HRV, RHR & Sleep</p>
+                    </div>
+                    """.format(score_color, score_color, score_emoji, overall_score), unsafe_allow_html=True)
+            else:
+                st.info("🔮 Need at least 3 days of data for performance forecasting.")
 
 # -------------------------------
 # 7. Enhanced Footer
@@ -854,3 +855,52 @@ st.markdown("""
     </p>
 </div>
 """, unsafe_allow_html=True)
+
+# -------------------------------
+# 8. Instrumentation
+# -------------------------------
+
+@st.cache_resource(show_spinner=False)
+def get_run_log(directory: str) -> RunLog:
+    """One rotating run log per server process"""
+    os.makedirs(directory, exist_ok=True)
+    return RunLog(os.path.join(directory, "sam_dashboard_runs.jsonl"))
+
+def timings_frame(timers: Dict[str, Dict[str, float]]) -> pd.DataFrame:
+    """Stage timings in milliseconds, slowest first"""
+    rows = [
+        {"stage": name, "calls": stats["calls"], "total_ms": stats["total_s"] * 1000,
+         "max_ms": stats["max_s"] * 1000, "last_ms": stats["last_s"] * 1000}
+        for name, stats in timers.items()
+    ]
+    return pd.DataFrame(rows, columns=["stage", "calls", "total_ms", "max_ms", "last_ms"]).sort_values("total_ms", ascending=False)
+
+observe("run.total", time.perf_counter() - run_started)
+figure_cache = get_figure_cache()
+cache_gauges = {
+    "figure_cache_hits": figure_cache.hits,
+    "figure_cache_misses": figure_cache.misses,
+    "figure_cache_evictions": figure_cache.evictions,
+    "figure_cache_entries": len(figure_cache),
+    "figure_cache_bytes": figure_cache.nbytes,
+}
+
+if TELEMETRY_DIR:
+    try:
+        get_run_log(TELEMETRY_DIR).write(
+            run_telemetry, page=st.session_state.page, athlete_id=st.session_state.athlete_id, version=snapshot.version
+        )
+        write_prometheus(os.path.join(TELEMETRY_DIR, "sam_dashboard.prom"), prometheus_text(TELEMETRY, cache_gauges))
+    except OSError:
+        pass  # Instrumentation must never take the dashboard down
+
+if DEBUG_PANEL or st.query_params.get("debug") == "1":
+    with st.sidebar:
+        st.markdown("### ⏱️ Debug: Timings")
+        st.caption(f"Data version `{snapshot.version}`")
+        st.markdown("**This run**")
+        st.dataframe(timings_frame(run_telemetry.timers()), hide_index=True, use_container_width=True)
+        st.markdown("**Process totals**")
+        st.dataframe(timings_frame(TELEMETRY.timers()), hide_index=True, use_container_width=True)
+        st.markdown("**Events & caches**")
+        st.json({"this_run": run_telemetry.counters(), "process": TELEMETRY.counters(), "figure_cache": cache_gauges})
@@ -0,0 +1,202 @@
+# sam_alerts.py
+import json
+import os
+import tempfile
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from sam_data import pyarrow
+from sam_genetics import GenotypeStore
+from sam_rules import RuleEngine, athlete_group_codes
+
+# -------------------------------
+# 1. Alert History Layout
+# -------------------------------
+ALERTS_HISTORY_FILE = "alerts_history.parquet"
+ALERTS_META_FILE = "alerts_history.json"
+
+# Metric values stored with every alert row (the inputs the rules look at)
+TRIGGER_METRICS = [
+    'hrv_night',
+    'resting_hr',
+    'temp_trend_c',
+    'spo2_night',
+    'deep_sleep_pct',
+    'rem_sleep_pct',
+    'resp_rate_night',
+    'training_load_pct',
+]
+
+HISTORY_COLUMNS = ['athlete_id', 'date', 'rule_id', 'alert_type', 'genetic_match', 'conditions'] + TRIGGER_METRICS + ['input_hash']
+HASH_MIX = np.uint64(0x9E3779B97F4A7C15)  # odd multiplier folding the previous day's hash into each row's
+
+
+def input_hashes(pivot: pd.DataFrame, derived: Optional[pd.DataFrame] = None) -> np.ndarray:
+    """Per athlete-day hash of everything the rules read: the day's metrics and derived metrics, and the previous day's
+
+    A stored alert is current only while its row still hashes the same.
+    """
+    inputs = pivot
+    if derived is not None and len(derived.columns):
+        inputs = pd.concat([pivot, derived if derived.index.equals(pivot.index) else derived.reindex(pivot.index)], axis=1)
+    hashes = pd.util.hash_pandas_object(inputs, index=False).to_numpy(dtype=np.uint64)
+    codes = athlete_group_codes(pivot)
+    previous = np.zeros_like(hashes)
+    same_athlete = codes[1:] == codes[:-1]
+    previous[1:][same_athlete] = hashes[:-1][same_athlete]
+    return hashes ^ (previous * HASH_MIX)
+
+
+# -------------------------------
+# 2. Bulk Computation
+# -------------------------------
+
+def _history_rows(pivot: pd.DataFrame, engine: RuleEngine, genotypes: Optional[GenotypeStore],
+                  keep: Optional[np.ndarray] = None, derived: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """Evaluate rules over pivot and flatten the kept rows into history records"""
+    result = engine.evaluate(pivot, genotypes, derived=derived)
+    hashes = input_hashes(pivot, derived)
+    if keep is not None:
+        pivot, result, hashes = pivot[keep], result[keep], hashes[keep]
+
+    # Condition terms of the winning rule, e.g. "hrv_drop+spo2_low"
+    terms = {r.rule_id: '+'.join(name for name, expected in r.terms if expected) for r in engine.rules}
+    conditions = result['rule_id'].map(terms).fillna('')
+
+    history = pd.DataFrame({
+        'athlete_id': pivot.index.get_level_values(0).astype(str),
+        'date': pivot.index.get_level_values(1),
+        'rule_id': result['rule_id'].to_numpy(dtype=object),
+        'alert_type': result['alert_type'].to_numpy(dtype=object),
+        'genetic_match': result['genetic_match'].to_numpy(dtype=bool),
+        'conditions': conditions.to_numpy(dtype=object),
+    })
+    for metric in TRIGGER_METRICS:
+        history[metric] = pivot[metric].to_numpy(dtype=np.float64, na_value=np.nan) if metric in pivot.columns else np.nan
+    history['input_hash'] = hashes
+    return history
+
+
+def _score_rows(pivot: pd.DataFrame, rows: np.ndarray, engine: RuleEngine, genotypes: Optional[GenotypeStore],
+                derived: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """History records for the selected rows of a sorted pivot"""
+    # Each athlete's previous day is needed as context for day-over-day deviations
+    codes = athlete_group_codes(pivot)
+    context = np.zeros(len(pivot), dtype=bool)
+    context[:-1] = rows[1:] & (codes[:-1] == codes[1:])
+    subset = rows | context
+    return _history_rows(pivot[subset], engine, genotypes, keep=rows[subset], derived=derived)
+
+
+def build_alerts_history(pivot: pd.DataFrame, engine: RuleEngine, genotypes: Optional[GenotypeStore] = None,
+                         derived: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """One alert row per (athlete_id, date) over the full biometrics pivot"""
+    if pivot.empty:
+        return pd.DataFrame(columns=HISTORY_COLUMNS)
+    return _history_rows(pivot.sort_index(), engine, genotypes, derived=derived)
+
+
+def append_alerts_history(history: pd.DataFrame, pivot: pd.DataFrame, engine: RuleEngine,
+                          genotypes: Optional[GenotypeStore] = None,
+                          derived: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """Score only the days newer than each athlete's last history row and append them
+
+    `derived` must cover the whole pivot: new days are scored against full-history baselines and loads.
+    """
+    pivot = pivot.sort_index()
+    if history.empty:
+        return build_alerts_history(pivot, engine, genotypes, derived)
+
+    last_seen = history.groupby('athlete_id')['date'].max()
+    athletes = pivot.index.get_level_values(0).astype(str)
+    dates = pivot.index.get_level_values(1)
+    cutoff = pd.Series(athletes).map(last_seen).to_numpy(dtype='datetime64[ns]')
+    new_rows = np.isnat(cutoff) | (dates.to_numpy(dtype='datetime64[ns]') > cutoff)
+    if not new_rows.any():
+        return history
+
+    appended = _score_rows(pivot, new_rows, engine, genotypes, derived)
+    return pd.concat([history, appended], ignore_index=True)
+
+
+def refresh_alerts_history(history: pd.DataFrame, pivot: pd.DataFrame, engine: RuleEngine,
+                           genotypes: Optional[GenotypeStore] = None,
+                           derived: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """Bring a stored history in line with pivot: rescore days whose inputs changed or are new, drop days that are gone
+
+    Returns `history` itself when every row is still current. `derived` must cover the whole pivot.
+    """
+    pivot = pivot.sort_index()
+    if history.empty or 'input_hash' not in history.columns:
+        return build_alerts_history(pivot, engine, genotypes, derived)
+
+    hashes = input_hashes(pivot, derived)
+    keys = pd.MultiIndex.from_arrays([
+        pivot.index.get_level_values(0).astype(str),
+        pivot.index.get_level_values(1).astype('datetime64[ns]'),
+    ])
+    stored = history.drop_duplicates(['athlete_id', 'date'], keep='last')
+    stored_keys = pd.MultiIndex.from_arrays([
+        stored['athlete_id'].astype(str), pd.to_datetime(stored['date']).astype('datetime64[ns]'),
+    ])
+    position = stored_keys.get_indexer(keys)
+    stored_hashes = stored['input_hash'].to_numpy(dtype=np.uint64)
+    stale = (position < 0) | (stored_hashes[position] != hashes)
+    kept = stored[stored_keys.isin(keys[~stale])]
+    if not stale.any() and len(kept) == len(history):
+        return history
+
+    rescored = _score_rows(pivot, stale, engine, genotypes, derived)
+    return pd.concat([kept, rescored], ignore_index=True).sort_values(['athlete_id', 'date'], ignore_index=True)
+
+
+# -------------------------------
+# 3. Persistence
+# -------------------------------
+
+def read_alerts_history(directory: str, engine: RuleEngine,
+                        genotypes: Optional[GenotypeStore] = None) -> Optional[pd.DataFrame]:
+    """Stored history, or None when missing or computed with different rules or genotypes"""
+    try:
+        with open(os.path.join(directory, ALERTS_META_FILE), encoding='utf-8') as fh:
+            meta = json.load(fh)
+        if meta.get("rules") != engine.signature or meta.get("genotypes") != (genotypes or GenotypeStore()).signature:
+            return None
+        return pd.read_parquet(os.path.join(directory, ALERTS_HISTORY_FILE))
+    except Exception:
+        return None
+
+
+def write_alerts_history(history: pd.DataFrame, directory: str, engine: RuleEngine,
+                         genotypes: Optional[GenotypeStore] = None) -> None:
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.parquet')
+    os.close(fd)
+    history.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, os.path.join(directory, ALERTS_HISTORY_FILE))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.json')
+    with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+        json.dump({"rules": engine.signature, "genotypes": (genotypes or GenotypeStore()).signature,
+                   "rows": len(history)}, fh)
+    os.replace(tmp_path, os.path.join(directory, ALERTS_META_FILE))
+
+
+def sync_alerts_history(pivot: pd.DataFrame, engine: RuleEngine, genotypes: Optional[GenotypeStore] = None,
+                        directory: Optional[str] = None, derived: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """Load the persisted history, rescore the athlete-days that are new or changed and store it back"""
+    stored = read_alerts_history(directory, engine, genotypes) if directory and pyarrow is not None else None
+    if stored is None:
+        history = build_alerts_history(pivot, engine, genotypes, derived)
+    else:
+        history = refresh_alerts_history(stored, pivot, engine, genotypes, derived)
+        if history is stored:
+            return history
+
+    if directory and pyarrow is not None:
+        try:
+            write_alerts_history(history, directory, engine, genotypes)
+        except Exception:
+            pass  # Read-only deployment: keep the in-memory history
+    return history
@@ -0,0 +1,126 @@
+# sam_baselines.py
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# -------------------------------
+# 1. Baseline Windows
+# -------------------------------
+BASELINE_METRICS = [
+    'hrv_night',
+    'resting_hr',
+    'sleep_duration_h',
+    'temp_trend_c',
+    'spo2_night',
+    'resp_rate_night',
+]
+
+# Trailing calendar windows (today excluded): name -> (pandas offset, minimum prior days)
+ROLLING_WINDOWS = {
+    '7d': ('7D', 3),
+    '28d': ('28D', 7),
+}
+SINCE_BASELINE = 'base'  # every day from the athlete's baseline_start_date up to yesterday
+SINCE_BASELINE_MIN_DAYS = 7
+BASELINE_WINDOWS = list(ROLLING_WINDOWS) + [SINCE_BASELINE]
+
+
+def z_column(metric: str, window: str) -> str:
+    """Column holding a metric's z-score against one baseline window, e.g. 'hrv_night_z_28d'"""
+    return f"{metric}_z_{window}"
+
+
+def baseline_start_dates(athletes_df: Optional[pd.DataFrame]) -> pd.Series:
+    """baseline_start_date per athlete id (NaT when missing)"""
+    if athletes_df is None or 'baseline_start_date' not in athletes_df.columns:
+        return pd.Series(dtype='datetime64[ns]')
+    starts = athletes_df.drop_duplicates('athlete_id').set_index('athlete_id')['baseline_start_date']
+    starts.index = starts.index.astype(str)
+    return pd.to_datetime(starts, errors='coerce')
+
+
+# -------------------------------
+# 2. Vectorized Computation
+# -------------------------------
+KEY_STRIDE = np.int64(1) << 32  # athlete code * stride + day number sorts like the (athlete, date) index
+VARIANCE_TOLERANCE = 1e-9  # relative to the mean square; below this a window is treated as constant
+
+
+def _running_sums(centered: np.ndarray, valid: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """Per-athlete running sums of x, x² and counts, shaped (3 * metrics, rows)
+
+    Restarting the sums for every athlete keeps them small enough to difference exactly.
+    """
+    stacked = np.hstack([centered, centered * centered, valid.astype(np.float64)])
+    return np.ascontiguousarray(pd.DataFrame(stacked).groupby(codes, sort=False).cumsum().to_numpy().T)
+
+
+def _window_zscores(values: np.ndarray, sums: np.ndarray, first: np.ndarray, left: np.ndarray,
+                    right: np.ndarray, min_periods: int) -> np.ndarray:
+    """z-score of every row against rows [left, right) of the same athlete (SD with ddof=1)"""
+    totals = np.take(sums, right - 1, axis=1)
+    totals[:, right <= first] = 0.0
+    lower = np.take(sums, left - 1, axis=1)
+    lower[:, left <= first] = 0.0
+    totals -= lower
+    totals[:, right <= left] = 0.0
+
+    k = len(values)
+    s1, s2, n = totals[:k], totals[k:2 * k], np.rint(totals[2 * k:])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = s1 / n
+        var = s2 - s1 * mean
+        var /= n - 1
+        # Too few days, or a constant window whose variance is only rounding residue
+        unusable = (n < max(min_periods, 2)) | (var <= VARIANCE_TOLERANCE * s2 / n)
+        z = (values - mean) / np.sqrt(var)
+    z[unusable] = np.nan
+    return z
+
+
+def compute_baselines(pivot: pd.DataFrame, starts: Optional[pd.Series] = None) -> pd.DataFrame:
+    """Per-day z-scores of each baseline metric against every window, indexed like the sorted pivot
+
+    Each window covers earlier calendar days only, so today's value is scored
+    against a baseline it did not contribute to.
+    """
+    metrics = [m for m in BASELINE_METRICS if m in pivot.columns]
+    columns = [z_column(m, w) for w in BASELINE_WINDOWS for m in metrics]
+    if not pivot.index.is_monotonic_increasing:
+        pivot = pivot.sort_index()
+    if pivot.empty or not metrics:
+        return pd.DataFrame(columns=columns, index=pivot.index, dtype=np.float32)
+
+    x = pivot[metrics].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    valid = ~np.isnan(x)
+    codes = pd.factorize(pivot.index.get_level_values('athlete_id'))[0]
+    # Center on each athlete's first value so sums of squares stay well conditioned
+    reference = pd.DataFrame(x).groupby(codes).transform('first').to_numpy()
+    centered = np.where(valid, x - reference, 0.0)
+    sums = _running_sums(centered, valid, codes)
+    centered = np.where(valid, centered, np.nan).T
+
+    days = pivot.index.get_level_values('date').to_numpy(dtype='datetime64[D]').astype(np.int64)
+    athlete_keys = codes.astype(np.int64) * KEY_STRIDE
+    keys = athlete_keys + days
+    first = np.searchsorted(keys, athlete_keys + days.min(), side='left')
+    right = np.searchsorted(keys, keys, side='left')  # earlier days only
+    z = {}
+    for name, (offset, min_periods) in ROLLING_WINDOWS.items():
+        left = np.searchsorted(keys, keys - pd.Timedelta(offset).days, side='left')
+        z[name] = _window_zscores(centered, sums, first, left, right, min_periods)
+
+    # Since baseline_start_date, or since the athlete's first day when it is unknown
+    start_days = np.full(len(keys), days.min(), dtype=np.int64)
+    if starts is not None and len(starts):
+        athletes = pivot.index.get_level_values('athlete_id').astype(str)
+        mapped = pd.Series(athletes).map(starts).to_numpy(dtype='datetime64[D]')
+        known = ~np.isnat(mapped)
+        start_days[known] = mapped[known].astype(np.int64)
+    left = np.searchsorted(keys, athlete_keys + start_days, side='left')
+    z[SINCE_BASELINE] = _window_zscores(centered, sums, first, left, right, SINCE_BASELINE_MIN_DAYS)
+
+    scores = np.vstack([z[w] for w in BASELINE_WINDOWS]).T.astype(np.float32)
+    return pd.DataFrame(scores, index=pivot.index, columns=columns)
+
@@ -0,0 +1,277 @@
+# sam_bench.py
+import argparse
+import gc
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+import templateGenerator
+from sam_alerts import build_alerts_history
+from sam_baselines import baseline_start_dates, compute_baselines
+from sam_load import compute_load_metrics
+from sam_compact import CompactBiometrics, memory_report
+from sam_data import pyarrow, preprocess_frames, read_snapshot, read_workbook, write_snapshot
+from sam_genetics import GenotypeStore
+from sam_rules import RuleEngine, format_alert
+from sam_sql import SqlStore
+from sam_state import INDEX_COLS, BiometricsState, athlete_records, latest_per_athlete, rolling_means
+from sam_team import ROSTER_PAGE_SIZES, athlete_card_html, build_team_snapshot, filter_team, roster_page, sort_team
+from sam_zones import ZoneClassifier
+
+# -------------------------------
+# 1. Benchmark Grid
+# -------------------------------
+DEFAULT_ATHLETES = [10, 1000, 10000]
+DEFAULT_DAYS = [14, 365, 730]
+DEFAULT_OUTPUT = "sam_bench_results.json"
+EXCEL_MAX_ROWS = 20_000  # larger workbooks take minutes just to write, so parsing them is opt-in
+PER_CALL_SAMPLE = 200  # athletes sampled for the per-athlete stages
+MIN_COMPARABLE_SECONDS = 0.02  # faster stages are too noisy to flag as regressions
+CARD_METRICS = ['resting_hr', 'hrv_night', 'spo2_night', 'sleep_duration_h', 'deep_sleep_pct', 'rem_sleep_pct']
+
+
+def _measure(fn: Callable, repeat: int, trace_memory: bool) -> tuple:
+    """Best-of-`repeat` wall time plus, optionally, traced peak allocation of one more run"""
+    timings = []
+    result = None
+    for _ in range(max(repeat, 1)):
+        gc.collect()
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    stats = {"seconds": min(timings), "runs": len(timings)}
+    if trace_memory:
+        result = None
+        gc.collect()
+        tracemalloc.start()
+        try:
+            result = fn()
+            stats["peak_mb"] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            tracemalloc.stop()
+    return result, stats
+
+
+def _rss_peak_mb() -> float:
+    """Process high-water RSS (ru_maxrss is KiB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+# -------------------------------
+# 2. Pipeline Stages
+# -------------------------------
+
+def bench_dataset(n_athletes: int, n_days: int, repeat: int = 1, trace_memory: bool = True,
+                  excel_max_rows: int = EXCEL_MAX_ROWS, sample: int = PER_CALL_SAMPLE, seed: int = 42) -> Dict:
+    """Time every dashboard stage on one synthetic dataset, outside Streamlit"""
+    stages: Dict[str, Dict] = {}
+
+    def run(name: str, fn: Callable, calls: Optional[int] = None):
+        result, stats = _measure(fn, repeat, trace_memory)
+        if calls:
+            stats["calls"] = calls
+            stats["us_per_call"] = stats["seconds"] / calls * 1e6
+        stages[name] = stats
+        return result
+
+    raw = run("generate", lambda: templateGenerator.generate_dataset(n_athletes, n_days, seed))
+    rows = len(raw["biometric_daily"])
+
+    with tempfile.TemporaryDirectory(prefix="sam_bench_") as workdir:
+        # Cold workbook parse (openpyxl), only for sizes Excel can hold in reasonable time
+        if rows <= excel_max_rows:
+            workbook = os.path.join(workdir, "bench.xlsx")
+            templateGenerator.write_dataset(raw, workbook)
+            run("read_workbook", lambda: read_workbook(workbook))
+
+        frames = run("preprocess", lambda: preprocess_frames({name: df.copy() for name, df in raw.items()}))
+        del raw
+
+        if pyarrow is not None:
+            snapshot_dir = os.path.join(workdir, "snapshot")
+            fingerprint = {"mtime_ns": 0, "size": 0, "sha256": "", "version": 0}
+            run("snapshot_write", lambda: write_snapshot(frames, snapshot_dir, fingerprint))
+            run("snapshot_read", lambda: read_snapshot(snapshot_dir))
+
+        # Embedded SQLite store: full write, then the per-athlete reads the dashboard pushes down to it
+        store = SqlStore(os.path.join(workdir, "bench.sqlite"))
+        try:
+            view = run("sql_write", lambda: store.write_frames(frames))
+            sql_athletes = list(frames["biometric_daily"]['athlete_id'].drop_duplicates()[:sample])
+            run("sql_athlete_frame", lambda: [view.athlete_frame(aid) for aid in sql_athletes], calls=len(sql_athletes))
+            run("sql_day_summary", view.day_summary)
+        finally:
+            store.close()
+
+    biometrics_df = frames["biometric_daily"]
+    compact = run("compact", lambda: CompactBiometrics(biometrics_df))
+    pivot = run("pivot", lambda: biometrics_df.set_index(INDEX_COLS).sort_index())
+    latest = run("latest", lambda: latest_per_athlete(pivot))
+    rolling = run("rolling", lambda: rolling_means(pivot))
+    baselines = run("baselines", lambda: compute_baselines(pivot, baseline_start_dates(frames["athlete_profiles"])))
+    load = run("load", lambda: compute_load_metrics(pivot))
+    derived = pd.concat([baselines, load], axis=1)
+
+    zones = ZoneClassifier(frames["sam_metrics_config"])
+    run("zones_bulk", lambda: zones.classify_frame(pivot))
+
+    athletes = list(latest.index[:sample])
+    card_rows = [latest.loc[aid] for aid in athletes]
+    run("zone_status", lambda: [zones.status(row[m], m) for row in card_rows for m in CARD_METRICS if m in row.index],
+        calls=len(card_rows) * len(CARD_METRICS))
+
+    engine = RuleEngine(frames["predictive_rules"])
+    genotypes = run("genotype_store", lambda: GenotypeStore(frames["genetic_profiles"]))
+    history = run("alerts_history", lambda: build_alerts_history(pivot, engine, genotypes, derived))
+
+    # The published snapshot: derived tables plus the per-athlete record table the dashboard reads
+    state = run("biometrics_state", lambda: BiometricsState(
+        biometrics_df, engine, genotypes, baseline_starts=baseline_start_dates(frames["athlete_profiles"])))
+    records = run("records", lambda: athlete_records(state))
+
+    # Mirrors app.generate_alert: the latest day's alert, already scored into the record table
+    def generate_alerts():
+        out = []
+        for aid in athletes:
+            record = records.get(aid)
+            alert_type = record.get('alert_type')
+            out.append(format_alert(alert_type if isinstance(alert_type, str) else 'green', record,
+                                    engine.by_id.get(record.get('rule_id'))))
+        return out
+    run("generate_alert", generate_alerts, calls=len(athletes))
+
+    team = run("team_snapshot", lambda: build_team_snapshot(
+        frames["athlete_profiles"], pivot, latest, rolling, history, zones, engine))
+
+    # Mirrors the team overview: filter, sort and page the snapshot, then build the visible cards
+    def team_cards():
+        page_rows, _, _ = roster_page(sort_team(filter_team(team)), 1, ROSTER_PAGE_SIZES[0])
+        return [athlete_card_html(row) for row in page_rows.to_dict('records')]
+    run("team_cards", team_cards, calls=min(len(team), ROSTER_PAGE_SIZES[0]))
+
+    return {
+        "athletes": n_athletes,
+        "days": n_days,
+        "rows": rows,
+        "stages": stages,
+        "memory": memory_report(biometrics_df, compact),
+        "rss_peak_mb": _rss_peak_mb(),
+    }
+
+
+# -------------------------------
+# 3. Reporting and Comparison
+# -------------------------------
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run_metadata() -> Dict:
+    return {
+        "timestamp": datetime.now().isoformat(timespec='seconds'),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "pyarrow": getattr(pyarrow, "__version__", None),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare_results(current: Dict, baseline: Dict, tolerance: float) -> List[Dict]:
+    """Stages whose time grew by more than `tolerance` relative to the baseline run"""
+    previous = {(r["athletes"], r["days"]): r["stages"] for r in baseline.get("results", [])}
+    regressions = []
+    for result in current["results"]:
+        old_stages = previous.get((result["athletes"], result["days"]), {})
+        for stage, stats in result["stages"].items():
+            old = old_stages.get(stage)
+            if not old or old["seconds"] < MIN_COMPARABLE_SECONDS:
+                continue
+            ratio = stats["seconds"] / old["seconds"]
+            if ratio > 1 + tolerance:
+                regressions.append({
+                    "athletes": result["athletes"], "days": result["days"], "stage": stage,
+                    "baseline_seconds": old["seconds"], "seconds": stats["seconds"], "ratio": ratio,
+                })
+    return regressions
+
+
+def format_result(result: Dict) -> str:
+    lines = [f"{result['athletes']:,} athletes × {result['days']} days ({result['rows']:,} rows), "
+             f"peak RSS {result['rss_peak_mb']:.0f} MB, "
+             f"{result['memory']['frame_bytes_per_athlete_day']:.0f} -> "
+             f"{result['memory']['compact_bytes_per_athlete_day']:.0f} bytes/athlete-day compact"]
+    for stage, stats in result["stages"].items():
+        line = f"  {stage:<16} {stats['seconds'] * 1000:10.1f} ms"
+        if "peak_mb" in stats:
+            line += f"  {stats['peak_mb']:9.1f} MB"
+        if "us_per_call" in stats:
+            line += f"  {stats['us_per_call']:9.1f} µs/call"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the SAM pipeline stages on synthetic data")
+    parser.add_argument("--athletes", type=int, nargs="+", default=DEFAULT_ATHLETES)
+    parser.add_argument("--days", type=int, nargs="+", default=DEFAULT_DAYS)
+    parser.add_argument("--repeat", type=int, default=1, help="timed runs per stage (best is kept)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the traced peak-memory run")
+    parser.add_argument("--excel-max-rows", type=int, default=EXCEL_MAX_ROWS,
+                        help="largest dataset to round-trip through an .xlsx workbook")
+    parser.add_argument("--sample", type=int, default=PER_CALL_SAMPLE, help="athletes for per-athlete stages")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="results JSON file")
+    parser.add_argument("--compare", help="earlier results JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before flagging")
+    args = parser.parse_args(argv)
+
+    report = {"meta": run_metadata(), "results": []}
+    for n_athletes in args.athletes:
+        for n_days in args.days:
+            result = bench_dataset(n_athletes, n_days, args.repeat, not args.no_memory,
+                                   args.excel_max_rows, args.sample, args.seed)
+            report["results"].append(result)
+            print(format_result(result), flush=True)
+            gc.collect()
+
+    regressions: List[Dict] = []
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            regressions = compare_results(report, json.load(fh), args.tolerance)
+        report["regressions"] = regressions
+
+    with open(args.output, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"Results written to {args.output}")
+
+    for r in regressions:
+        print(f"REGRESSION {r['athletes']}×{r['days']} {r['stage']}: "
+              f"{r['baseline_seconds'] * 1000:.1f} ms -> {r['seconds'] * 1000:.1f} ms ({r['ratio']:.2f}x)")
+    if regressions:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
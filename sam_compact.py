@@ -0,0 +1,154 @@
+# sam_compact.py
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# -------------------------------
+# 1. Storage Layout
+# -------------------------------
+DATE_EPOCH = np.datetime64('1970-01-01', 'D')
+INT16_NA = np.iinfo(np.int16).min  # sentinel for missing values in scaled int16 columns
+INT16_SCALES = (1, 10, 100)  # decimal places tried for bounded metrics, smallest first
+
+# (kind, values, scale, original dtype) per column; kind is 'int16', 'float32', 'category' or 'raw'
+CompactColumn = Tuple[str, np.ndarray, int, object]
+
+
+def _compact_numeric(values: pd.Series) -> CompactColumn:
+    """Smallest lossless encoding: scaled int16, then float32, else the original array"""
+    floats = values.to_numpy(dtype=np.float64, na_value=np.nan)
+    missing = np.isnan(floats)
+    present = floats[~missing]
+    for scale in INT16_SCALES:
+        scaled = np.round(present * scale)
+        if len(scaled) and (scaled.min() <= INT16_NA or scaled.max() > np.iinfo(np.int16).max):
+            continue
+        if np.array_equal(scaled / scale, present):
+            encoded = np.full(len(floats), INT16_NA, dtype=np.int16)
+            encoded[~missing] = scaled.astype(np.int16)
+            return 'int16', encoded, scale, values.dtype
+    narrowed = floats.astype(np.float32)
+    if np.array_equal(narrowed.astype(np.float64), floats, equal_nan=True):
+        return 'float32', narrowed, 1, values.dtype
+    return 'raw', values.to_numpy(), 1, values.dtype
+
+
+def _expand_column(column: CompactColumn, rows: slice) -> pd.Series:
+    kind, values, scale, dtype = column
+    values = values[rows]
+    if kind == 'int16':
+        floats = values.astype(np.float64) / scale
+        floats[values == INT16_NA] = np.nan
+        return pd.Series(floats).astype(dtype)
+    if kind == 'float32':
+        return pd.Series(values.astype(np.float64)).astype(dtype)
+    return pd.Series(values, dtype=dtype)
+
+
+# -------------------------------
+# 2. Compact Biometrics
+# -------------------------------
+
+class CompactBiometrics:
+    """biometric_daily in a memory-optimized layout, sorted by athlete then date
+
+    Athletes are categorical codes, dates int32 day numbers and bounded metrics
+    scaled int16 (float32 where that is not lossless). Expansion restores the
+    standard typed frame exactly.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        order = np.lexsort((df['date'].to_numpy(), df['athlete_id'].astype(str).to_numpy()))
+        df = df.iloc[order]
+        codes, athletes = pd.factorize(df['athlete_id'].astype(str), sort=True)
+        self.athletes = pd.Index(athletes, name='athlete_id')
+        self.athlete_codes = codes.astype(np.int16 if len(athletes) < np.iinfo(np.int16).max else np.int32)
+        self._athlete_dtype = df['athlete_id'].dtype
+        self._starts = np.searchsorted(self.athlete_codes, np.arange(len(athletes) + 1))
+
+        dates = df['date'].to_numpy()
+        days = dates.astype('datetime64[D]')
+        self._date_dtype = df['date'].dtype
+        if np.array_equal(days.astype(dates.dtype), dates):
+            self.days = (days - DATE_EPOCH).astype(np.int32)
+        else:
+            self.days = dates  # intra-day timestamps: keep them exact
+        self.columns: List[str] = list(df.columns)
+        self._data: Dict[str, CompactColumn] = {}
+        for col in self.columns:
+            if col in ('athlete_id', 'date'):
+                continue
+            series = df[col]
+            if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+                self._data[col] = _compact_numeric(series)
+            elif pd.api.types.is_bool_dtype(series):
+                self._data[col] = ('raw', series.to_numpy(), 1, series.dtype)
+            else:
+                self._data[col] = ('category', pd.Categorical(series), 1, series.dtype)
+        self.attrs = dict(df.attrs)
+
+    def __len__(self) -> int:
+        return len(self.athlete_codes)
+
+    def _dates(self, rows: slice) -> np.ndarray:
+        days = self.days[rows]
+        if days.dtype == np.int32:
+            return (days.astype('timedelta64[D]') + DATE_EPOCH).astype(self._date_dtype)
+        return days
+
+    def _columns(self, rows: slice) -> Dict[str, pd.Series]:
+        out = {}
+        for col, column in self._data.items():
+            if column[0] == 'category':
+                out[col] = pd.Series(np.asarray(column[1][rows], dtype=object)).astype(column[3])
+            else:
+                out[col] = _expand_column(column, rows)
+        return out
+
+    def to_frame(self) -> pd.DataFrame:
+        """Standard biometric_daily frame (athlete/date order, typed as after preprocessing)"""
+        rows = slice(None)
+        data = {
+            'athlete_id': pd.Series(self.athletes.to_numpy(dtype=object)[self.athlete_codes]).astype(self._athlete_dtype),
+            'date': pd.Series(self._dates(rows)),
+        }
+        data.update(self._columns(rows))
+        df = pd.DataFrame(data)[self.columns]
+        df.attrs = dict(self.attrs)
+        return df
+
+    def athlete_frame(self, athlete_id) -> pd.DataFrame:
+        """One athlete's days indexed by date, like pivot.loc[athlete_id]"""
+        pos = self.athletes.get_indexer([str(athlete_id)])[0]
+        if pos < 0:
+            return pd.DataFrame(columns=[c for c in self.columns if c not in ('athlete_id', 'date')])
+        rows = slice(self._starts[pos], self._starts[pos + 1])
+        df = pd.DataFrame(self._columns(rows))
+        df.index = pd.DatetimeIndex(self._dates(rows), name='date')
+        return df[[c for c in self.columns if c not in ('athlete_id', 'date')]]
+
+    @property
+    def nbytes(self) -> int:
+        total = self.athlete_codes.nbytes + self.days.nbytes + int(self.athletes.memory_usage(deep=True))
+        for kind, values, _, _ in self._data.values():
+            if kind == 'category':
+                total += values.codes.nbytes + int(values.categories.memory_usage(deep=True))
+            else:
+                total += values.nbytes
+        return total
+
+
+def memory_report(df: pd.DataFrame, compact: Optional[CompactBiometrics] = None) -> Dict:
+    """Bytes per athlete-day of a biometrics frame and of its compact layout"""
+    compact = compact if compact is not None else CompactBiometrics(df)
+    rows = max(len(df), 1)
+    frame_bytes = int(df.memory_usage(deep=True, index=True).sum())
+    return {
+        'athlete_days': len(df),
+        'frame_bytes': frame_bytes,
+        'compact_bytes': compact.nbytes,
+        'frame_bytes_per_athlete_day': frame_bytes / rows,
+        'compact_bytes_per_athlete_day': compact.nbytes / rows,
+        'reduction': frame_bytes / max(compact.nbytes, 1),
+    }
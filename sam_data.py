@@ -0,0 +1,363 @@
+# sam_data.py
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from sam_telemetry import timer
+
+try:
+    import pyarrow  # noqa: F401  (required by DataFrame.to_parquet / read_parquet)
+except ImportError:  # snapshot cache is skipped without it
+    pyarrow = None
+
+# -------------------------------
+# 1. Workbook Layout
+# -------------------------------
+SHEET_NAMES = [
+    "athlete_profiles",
+    "genetic_profiles",
+    "biometric_daily",
+    "sam_metrics_config",
+    "predictive_rules",
+]
+REQUIRED_ATHLETE_COLS = ['athlete_id', 'name', 'sport', 'age', 'team']
+TIME_COLUMNS = ['sleep_onset_time', 'wake_time']
+
+# Times of day are stored as minutes since noon: 23:30 -> 690, 00:30 -> 750
+NOON_MINUTES = 12 * 60
+MINUTES_PER_DAY = 24 * 60
+# Whole cell: optional ISO date, H:MM[:SS[.fff]], optional AM/PM, optional UTC offset
+CLOCK_PATTERN = (
+    r'^\s*(?:\d{4}-\d{2}-\d{2}[T ])?(\d{1,2}):(\d{2})(?::\d{2}(?:\.\d+)?)?'
+    r'(?:\s*([AaPp])\.?\s*[Mm]\.?)?\s*(?:Z|[+-]\d{2}:?\d{2})?\s*$'
+)
+
+# Bump whenever the preprocessing below changes so stale snapshots are rebuilt
+SNAPSHOT_VERSION = 5
+SNAPSHOT_DIRNAME = ".sam_snapshot"
+DIGEST_MIX = np.uint64(0x9E3779B97F4A7C15)  # spreads row positions before they enter the row digest
+MANIFEST_FILE = "manifest.json"
+
+
+class DataValidationError(ValueError):
+    """Raised when a workbook sheet is missing required structure"""
+
+
+# -------------------------------
+# 2. Parsing & Preprocessing
+# -------------------------------
+
+def clock_minutes(hour: int, minute: int = 0) -> int:
+    """Clock time as minutes since noon, so an evening-to-morning night is one increasing range"""
+    return (hour * 60 + minute - NOON_MINUTES) % MINUTES_PER_DAY
+
+
+def parse_clock_minutes(values: pd.Series) -> pd.Series:
+    """Parse time-of-day cells into nullable Int16 minutes since noon
+
+    Accepts 'HH:MM' / 'HH:MM:SS' strings with an optional AM/PM suffix or ISO date
+    prefix, datetime.time and datetime cells, and Excel day fractions; anything
+    else becomes <NA>. Only distinct values are parsed.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        after_midnight = (values.dt.hour * 60 + values.dt.minute).astype('Float64')
+    else:
+        codes, uniques = pd.factorize(values, use_na_sentinel=True)
+        uniques = pd.Series(uniques, dtype=object)
+        parts = uniques.astype(str).str.extract(CLOCK_PATTERN)
+        hours = pd.to_numeric(parts[0], errors='coerce')
+        minutes = pd.to_numeric(parts[1], errors='coerce')
+        meridiem = parts[2].str.upper()
+        twelve_hour = meridiem.notna()
+        valid = (minutes < 60) & ((hours < 24) & ~twelve_hour | (hours >= 1) & (hours <= 12) & twelve_hour)
+        hours = hours.where(~twelve_hour, hours % 12 + (meridiem == 'P') * 12)
+        parsed = (hours * 60 + minutes).where(valid)
+        # Excel stores bare times as fractions of a day
+        is_number = uniques.map(lambda v: isinstance(v, (int, float)) and not isinstance(v, bool)).astype(bool)
+        fractions = pd.to_numeric(uniques.where(is_number), errors='coerce')
+        parsed = parsed.fillna((fractions * MINUTES_PER_DAY).round().where((fractions >= 0) & (fractions < 1)))
+        lookup = np.append(parsed.to_numpy(dtype=np.float64, na_value=np.nan), np.nan)
+        after_midnight = pd.Series(lookup[codes], index=values.index, dtype='Float64')
+    return ((after_midnight - NOON_MINUTES) % MINUTES_PER_DAY).astype('Int16')
+
+
+def format_clock(minutes_since_noon) -> Optional[str]:
+    """'HH:MM' for a minutes-since-noon value (None when missing)"""
+    if minutes_since_noon is None or pd.isna(minutes_since_noon):
+        return None
+    after_midnight = (int(minutes_since_noon) + NOON_MINUTES) % MINUTES_PER_DAY
+    return f"{after_midnight // 60:02d}:{after_midnight % 60:02d}"
+
+
+def preprocess_athletes(athletes_df: pd.DataFrame) -> pd.DataFrame:
+    """Validate athlete_profiles and type the baseline dates"""
+    # Validate required columns
+    missing_cols = [col for col in REQUIRED_ATHLETE_COLS if col not in athletes_df.columns]
+    if missing_cols:
+        raise DataValidationError(f"Missing columns in athlete_profiles: {missing_cols}")
+
+    # Process athlete baseline dates
+    if 'baseline_start_date' in athletes_df.columns:
+        athletes_df['baseline_start_date'] = pd.to_datetime(athletes_df['baseline_start_date'], errors='coerce').dt.date
+    return athletes_df
+
+
+def _mix64(values: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer over a uint64 array (wrapping arithmetic)"""
+    with np.errstate(over='ignore'):
+        values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return values ^ (values >> np.uint64(31))
+
+
+def _cell_hashes(values: pd.Series) -> np.ndarray:
+    """uint64 per cell, equal for the pandas and openpyxl parses of a column; 0 for empty cells"""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return _mix64(values.to_numpy(dtype='datetime64[ns]').view(np.uint64)) * values.notna().to_numpy()
+    if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+        numbers = values
+    else:
+        kind = pd.api.types.infer_dtype(values, skipna=True)
+        if kind in ('datetime', 'datetime64', 'date'):
+            return _cell_hashes(pd.to_datetime(values, errors='coerce'))
+        # Numbers compare by value whatever their dtype (int64, float64, object cells); the rest as text
+        if kind in ('integer', 'floating', 'mixed-integer-float', 'boolean', 'empty'):
+            numbers = values.astype(np.float64)
+        else:
+            numbers = pd.to_numeric(values, errors='coerce') if kind != 'string' else None
+    hashes = np.zeros(len(values), dtype=np.uint64)
+    if numbers is not None:
+        floats = numbers.to_numpy(dtype=np.float64, na_value=np.nan)
+        is_number = ~np.isnan(floats)
+        hashes[is_number] = _mix64(floats[is_number].view(np.uint64))
+    else:
+        is_number = np.zeros(len(values), dtype=bool)
+    is_text = values.notna().to_numpy() & ~is_number
+    if is_text.any():
+        text = values[is_text].astype(str).to_numpy(dtype=object)
+        hashes[is_text] = pd.util.hash_array(text) | np.uint64(1)
+    return hashes
+
+
+def rows_digest(biometrics_df: pd.DataFrame, start: int = 0, base: Optional[str] = None) -> str:
+    """Order-sensitive content hash of raw biometric rows, equal for the pandas and openpyxl parses of a sheet
+
+    The rows are taken to sit at positions start, start + 1, ...; the digest of a
+    longer sheet is the digest of its first rows (base) extended by the rest.
+    """
+    rows = np.zeros(len(biometrics_df), dtype=np.uint64)
+    names = {str(col): col for col in biometrics_df.columns if not str(col).startswith('Unnamed:')}
+    for name in sorted(names):
+        key = np.uint64(int(hashlib.sha1(name.encode('utf-8')).hexdigest()[:16], 16))
+        rows = _mix64(rows ^ key ^ _cell_hashes(biometrics_df[names[name]]))
+    positions = np.arange(start, start + len(rows), dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        total = int(_mix64(rows + positions * DIGEST_MIX).sum(dtype=np.uint64))
+    return f"{(int(base or '0', 16) + total) % 2 ** 64:016x}"
+
+
+def _type_biometrics(biometrics_df: pd.DataFrame) -> pd.DataFrame:
+    biometrics_df['date'] = pd.to_datetime(biometrics_df['date'], errors='coerce')
+    biometrics_df = biometrics_df.dropna(subset=['date'])
+
+    # Clock columns become minutes since noon in one pass over their distinct values
+    for col in TIME_COLUMNS:
+        if col in biometrics_df.columns:
+            biometrics_df[col] = parse_clock_minutes(biometrics_df[col])
+    return biometrics_df
+
+
+def _dedupe_days(biometrics_df: pd.DataFrame) -> pd.DataFrame:
+    """One row per athlete-day: a later row for the same day supersedes earlier ones"""
+    if 'athlete_id' not in biometrics_df.columns:
+        return biometrics_df
+    return biometrics_df.drop_duplicates(['athlete_id', 'date'], keep='last')
+
+
+def preprocess_biometrics(biometrics_df: pd.DataFrame) -> pd.DataFrame:
+    """Type dates/times of biometric_daily rows, drop rows without a valid date and keep the last row per athlete-day"""
+    if 'date' not in biometrics_df.columns:
+        raise DataValidationError("Missing 'date' column in biometric_daily sheet")
+
+    # Remember how many raw rows were consumed, and their content, so later reads can skip them
+    source_rows = len(biometrics_df)
+    source_digest = rows_digest(biometrics_df)
+    biometrics_df = _dedupe_days(_type_biometrics(biometrics_df))
+    biometrics_df.attrs.update(source_rows=source_rows, source_digest=source_digest)
+    return biometrics_df
+
+
+def preprocess_frames(frames: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """Validate raw sheets and convert dates/times to typed columns"""
+    frames = dict(frames)
+    frames["athlete_profiles"] = preprocess_athletes(frames["athlete_profiles"])
+    frames["biometric_daily"] = preprocess_biometrics(frames["biometric_daily"])
+    return frames
+
+
+def read_workbook(path: str) -> Dict[str, pd.DataFrame]:
+    """Parse every sheet of the workbook in a single openpyxl pass"""
+    frames = pd.read_excel(path, sheet_name=SHEET_NAMES)
+    return preprocess_frames(frames)
+
+
+def read_sheets(path: str, sheet_names: List[str]) -> Dict[str, pd.DataFrame]:
+    """Parse a subset of sheets (e.g. the small config sheets) without touching the rest"""
+    frames = pd.read_excel(path, sheet_name=list(sheet_names))
+    if "athlete_profiles" in frames:
+        frames["athlete_profiles"] = preprocess_athletes(frames["athlete_profiles"])
+    if "biometric_daily" in frames:
+        frames["biometric_daily"] = preprocess_biometrics(frames["biometric_daily"])
+    return frames
+
+
+def read_appended_rows(path: str, source_rows: int, source_digest: Optional[str]) -> Optional[pd.DataFrame]:
+    """Typed biometric_daily rows added after the first source_rows rows
+
+    Returns None when the first source_rows rows no longer hash to source_digest,
+    i.e. earlier rows were edited, inserted or deleted and a full reload is needed.
+    """
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook["biometric_daily"].iter_rows(values_only=True)
+        header = list(next(rows, ()))
+        body = list(rows)
+    finally:
+        workbook.close()
+
+    if 'athlete_id' not in header or 'date' not in header or len(body) < source_rows:
+        return None
+    if source_rows and source_digest is None:
+        return None
+
+    columns = [str(h) for h in header if h is not None]
+    raw = pd.DataFrame([row[:len(columns)] for row in body], columns=columns)
+    if source_rows and rows_digest(raw.iloc[:source_rows]) != source_digest:
+        return None
+
+    # Only the rows past the consumed ones are typed; the digest is extended, not recomputed
+    appended = raw.iloc[source_rows:]
+    digest = rows_digest(appended, start=source_rows, base=source_digest)
+    appended = appended.dropna(how='all')
+    new_rows = _dedupe_days(_type_biometrics(appended.copy())) if not appended.empty else appended
+    new_rows.attrs.update(source_rows=len(raw), source_digest=digest)
+    return new_rows
+
+
+# -------------------------------
+# 3. Columnar Snapshot Cache
+# -------------------------------
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    """Content hash of a file, read in fixed-size chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def snapshot_dir_for(path: str) -> str:
+    """Default snapshot location: a hidden folder next to the workbook"""
+    return os.path.join(os.path.dirname(os.path.abspath(path)), SNAPSHOT_DIRNAME)
+
+
+def _read_manifest(snapshot_dir: str) -> Optional[Dict]:
+    try:
+        with open(os.path.join(snapshot_dir, MANIFEST_FILE), encoding='utf-8') as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(snapshot_dir: str, manifest: Dict) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=snapshot_dir, suffix='.json')
+    with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+        json.dump(manifest, fh, indent=2)
+    os.replace(tmp_path, os.path.join(snapshot_dir, MANIFEST_FILE))
+
+
+def _snapshot_is_current(manifest: Optional[Dict], stat: os.stat_result, path: str, snapshot_dir: str) -> bool:
+    """Cheap mtime/size check first, falling back to the content hash"""
+    if not manifest or manifest.get("version") != SNAPSHOT_VERSION:
+        return False
+    if not all(os.path.exists(os.path.join(snapshot_dir, f"{name}.parquet")) for name in SHEET_NAMES):
+        return False
+    if manifest.get("mtime_ns") == stat.st_mtime_ns and manifest.get("size") == stat.st_size:
+        return True
+    if manifest.get("sha256") != file_sha256(path):
+        return False
+    # Workbook was touched but not changed: refresh the mtime key and keep the snapshot
+    manifest.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+    _write_manifest(snapshot_dir, manifest)
+    return True
+
+
+def workbook_version(path: str) -> str:
+    """Cheap mtime/size/inode key for caching results derived from the workbook (inode: replaced by an atomic save)"""
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}-{stat.st_size}-{stat.st_ino}"
+
+
+def workbook_fingerprint(path: str) -> Dict:
+    """mtime/size/content-hash key identifying one version of the workbook"""
+    stat = os.stat(path)
+    return {
+        "workbook": os.path.abspath(path),
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": file_sha256(path),
+    }
+
+
+def write_snapshot(frames: Dict[str, pd.DataFrame], snapshot_dir: str, fingerprint: Dict) -> None:
+    """Persist one Parquet file per sheet plus a manifest keyed on the workbook"""
+    os.makedirs(snapshot_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=snapshot_dir, prefix='.staging-')
+    try:
+        for name in SHEET_NAMES:
+            frames[name].to_parquet(os.path.join(staging, f"{name}.parquet"), index=False)
+        for name in SHEET_NAMES:
+            os.replace(os.path.join(staging, f"{name}.parquet"), os.path.join(snapshot_dir, f"{name}.parquet"))
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    # Manifest goes last so a half-written snapshot is never considered current
+    _write_manifest(snapshot_dir, dict(fingerprint, version=SNAPSHOT_VERSION))
+
+
+def read_snapshot(snapshot_dir: str) -> Dict[str, pd.DataFrame]:
+    """Load the typed per-sheet Parquet files"""
+    return {name: pd.read_parquet(os.path.join(snapshot_dir, f"{name}.parquet")) for name in SHEET_NAMES}
+
+
+def load_frames(path: str, snapshot_dir: Optional[str] = None, use_snapshot: bool = True) -> Dict[str, pd.DataFrame]:
+    """Load all sheets, reading the columnar snapshot when it matches the workbook"""
+    if not use_snapshot or pyarrow is None:
+        return read_workbook(path)
+
+    snapshot_dir = snapshot_dir or snapshot_dir_for(path)
+    stat = os.stat(path)
+    if _snapshot_is_current(_read_manifest(snapshot_dir), stat, path, snapshot_dir):
+        try:
+            with timer('load.snapshot_read'):
+                return read_snapshot(snapshot_dir)
+        except Exception:
+            pass  # Corrupt snapshot: fall through and rebuild it
+
+    # Fingerprint before parsing so an edit made mid-read invalidates the snapshot
+    fingerprint = workbook_fingerprint(path)
+    with timer('load.workbook_parse'):
+        frames = read_workbook(path)
+    try:
+        with timer('load.snapshot_write'):
+            write_snapshot(frames, snapshot_dir, fingerprint)
+    except Exception:
+        pass  # Read-only deployment or untypeable sheet: serve the parsed workbook uncached
+    return frames
@@ -0,0 +1,106 @@
+# sam_genetics.py
+import hashlib
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+MISSING_CODE = -1
+
+
+def parse_genetic_condition(condition) -> Optional[List[Tuple[str, str]]]:
+    """'PER3 long or CLOCK AA' -> [('PER3', 'long'), ('CLOCK', 'AA')]; 'Any' -> None"""
+    if condition is None or pd.isna(condition) or str(condition).strip().casefold() in ('', 'any'):
+        return None
+    clauses = []
+    for clause in re.split(r',|\bor\b', str(condition)):
+        parts = clause.split()
+        if len(parts) >= 2:
+            clauses.append((parts[0], ' '.join(parts[1:])))
+    return clauses
+
+
+class GenotypeStore:
+    """Athlete × gene matrix of categorical genotype codes, built once per data version"""
+
+    def __init__(self, genetics_df: Optional[pd.DataFrame] = None):
+        self._dicts: Dict[str, Dict] = {}
+        if genetics_df is None or genetics_df.empty or not {'athlete_id', 'gene', 'genotype'} <= set(genetics_df.columns):
+            self.athletes = pd.Index([], name='athlete_id')
+            self.genes: List[str] = []
+            self.categories = pd.Index([])
+            self.codes = np.empty((0, 0), dtype=np.int16)
+            self._gene_pos: Dict[str, int] = {}
+            self._athlete_pos: Dict[str, int] = {}
+            return
+
+        athlete_ids = genetics_df['athlete_id'].astype(str).to_numpy()
+        genes = genetics_df['gene'].astype(str).to_numpy()
+        genotypes = genetics_df['genotype'].to_numpy(dtype=object)
+
+        # Per-athlete dictionaries in sheet order (later duplicates overwrite earlier ones)
+        for athlete_id, gene, genotype in zip(athlete_ids, genes, genotypes):
+            self._dicts.setdefault(athlete_id, {})[gene] = genotype
+
+        athlete_codes, athletes = pd.factorize(athlete_ids)
+        gene_codes, gene_names = pd.factorize(genes)
+        genotype_codes, categories = pd.factorize(pd.Series(genotypes, dtype=object))
+        self.athletes = pd.Index(athletes, name='athlete_id')
+        self.genes = list(gene_names)
+        self.categories = pd.Index(categories)
+        self.codes = np.full((len(athletes), len(gene_names)), MISSING_CODE, dtype=np.int16)
+        self.codes[athlete_codes, gene_codes] = genotype_codes  # last duplicate wins
+        self._gene_pos = {gene: i for i, gene in enumerate(self.genes)}
+        self._athlete_pos = {athlete: i for i, athlete in enumerate(self.athletes)}
+
+    def __len__(self) -> int:
+        return len(self.athletes)
+
+    @property
+    def signature(self) -> str:
+        """Stable hash of every athlete's genotypes, for invalidating stored results"""
+        spec = repr(sorted((athlete, sorted((gene, str(genotype)) for gene, genotype in genes.items()))
+                           for athlete, genes in self._dicts.items()))
+        return hashlib.sha1(spec.encode('utf-8')).hexdigest()
+
+    def __contains__(self, athlete_id) -> bool:
+        return str(athlete_id) in self._dicts
+
+    def get(self, athlete_id) -> Dict:
+        """Gene -> genotype dictionary for one athlete (empty when unknown)"""
+        return self._dicts.get(str(athlete_id), {})
+
+    def genotype(self, athlete_id, gene: str, default=None):
+        return self._dicts.get(str(athlete_id), {}).get(gene, default)
+
+    def table(self) -> pd.DataFrame:
+        """Wide athlete × gene genotype table"""
+        values = np.asarray(self.categories, dtype=object)
+        wide = np.where(self.codes >= 0, values[np.maximum(self.codes, 0)] if len(values) else None, None)
+        return pd.DataFrame(wide, index=self.athletes, columns=self.genes)
+
+    def matches(self, gene: str, genotype: str) -> np.ndarray:
+        """Boolean per athlete: carries `genotype` at `gene` (case-insensitive)"""
+        col = self._gene_pos.get(gene)
+        if col is None:
+            return np.zeros(len(self.athletes), dtype=bool)
+        wanted = [code for code, value in enumerate(self.categories) if str(value).casefold() == genotype.casefold()]
+        return np.isin(self.codes[:, col], wanted)
+
+    def condition_mask(self, clauses: Optional[Iterable[Tuple[str, str]]]) -> np.ndarray:
+        """OR of (gene, genotype) clauses per athlete; None means any genotype"""
+        if clauses is None:
+            return np.ones(len(self.athletes), dtype=bool)
+        mask = np.zeros(len(self.athletes), dtype=bool)
+        for gene, genotype in clauses:
+            mask |= self.matches(gene, genotype)
+        return mask
+
+    def condition(self, condition: str) -> pd.Series:
+        """Evaluate a genetic_condition string such as 'PER3 long or CLOCK AA' across the roster"""
+        return pd.Series(self.condition_mask(parse_genetic_condition(condition)), index=self.athletes)
+
+    def positions(self, athlete_ids: Iterable) -> np.ndarray:
+        """Row positions of athlete ids in the matrix (-1 when unknown)"""
+        return np.array([self._athlete_pos.get(str(a), -1) for a in athlete_ids], dtype=np.int64)
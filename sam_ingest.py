@@ -0,0 +1,307 @@
+# sam_ingest.py
+import argparse
+import io
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from sam_data import TIME_COLUMNS, DataValidationError, parse_clock_minutes, pyarrow
+from sam_telemetry import count, timer
+
+# -------------------------------
+# 1. Field Mapping
+# -------------------------------
+EXPORT_EXTENSIONS = ('.csv', '.jsonl', '.ndjson')
+CHUNK_ROWS = 5000  # records held in memory at once, whatever the export size
+INGEST_DIRNAME = "ingested"  # numbered Parquet parts + checkpoint, inside the snapshot folder
+CHECKPOINT_FILE = "checkpoint.json"
+CHECKPOINT_VERSION = 1
+PART_TEMPLATE = "part-{:06d}.parquet"
+ISO_DAY_PATTERN = r'^(\d{4}-\d{2}-\d{2})'
+
+# biometric_daily column -> export field names seen in common wearable exports (normalized, see _field_key)
+FIELD_ALIASES: Dict[str, List[str]] = {
+    'athlete_id': ['athlete_id', 'athlete', 'user_id', 'userid', 'subject_id', 'participant_id'],
+    'date': ['date', 'day', 'summary_date', 'calendar_date', 'sleep_date', 'cycle_start_time'],
+    'resting_hr': ['resting_hr', 'resting_heart_rate', 'restingheartrate', 'rhr', 'lowest_heart_rate'],
+    'avg_hr_day': ['avg_hr_day', 'average_heart_rate', 'averageheartrate', 'avg_hr'],
+    'hrv_night': ['hrv_night', 'hrv', 'rmssd', 'hrv_rmssd', 'average_hrv', 'nightly_hrv', 'hrv_rmssd_milli'],
+    'spo2_night': ['spo2_night', 'spo2', 'average_spo2', 'spo2_percentage', 'oxygen_saturation'],
+    'deep_sleep_pct': ['deep_sleep_pct', 'deep_pct', 'deep_sleep_percentage'],
+    'rem_sleep_pct': ['rem_sleep_pct', 'rem_pct', 'rem_sleep_percentage'],
+    'light_sleep_pct': ['light_sleep_pct', 'light_pct', 'light_sleep_percentage'],
+    'sleep_duration_h': ['sleep_duration_h', 'sleep_hours', 'total_sleep_hours', 'sleep_duration_hours'],
+    'resp_rate_night': ['resp_rate_night', 'respiratory_rate', 'breathing_rate', 'average_breath'],
+    'temp_trend_c': ['temp_trend_c', 'skin_temp_celsius', 'body_temperature', 'temperature_c'],
+    'training_load_pct': ['training_load_pct', 'training_load', 'strain', 'load_pct'],
+    'sleep_onset_time': ['sleep_onset_time', 'bedtime_start', 'sleep_start', 'bedtime'],
+    'wake_time': ['wake_time', 'bedtime_end', 'sleep_end', 'wakeup_time'],
+}
+# Export fields in other units: field -> (biometric_daily column, factor)
+SCALED_FIELDS: Dict[str, Tuple[str, float]] = {
+    'total_sleep_duration': ('sleep_duration_h', 1 / 3600),  # seconds
+    'total_sleep_time_milli': ('sleep_duration_h', 1 / 3_600_000),
+    'sleep_duration_min': ('sleep_duration_h', 1 / 60),
+    'total_sleep_minutes': ('sleep_duration_h', 1 / 60),
+}
+_FIELD_TARGETS = {alias: column for column, aliases in FIELD_ALIASES.items() for alias in aliases}
+
+
+def _field_key(name) -> str:
+    """Export field name folded to lower snake case: 'Resting Heart-Rate' -> 'resting_heart_rate'"""
+    return re.sub(r'[^0-9a-z]+', '_', str(name).strip().lower()).strip('_')
+
+
+def _calendar_day(values: pd.Series) -> pd.Series:
+    """Dates or timestamps as midnight of their local calendar day (ISO offsets are ignored, not converted)"""
+    text = values.astype(str)
+    day = text.str.extract(ISO_DAY_PATTERN)[0].fillna(text)
+    return pd.to_datetime(day, errors='coerce').dt.normalize()
+
+
+def map_fields(raw: pd.DataFrame) -> pd.DataFrame:
+    """Rename export fields to biometric_daily columns and type them; unknown fields are dropped
+
+    Rows without an athlete or a valid date are dropped, and repeated athlete-days
+    keep their last record.
+    """
+    columns: Dict[str, pd.Series] = {}
+    for name in raw.columns:
+        key = _field_key(name)
+        if key not in SCALED_FIELDS and key not in _FIELD_TARGETS:
+            key = _field_key(str(name).rsplit('.', 1)[-1])  # nested JSON field: match on its leaf name
+        if key in SCALED_FIELDS:
+            column, factor = SCALED_FIELDS[key]
+            values = pd.to_numeric(raw[name], errors='coerce') * factor
+        elif key in _FIELD_TARGETS:
+            column, values = _FIELD_TARGETS[key], raw[name]
+        else:
+            continue
+        # Several fields can feed one column: the first non-empty one wins per record
+        columns[column] = columns[column].where(columns[column].notna(), values) if column in columns else values
+    missing = [col for col in ('athlete_id', 'date') if col not in columns]
+    if missing:
+        raise DataValidationError(f"Wearable export has no field for {missing}")
+
+    mapped = pd.DataFrame(columns, index=raw.index)
+    mapped['athlete_id'] = mapped['athlete_id'].astype(str).str.strip().where(mapped['athlete_id'].notna())
+    mapped['date'] = _calendar_day(mapped['date'])
+    for col in mapped.columns:
+        if col in TIME_COLUMNS:
+            mapped[col] = parse_clock_minutes(mapped[col])
+        elif col not in ('athlete_id', 'date'):
+            mapped[col] = pd.to_numeric(mapped[col], errors='coerce').astype('float64')
+    mapped = mapped.dropna(subset=['athlete_id', 'date'])
+    mapped = mapped[mapped['athlete_id'] != '']
+    return mapped.drop_duplicates(['athlete_id', 'date'], keep='last').reset_index(drop=True)
+
+
+# -------------------------------
+# 2. Chunked Export Reader
+# -------------------------------
+
+def _parse_lines(lines: List[bytes], header: Optional[bytes]) -> pd.DataFrame:
+    if header is not None:
+        return pd.read_csv(io.BytesIO(header + b''.join(lines)), dtype=str, encoding='utf-8-sig')
+    records = []
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        if isinstance(record, dict):
+            records.append(record)
+        else:
+            count('ingest.bad_lines')
+    # Nested objects flatten to dotted names, e.g. 'sleep.total_sleep_duration'
+    return pd.json_normalize(records, sep='.') if records else pd.DataFrame()
+
+
+def _complete_records(fh, quoted: bool) -> Iterator[bytes]:
+    """Newline-terminated records from the file position on; with quoted (CSV), a record
+    continues over line breaks inside a quoted field. An unterminated last record is not yielded.
+    """
+    record, open_quote = b'', False
+    for line in iter(fh.readline, b''):
+        if not line.endswith(b'\n'):
+            return
+        record += line
+        if quoted and line.count(b'"') % 2:
+            open_quote = not open_quote  # doubled "" escapes keep the parity
+        if not open_quote:
+            yield record
+            record = b''
+
+
+def read_export(path: str, offset: int = 0, chunk_rows: int = CHUNK_ROWS) -> Iterator[Tuple[pd.DataFrame, int]]:
+    """Raw records of a CSV or JSON-lines export after a byte offset, as (chunk, offset after the chunk)
+
+    Only one chunk of records is held at a time, and chunks end on record boundaries
+    (also around quoted CSV fields holding line breaks). A last record without its
+    newline is assumed to be still being written and is left for the next pass.
+    """
+    with open(path, 'rb') as fh:
+        header = None
+        if path.lower().endswith('.csv'):
+            header = next(_complete_records(fh, quoted=True), None)
+            if header is None:
+                return
+            offset = max(offset, fh.tell())
+        fh.seek(offset)
+        lines: List[bytes] = []
+        for record in _complete_records(fh, quoted=header is not None):
+            lines.append(record)
+            offset += len(record)
+            if len(lines) >= chunk_rows:
+                yield _parse_lines(lines, header), offset
+                lines = []
+        if lines:
+            yield _parse_lines(lines, header), offset
+
+
+# -------------------------------
+# 3. Checkpointed Ingestion
+# -------------------------------
+
+class WearableIngester:
+    """Streams new records of wearable exports in a drop folder into numbered Parquet parts
+
+    Each chunk is mapped to biometric_daily columns and written as the next part
+    before the checkpoint (byte offset per export, committed part count) moves
+    past it, so an interrupted pass resumes at the last committed offset and
+    rewrites the same part. Exports may keep growing; a replaced or truncated
+    export is read again from the start. Only committed parts are ever read.
+
+    Repeated athlete-days resolve to the record ingested last, within a chunk as
+    across chunks and exports (exports are read in name order). An export that
+    fails to read is skipped until the next poll, its error kept in errors.
+    """
+
+    def __init__(self, watch_dir: str, out_dir: str, chunk_rows: int = CHUNK_ROWS):
+        if pyarrow is None:
+            raise ImportError("Wearable ingestion needs pyarrow for its Parquet parts")
+        self.watch_dir = watch_dir
+        self.out_dir = out_dir
+        self.chunk_rows = chunk_rows
+        self.errors: Dict[str, Exception] = {}
+        self._lock = threading.Lock()
+        self._checkpoint = self._read_checkpoint()
+
+    def _read_checkpoint(self) -> Dict:
+        try:
+            with open(os.path.join(self.out_dir, CHECKPOINT_FILE), encoding='utf-8') as fh:
+                checkpoint = json.load(fh)
+            if checkpoint.get('version') == CHECKPOINT_VERSION:
+                return checkpoint
+        except (OSError, ValueError):
+            pass
+        return {'version': CHECKPOINT_VERSION, 'parts': 0, 'files': {}}
+
+    def _write_checkpoint(self) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.out_dir, suffix='.json')
+        with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+            json.dump(self._checkpoint, fh, indent=2)
+        os.replace(tmp_path, os.path.join(self.out_dir, CHECKPOINT_FILE))
+
+    @property
+    def parts(self) -> int:
+        """Number of committed parts (grows by one per ingested chunk)"""
+        return self._checkpoint['parts']
+
+    def exports(self) -> List[str]:
+        try:
+            names = sorted(os.listdir(self.watch_dir))
+        except FileNotFoundError:
+            return []
+        return [os.path.join(self.watch_dir, name) for name in names
+                if name.lower().endswith(EXPORT_EXTENSIONS) and not name.startswith('.')]
+
+    def _start_offset(self, path: str, stat: os.stat_result) -> Optional[int]:
+        """Byte offset to resume from, or None when nothing was added since the last pass"""
+        seen = self._checkpoint['files'].get(os.path.abspath(path))
+        if seen is None or seen['inode'] != stat.st_ino or stat.st_size < seen['offset']:
+            return 0
+        if stat.st_size == seen['offset']:
+            return None
+        return seen['offset']
+
+    def ingest_file(self, path: str) -> int:
+        """Ingest the records added to one export since the checkpoint; returns rows written"""
+        stat = os.stat(path)
+        offset = self._start_offset(path, stat)
+        if offset is None:
+            return 0
+        written = 0
+        for raw, end in read_export(path, offset, self.chunk_rows):
+            rows = map_fields(raw) if not raw.empty else raw
+            part = self.parts
+            if not rows.empty:
+                rows.to_parquet(os.path.join(self.out_dir, PART_TEMPLATE.format(part)), index=False)
+                part += 1
+                written += len(rows)
+            self._checkpoint['parts'] = part
+            self._checkpoint['files'][os.path.abspath(path)] = {'inode': stat.st_ino, 'offset': end}
+            self._write_checkpoint()
+        return written
+
+    def poll(self) -> int:
+        """Ingest everything new in the drop folder; returns the committed part count"""
+        with self._lock:
+            exports = self.exports()
+            if not exports:
+                return self.parts
+            os.makedirs(self.out_dir, exist_ok=True)
+            with timer('ingest.poll'):
+                for path in exports:
+                    try:
+                        rows = self.ingest_file(path)
+                    except (OSError, ValueError) as e:  # half-copied or malformed export: retried next poll
+                        self.errors[path] = e
+                        count('ingest.errors')
+                        continue
+                    self.errors.pop(path, None)
+                    if rows:
+                        count('ingest.rows', rows)
+            return self.parts
+
+    def read_parts(self, start: int = 0, stop: Optional[int] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Ingested rows of committed parts [start, stop), oldest first"""
+        stop = self.parts if stop is None else stop
+        frames = [pd.read_parquet(os.path.join(self.out_dir, PART_TEMPLATE.format(part)), columns=columns)
+                  for part in range(start, stop)]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['athlete_id', 'date'])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Ingest wearable CSV / JSON-lines exports dropped into a folder")
+    parser.add_argument("watch_dir", help="folder the wearable exports are dropped into")
+    parser.add_argument("-o", "--output", required=True,
+                        help=f"folder for the Parquet parts and checkpoint (the dashboard reads <snapshot>/{INGEST_DIRNAME})")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="records read per chunk")
+    parser.add_argument("--interval", type=float, default=0, help="keep polling every N seconds (0 = one pass)")
+    args = parser.parse_args(argv)
+
+    ingester = WearableIngester(args.watch_dir, args.output, args.chunk_rows)
+    while True:
+        before = ingester.parts
+        parts = ingester.poll()
+        if parts > before:
+            print(f"✅ Ingested {parts - before} chunk(s) from {args.watch_dir} -> {args.output}")
+        for path, error in ingester.errors.items():
+            print(f"⚠️ Skipped {path}: {error}", file=sys.stderr)
+        if args.interval <= 0:
+            return 0
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+# sam_load.py
+import numpy as np
+import pandas as pd
+
+# -------------------------------
+# 1. Load Model
+# -------------------------------
+LOAD_METRIC = 'training_load_pct'
+ACUTE_SPAN = 7  # EWMA spans in days; alpha = 2 / (span + 1)
+CHRONIC_SPAN = 28
+CHRONIC_MIN_DAYS = 7  # ACWR is undefined until the chronic load has this many days behind it
+MONOTONY_DAYS = 7  # Foster monotony/strain use one training week
+
+LOAD_COLUMNS = ['load_acute', 'load_chronic', 'acwr', 'load_monotony', 'load_strain']
+
+
+# -------------------------------
+# 2. Vectorized Computation
+# -------------------------------
+
+def _calendar_days(pivot: pd.DataFrame) -> tuple:
+    """Daily grid covering each athlete's first to last day: (grid group ids, grid position of every pivot row)"""
+    athletes = np.asarray(pivot.index.codes[0])
+    days = pivot.index.get_level_values('date').to_numpy().astype('datetime64[D]').astype(np.int64)
+    first = np.ones(len(pivot), dtype=bool)
+    first[1:] = athletes[1:] != athletes[:-1]
+    group = np.cumsum(first) - 1
+    starts = days[first]
+    lengths = np.maximum.reduceat(days, np.flatnonzero(first)) - starts + 1
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    positions = offsets[group] + days - starts[group]
+    return np.repeat(np.arange(len(lengths)), lengths), positions
+
+
+def compute_load_metrics(pivot: pd.DataFrame) -> pd.DataFrame:
+    """EWMA acute/chronic load, ACWR and weekly monotony/strain per athlete-day, indexed like pivot
+
+    The pivot must be sorted by athlete and date. Each athlete's load is laid on a
+    calendar-day grid first, so missing days decay the EWMAs and break the monotony week.
+    """
+    if pivot.empty or LOAD_METRIC not in pivot.columns:
+        return pd.DataFrame(np.nan, index=pivot.index, columns=LOAD_COLUMNS)
+
+    groups, positions = _calendar_days(pivot)
+    daily = np.full(len(groups), np.nan)
+    daily[positions] = pd.to_numeric(pivot[LOAD_METRIC], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    by_athlete = pd.Series(daily).groupby(groups, sort=False)
+    acute = by_athlete.ewm(span=ACUTE_SPAN, adjust=False).mean().to_numpy()[positions]
+    chronic = by_athlete.ewm(span=CHRONIC_SPAN, adjust=False, min_periods=CHRONIC_MIN_DAYS).mean().to_numpy()[positions]
+
+    week = by_athlete.rolling(MONOTONY_DAYS, min_periods=MONOTONY_DAYS)
+    week_mean = week.mean().to_numpy()[positions]
+    week_sd = week.std().to_numpy()[positions]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        acwr = np.where(chronic > 0, acute / chronic, np.nan)
+        monotony = np.where(week_sd > 0, week_mean / week_sd, np.nan)  # undefined for a perfectly flat week
+    strain = week_mean * MONOTONY_DAYS * monotony
+
+    return pd.DataFrame({
+        'load_acute': acute,
+        'load_chronic': chronic,
+        'acwr': acwr,
+        'load_monotony': monotony,
+        'load_strain': strain,
+    }, index=pivot.index)
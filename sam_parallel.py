@@ -0,0 +1,149 @@
+# sam_parallel.py
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+# -------------------------------
+# 1. Shared Biometrics Block
+# -------------------------------
+CHUNKS_PER_WORKER = 4  # a few chunks per worker evens out rosters with uneven history lengths
+
+
+class SharedSpec(NamedTuple):
+    """Everything a worker needs to attach to a SharedBiometrics block (small enough to pickle)"""
+    name: str
+    rows: int
+    columns: List[str]  # original column order
+    numeric: List[str]  # columns stored in the shared float64 matrix
+    dtypes: Dict[str, Any]
+    athletes: np.ndarray  # sorted athlete ids
+    starts: np.ndarray  # row offset of each athlete, plus the total
+    extra: Dict[str, np.ndarray]  # non-numeric columns, sent by value
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Open an existing block; only the creating process unlinks it"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13: pool workers share the creator's resource tracker
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedBiometrics:
+    """biometric_daily copied once into shared memory, sorted by athlete then date
+
+    Numeric columns form one float64 matrix followed by the int64 dates; worker
+    processes attach by name and read athlete ranges instead of unpickling frames.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        order = np.lexsort((df['date'].to_numpy(), df['athlete_id'].astype(str).to_numpy()))
+        df = df.iloc[order]
+        codes, athletes = pd.factorize(df['athlete_id'].astype(str), sort=True)
+        numeric = [
+            col for col in df.columns
+            if col not in ('athlete_id', 'date') and pd.api.types.is_numeric_dtype(df[col])
+            and not pd.api.types.is_bool_dtype(df[col])
+        ]
+        extra = {col: df[col].to_numpy(dtype=object) for col in df.columns if col not in numeric and col not in ('athlete_id', 'date')}
+
+        rows = len(df)
+        self._block = shared_memory.SharedMemory(create=True, size=max(rows * (len(numeric) + 1) * 8, 1))
+        values, dates = _views(self._block, rows, len(numeric))
+        values[:] = df[numeric].to_numpy(dtype=np.float64, na_value=np.nan)
+        dates[:] = df['date'].to_numpy().view(np.int64)
+        del values, dates  # the block can only be closed once no views remain
+
+        self.spec = SharedSpec(
+            name=self._block.name,
+            rows=rows,
+            columns=list(df.columns),
+            numeric=numeric,
+            dtypes={col: df[col].dtype for col in df.columns},
+            athletes=np.asarray(athletes, dtype=object),
+            starts=np.searchsorted(codes, np.arange(len(athletes) + 1)),
+            extra=extra,
+        )
+
+    def close(self) -> None:
+        self._block.close()
+        self._block.unlink()
+
+    def __enter__(self) -> 'SharedBiometrics':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _views(block: shared_memory.SharedMemory, rows: int, n_numeric: int):
+    values = np.ndarray((rows, n_numeric), dtype=np.float64, buffer=block.buf)
+    dates = np.ndarray(rows, dtype=np.int64, buffer=block.buf, offset=rows * n_numeric * 8)
+    return values, dates
+
+
+def read_athletes(spec: SharedSpec, first: int, last: int) -> pd.DataFrame:
+    """biometric_daily rows of athletes [first, last) in sorted-id order, copied out of shared memory"""
+    lo, hi = int(spec.starts[first]), int(spec.starts[last])
+    block = _attach(spec.name)
+    try:
+        values, dates = _views(block, spec.rows, len(spec.numeric))
+        numeric = values[lo:hi].copy()
+        day_values = dates[lo:hi].copy()
+        del values, dates
+    finally:
+        block.close()
+
+    counts = np.diff(spec.starts[first:last + 1])
+    data = {
+        'athlete_id': pd.Series(np.repeat(spec.athletes[first:last], counts)).astype(spec.dtypes['athlete_id']),
+        'date': pd.Series(day_values.view(spec.dtypes['date'])),
+    }
+    for i, col in enumerate(spec.numeric):
+        data[col] = pd.Series(numeric[:, i]).astype(spec.dtypes[col])
+    for col, column in spec.extra.items():
+        data[col] = pd.Series(column[lo:hi]).astype(spec.dtypes[col])
+    return pd.DataFrame(data)[spec.columns]
+
+
+# -------------------------------
+# 2. Partitioned Executor
+# -------------------------------
+_worker_spec: Optional[SharedSpec] = None
+_worker_payload: Any = None
+
+
+def _init_worker(spec: SharedSpec, payload: Any) -> None:
+    global _worker_spec, _worker_payload
+    _worker_spec, _worker_payload = spec, payload
+
+
+def _run_chunk(args) -> Any:
+    task, first, last = args
+    return task(read_athletes(_worker_spec, first, last), _worker_payload)
+
+
+def athlete_chunks(n_athletes: int, n_chunks: int) -> List[tuple]:
+    """Contiguous [first, last) athlete ranges"""
+    edges = np.linspace(0, n_athletes, max(1, min(n_chunks, n_athletes)) + 1).round().astype(int)
+    return [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+
+
+def map_athletes(biometrics_df: pd.DataFrame, task: Callable[[pd.DataFrame, Any], Any], payload: Any = None,
+                 workers: Optional[int] = None, chunks_per_worker: int = CHUNKS_PER_WORKER) -> List[Any]:
+    """Run task(athlete_chunk_df, payload) over roster partitions in a process pool
+
+    The biometrics are shared with the workers instead of pickled per task; the
+    payload (e.g. configuration sheets) is sent once per worker. `task` must be a
+    module-level function. Results come back in athlete order.
+    """
+    workers = workers or os.cpu_count() or 1
+    with SharedBiometrics(biometrics_df) as shared:
+        chunks = athlete_chunks(len(shared.spec.athletes), workers * chunks_per_worker)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(shared.spec, payload)) as pool:
+            return list(pool.map(_run_chunk, [(task, first, last) for first, last in chunks]))
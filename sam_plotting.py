@@ -0,0 +1,158 @@
+# sam_plotting.py
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# -------------------------------
+# 1. Payload Limits
+# -------------------------------
+MAX_LINE_POINTS = 800  # about one point per horizontal pixel of a full-width chart
+MAX_BARS = 120  # stacked bars stop being readable well before this
+MAX_SCATTER_POINTS = 1500
+WINDOW_MIN_DAYS = 31  # histories longer than this get a date-range control
+
+# Candidate bar periods, finest first
+BAR_PERIODS = [
+    ("D", "Daily"),
+    ("W-MON", "Weekly"),
+    ("MS", "Monthly"),
+    ("QS", "Quarterly"),
+    ("YS", "Yearly"),
+]
+
+
+# -------------------------------
+# 2. Downsampling
+# -------------------------------
+
+def _as_float(index: pd.Index) -> np.ndarray:
+    if isinstance(index, pd.DatetimeIndex):
+        return index.asi8.astype(np.float64)
+    return np.asarray(index, dtype=np.float64)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Positions kept by Largest-Triangle-Three-Buckets (first and last always kept)"""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Bucket i (1..threshold-2) spans [edges[i-1], edges[i]) of the interior points
+    every = (n - 2) / (threshold - 2)
+    edges = np.minimum((np.arange(threshold - 1) * every).astype(np.int64) + 1, n - 1)
+    edges = np.append(edges, n)
+    counts = np.diff(edges)
+    sums_x = np.add.reduceat(x, edges[:-1])
+    sums_y = np.add.reduceat(y, edges[:-1])
+    avg_x, avg_y = sums_x / counts, sums_y / counts  # the last bucket is the final point
+
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        bx, by = x[start:end], y[start:end]
+        area = np.abs((x[a] - avg_x[i + 1]) * (by - y[a]) - (x[a] - bx) * (avg_y[i + 1] - y[a]))
+        a = start + int(np.argmax(area))
+        kept[i + 1] = a
+    return kept
+
+
+def downsample_series(series: pd.Series, max_points: int = MAX_LINE_POINTS) -> pd.Series:
+    """LTTB-downsampled copy of a line series (missing values dropped when downsampling)"""
+    if len(series) <= max_points:
+        return series
+    series = series.dropna()
+    if len(series) <= max_points:
+        return series
+    y = series.to_numpy(dtype=np.float64)
+    return series.iloc[lttb_indices(_as_float(series.index), y, max_points)]
+
+
+def aggregate_periods(df: pd.DataFrame, columns: List[str], max_bars: int = MAX_BARS) -> Tuple[pd.DataFrame, str]:
+    """Per-period means at the finest period giving at most max_bars bars"""
+    data = df[columns]
+    if len(data) <= max_bars or not isinstance(data.index, pd.DatetimeIndex):
+        return data, BAR_PERIODS[0][1]
+    for freq, label in BAR_PERIODS[1:]:
+        grouped = data.resample(freq, label='left', closed='left').mean().dropna(how='all')
+        if len(grouped) <= max_bars:
+            return grouped, label
+    return grouped, label
+
+
+def thin_points(df: pd.DataFrame, max_points: int = MAX_SCATTER_POINTS) -> pd.DataFrame:
+    """Evenly spaced subset of rows for scatter plots"""
+    if len(df) <= max_points:
+        return df
+    return df.iloc[np.unique(np.linspace(0, len(df) - 1, max_points).round().astype(np.int64))]
+
+
+def window(df: pd.DataFrame, start, end) -> pd.DataFrame:
+    """Rows of a date-indexed frame inside [start, end] (inclusive days)"""
+    return df.loc[pd.Timestamp(start):pd.Timestamp(end) + pd.Timedelta(days=1) - pd.Timedelta(1)]
+
+
+# -------------------------------
+# 3. Shared Figure Cache
+# -------------------------------
+FIGURE_CACHE_ENTRIES = 256
+FIGURE_CACHE_BYTES = 64 * 2 ** 20
+
+
+class FigureCache:
+    """Bounded, thread-safe LRU of serialized figure JSON shared by all sessions
+
+    Keys should include the data version so entries for superseded data age out.
+    """
+
+    def __init__(self, max_entries: int = FIGURE_CACHE_ENTRIES, max_bytes: int = FIGURE_CACHE_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[Hashable, str]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: Hashable) -> Optional[str]:
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, key: Hashable, payload: str) -> None:
+        size = len(payload)
+        if size > self.max_bytes:
+            return  # never cache a figure that would evict everything else
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._entries[key] = payload
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def get_or_build(self, key: Hashable, build: Callable[[], str]) -> str:
+        """Cached JSON for key; built outside the lock so slow figures don't block other sessions"""
+        payload = self.get(key)
+        if payload is None:
+            payload = build()
+            self.put(key, payload)
+        return payload
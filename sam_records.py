@@ -0,0 +1,69 @@
+# sam_records.py
+from typing import Any, Dict, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class RecordTable:
+    """One row per key stored as column arrays; rows are read through lightweight RecordRow views"""
+
+    def __init__(self, df: pd.DataFrame):
+        self._positions: Dict[str, int] = {str(key): i for i, key in enumerate(df.index)}
+        numeric = [
+            col for col in df.columns
+            if pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col])
+        ]
+        self._numeric: Dict[str, int] = {col: i for i, col in enumerate(numeric)}
+        self._values = df[numeric].to_numpy(dtype=np.float64, na_value=np.nan) if numeric else np.empty((len(df), 0))
+        self._objects: Dict[str, np.ndarray] = {
+            col: df[col].to_numpy(dtype=object) for col in df.columns if col not in self._numeric
+        }
+        self.columns = list(df.columns)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, key) -> bool:
+        return str(key) in self._positions
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._positions)
+
+    def get(self, key) -> Optional['RecordRow']:
+        """Row view for one key, or None when absent"""
+        pos = self._positions.get(str(key))
+        return None if pos is None else RecordRow(self, pos)
+
+
+class RecordRow:
+    """Read-only view of one RecordTable row; missing or NaN values fall back to defaults"""
+
+    __slots__ = ('_table', '_pos')
+
+    def __init__(self, table: RecordTable, pos: int):
+        self._table = table
+        self._pos = pos
+
+    def get(self, column: str, default: Any = None) -> Any:
+        table = self._table
+        col = table._numeric.get(column)
+        if col is not None:
+            value = table._values[self._pos, col]
+            return default if value != value else float(value)
+        values = table._objects.get(column)
+        if values is None:
+            return default
+        value = values[self._pos]
+        return default if value is None or pd.isna(value) else value
+
+    def __getitem__(self, column: str) -> Any:
+        if column not in self:
+            raise KeyError(column)
+        return self.get(column)
+
+    def __contains__(self, column: str) -> bool:
+        return column in self._table._numeric or column in self._table._objects
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {column: self.get(column) for column in self._table.columns}
@@ -0,0 +1,372 @@
+# sam_rules.py
+import hashlib
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from sam_baselines import ROLLING_WINDOWS, SINCE_BASELINE_MIN_DAYS, z_column
+from sam_data import clock_minutes, format_clock
+from sam_load import ACUTE_SPAN, CHRONIC_MIN_DAYS, CHRONIC_SPAN
+from sam_genetics import GenotypeStore, parse_genetic_condition
+
+# -------------------------------
+# 1. Biometric Conditions
+# -------------------------------
+
+# Fallbacks used when a metric is missing, matching the single-athlete alert path
+METRIC_DEFAULTS = {
+    'hrv_night': 50,
+    'resting_hr': 60,
+    'temp_trend_c': 36.5,
+    'spo2_night': 97,
+    'deep_sleep_pct': 20,
+    'rem_sleep_pct': 20,
+    'sleep_duration_h': 8,
+    'resp_rate_night': 15,
+}
+
+HRV_DROP_PCT = 0.15
+RHR_RISE_PCT = 0.05
+LOAD_DROP_PCT = 0.15
+LATE_SLEEP_MINUTES = clock_minutes(23, 30)  # 11:30 PM, in minutes since noon so 00:30 counts as later
+
+# Deviation from the athlete's own baseline replaces the day-over-day test once that baseline exists
+ALERT_BASELINE_WINDOW = '28d'
+HRV_DROP_Z = -1.5
+RHR_RISE_Z = 1.5
+
+# load↓ compares today against the athlete's chronic (28-day EWMA) load as of the previous
+# day, so today's drop does not dilute its own reference, once that exists;
+# acwr↑ flags acute:chronic spikes above the usual 0.8-1.3 range
+ACWR_HIGH = 1.5
+CONDITIONS_VERSION = 2  # bump when compute_conditions changes so stored alert history is rescored
+
+
+def _column(df: pd.DataFrame, name: str, default: Optional[float] = None) -> np.ndarray:
+    if name not in df.columns:
+        return np.full(len(df), np.nan if default is None else default, dtype=np.float64)
+    values = pd.to_numeric(df[name], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    if default is not None:
+        values = np.where(np.isnan(values), default, values)
+    return values
+
+
+def _relative_change(current: np.ndarray, previous: np.ndarray) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(previous > 0, (current - previous) / previous, 0.0)
+
+
+def athlete_group_codes(df: pd.DataFrame) -> np.ndarray:
+    """Integer athlete code per row; a plain date index is treated as one athlete"""
+    if isinstance(df.index, pd.MultiIndex):
+        return np.asarray(df.index.codes[0])
+    return np.zeros(len(df), dtype=np.int64)
+
+
+def _derived(df: pd.DataFrame, derived: Optional[pd.DataFrame], name: str) -> np.ndarray:
+    """Derived per-day metric aligned to df (NaN where it is not available yet)"""
+    if derived is None or name not in derived.columns:
+        return _column(df, name)
+    values = derived[name]
+    if not values.index.equals(df.index):
+        values = values.reindex(df.index)
+    return values.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def compute_conditions(df: pd.DataFrame, derived: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """Boolean alert conditions for every row of a date-sorted biometrics frame
+
+    `derived` holds the per-day baseline z-scores and load metrics of
+    sam_state.derived_metrics (such columns already on df are used when it is omitted).
+    """
+    codes = athlete_group_codes(df)
+    has_prev = np.zeros(len(df), dtype=bool)
+    has_prev[1:] = codes[1:] == codes[:-1]
+
+    def previous(values: np.ndarray, default: Optional[float] = None) -> np.ndarray:
+        prev = np.empty_like(values)
+        prev[1:] = values[:-1]
+        if len(prev):
+            prev[0] = np.nan
+        if default is not None:
+            prev = np.where(np.isnan(prev), default, prev)
+        return prev
+
+    hrv = _column(df, 'hrv_night', METRIC_DEFAULTS['hrv_night'])
+    rhr = _column(df, 'resting_hr', METRIC_DEFAULTS['resting_hr'])
+    load = _column(df, 'training_load_pct')
+
+    # Day-over-day deviation, with absolute thresholds when there is no previous day
+    hrv_drop = np.where(has_prev, -_relative_change(hrv, previous(hrv, METRIC_DEFAULTS['hrv_night'])) > HRV_DROP_PCT, hrv < 40)
+    rhr_rise = np.where(has_prev, _relative_change(rhr, previous(rhr, METRIC_DEFAULTS['resting_hr'])) > RHR_RISE_PCT, rhr > 70)
+    # ... superseded by the personal baseline wherever the athlete has enough history
+    hrv_z = _derived(df, derived, z_column('hrv_night', ALERT_BASELINE_WINDOW))
+    rhr_z = _derived(df, derived, z_column('resting_hr', ALERT_BASELINE_WINDOW))
+    hrv_drop = np.where(np.isnan(hrv_z), hrv_drop, hrv_z <= HRV_DROP_Z)
+    rhr_rise = np.where(np.isnan(rhr_z), rhr_rise, rhr_z >= RHR_RISE_Z)
+    load_drop = np.where(has_prev, -_relative_change(load, previous(load)) > LOAD_DROP_PCT, load < 70)
+    chronic = np.where(has_prev, previous(_derived(df, derived, 'load_chronic')), np.nan)
+    load_drop = np.where(np.isnan(chronic) | np.isnan(load), load_drop, -_relative_change(load, chronic) > LOAD_DROP_PCT)
+
+    # Missing onsets are NaN and compare False
+    sleep_late = _column(df, 'sleep_onset_time') > LATE_SLEEP_MINUTES
+
+    return pd.DataFrame({
+        'hrv_drop': hrv_drop,
+        'rhr_rise': rhr_rise,
+        'temp_high': _column(df, 'temp_trend_c', METRIC_DEFAULTS['temp_trend_c']) >= 37.0,
+        'spo2_low': _column(df, 'spo2_night', METRIC_DEFAULTS['spo2_night']) <= 94,
+        'deep_low': _column(df, 'deep_sleep_pct', METRIC_DEFAULTS['deep_sleep_pct']) < 17,
+        'rem_low': _column(df, 'rem_sleep_pct', METRIC_DEFAULTS['rem_sleep_pct']) < 16,
+        'sleep_short': _column(df, 'sleep_duration_h', METRIC_DEFAULTS['sleep_duration_h']) < 7.0,
+        'resp_high': _column(df, 'resp_rate_night', METRIC_DEFAULTS['resp_rate_night']) >= 17,
+        'sleep_late': sleep_late,
+        'load_drop': load_drop,
+        'acwr_high': _derived(df, derived, 'acwr') > ACWR_HIGH,
+    }, index=df.index)
+
+
+# -------------------------------
+# 2. Rule Compilation
+# -------------------------------
+
+# metric_drop vocabulary: term -> (condition, value it must have)
+PATTERN_TERMS = {
+    'hrv↓': ('hrv_drop', True),
+    'rhr↑': ('rhr_rise', True),
+    'temp↑': ('temp_high', True),
+    'spo₂↓': ('spo2_low', True),
+    'spo2↓': ('spo2_low', True),
+    'deep↓': ('deep_low', True),
+    'late sleep': ('sleep_late', True),
+    'stable rhr/temp': ('temp_high', False),
+    '↓rem/deep': ('rem_low', True),
+    'rem↓': ('rem_low', True),
+    'rr↑': ('resp_high', True),
+    'short sleep': ('sleep_short', True),
+    'load↓': ('load_drop', True),
+    'acwr↑': ('acwr_high', True),
+}
+
+# Evaluation order when several rules fire on the same day
+RULE_PRECEDENCE = ['inflammation', 'circadian', 'nutrient_gap', 'airway_stress', 'overtraining']
+
+# predictive_rules ids -> alert types used by the dashboard
+RULE_ALERT_TYPES = {
+    'inflammation': 'inflammation',
+    'circadian': 'circadian',
+    'nutrient_gap': 'nutrition',
+    'airway_stress': 'airway',
+    'overtraining': 'overtraining',
+}
+
+# Used when the predictive_rules sheet is empty or missing
+DEFAULT_RULES = pd.DataFrame([
+    {"rule_id": "circadian", "metric_drop": "HRV↓ + Deep↓ + late sleep", "genetic_condition": "PER3 long or CLOCK AA"},
+    {"rule_id": "inflammation", "metric_drop": "HRV↓ + RHR↑ + Temp↑ + SpO₂↓", "genetic_condition": "Any"},
+    {"rule_id": "nutrient_gap", "metric_drop": "HRV↓ + stable RHR/Temp + ↓REM/Deep", "genetic_condition": "COMT AA, MTHFR CT"},
+    {"rule_id": "airway_stress", "metric_drop": "SpO₂↓ + RR↑", "genetic_condition": "NOS3 T, ADRB2 risk"},
+    {"rule_id": "overtraining", "metric_drop": "HRV↓ + load↓", "genetic_condition": "ACTN3 X, AMPD1 C"},
+])
+
+
+class CompiledRule(NamedTuple):
+    rule_id: str
+    terms: List[Tuple[str, bool]]
+    genes: Optional[List[Tuple[str, str]]]  # None means any genotype
+    unsupported: List[str]
+    cause: str
+    recommendation: str
+
+
+def parse_pattern(pattern: str) -> Tuple[List[Tuple[str, bool]], List[str]]:
+    """Split 'HRV↓ + Deep↓ + late sleep' into known condition terms"""
+    terms, unsupported = [], []
+    for raw in str(pattern).split('+'):
+        token = re.sub(r'\s+', ' ', raw).strip().casefold()
+        if not token:
+            continue
+        if token in PATTERN_TERMS:
+            terms.append(PATTERN_TERMS[token])
+        else:
+            unsupported.append(raw.strip())
+    return terms, unsupported
+
+
+def compile_rules(rules_df: Optional[pd.DataFrame]) -> List[CompiledRule]:
+    """Compile predictive_rules rows into condition terms, ordered by precedence"""
+    if rules_df is None or rules_df.empty or 'metric_drop' not in rules_df.columns:
+        rules_df = DEFAULT_RULES
+    compiled = []
+    for _, row in rules_df.iterrows():
+        terms, unsupported = parse_pattern(row['metric_drop'])
+        compiled.append(CompiledRule(
+            rule_id=str(row['rule_id']),
+            terms=terms,
+            genes=parse_genetic_condition(row.get('genetic_condition')),
+            unsupported=unsupported,
+            cause=str(row.get('cause', '') or ''),
+            recommendation=str(row.get('recommendation', '') or ''),
+        ))
+    rank = {rule_id: i for i, rule_id in enumerate(RULE_PRECEDENCE)}
+    return sorted(compiled, key=lambda r: rank.get(r.rule_id, len(rank)))
+
+
+# -------------------------------
+# 3. Vectorized Evaluation
+# -------------------------------
+
+class RuleEngine:
+    """Evaluates compiled predictive rules over every athlete-day in one pass"""
+
+    def __init__(self, rules_df: Optional[pd.DataFrame] = None):
+        self.rules = compile_rules(rules_df)
+        self.by_id = {rule.rule_id: rule for rule in self.rules}
+
+    @property
+    def signature(self) -> str:
+        """Stable hash of the compiled rules and thresholds, for invalidating stored results"""
+        spec = repr((
+            [(r.rule_id, r.terms, r.genes, r.unsupported) for r in self.rules],
+            METRIC_DEFAULTS, HRV_DROP_PCT, RHR_RISE_PCT, LOAD_DROP_PCT, LATE_SLEEP_MINUTES,
+            ALERT_BASELINE_WINDOW, HRV_DROP_Z, RHR_RISE_Z, ROLLING_WINDOWS, SINCE_BASELINE_MIN_DAYS,
+            ACWR_HIGH, ACUTE_SPAN, CHRONIC_SPAN, CHRONIC_MIN_DAYS, CONDITIONS_VERSION,
+        ))
+        return hashlib.sha1(spec.encode('utf-8')).hexdigest()
+
+    @property
+    def skipped(self) -> List[CompiledRule]:
+        """Rules with pattern terms the engine does not understand (never fire)"""
+        return [rule for rule in self.rules if rule.unsupported or not rule.terms]
+
+    def _genetic_match(self, rule: CompiledRule, genotypes: GenotypeStore, athletes: pd.Index) -> np.ndarray:
+        positions = genotypes.positions(athletes)
+        mask = genotypes.condition_mask(rule.genes)
+        return np.where(positions >= 0, mask[np.maximum(positions, 0)] if len(mask) else False, rule.genes is None)
+
+    def fired(self, df: pd.DataFrame, conditions: Optional[pd.DataFrame] = None,
+              derived: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """Boolean matrix of which rules fire on which rows"""
+        if conditions is None:
+            conditions = compute_conditions(df, derived)
+        out = {}
+        for rule in self.rules:
+            mask = np.full(len(df), bool(rule.terms) and not rule.unsupported)
+            for condition, expected in rule.terms:
+                mask &= conditions[condition].to_numpy() == expected
+            out[rule.rule_id] = mask
+        return pd.DataFrame(out, index=df.index, columns=[r.rule_id for r in self.rules])
+
+    def evaluate(self, df: pd.DataFrame, genotypes: Optional[GenotypeStore] = None,
+                 athlete_id: Optional[str] = None, derived: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """Winning rule, alert type and genetic context for every row of an (athlete_id, date) frame
+
+        A frame indexed by date alone is treated as the history of `athlete_id`.
+        `derived` (same index, any row order) enables the baseline and load-ratio tests.
+        """
+        if not df.index.is_monotonic_increasing:
+            return self.evaluate(df.sort_index(), genotypes, athlete_id, derived).reindex(df.index)
+
+        fired = self.fired(df, derived=derived).to_numpy()
+        any_fired = fired.any(axis=1) if fired.size else np.zeros(len(df), dtype=bool)
+        winner = fired.argmax(axis=1) if fired.size else np.zeros(len(df), dtype=np.int64)
+
+        rule_ids = np.array([r.rule_id for r in self.rules] or [None], dtype=object)
+        alert_types = np.array([RULE_ALERT_TYPES.get(r.rule_id, r.rule_id) for r in self.rules] or [None], dtype=object)
+        rule_id = np.where(any_fired, rule_ids[winner], None)
+        alert_type = np.where(any_fired, alert_types[winner], 'green')
+
+        # Genetic context of the winning rule (informational, does not gate the alert)
+        genetic_match = np.zeros(len(df), dtype=bool)
+        if genotypes is not None and any_fired.any():
+            if isinstance(df.index, pd.MultiIndex):
+                athletes = df.index.levels[0]
+                codes = np.asarray(df.index.codes[0])
+            else:
+                athletes = pd.Index([athlete_id])
+                codes = np.zeros(len(df), dtype=np.int64)
+            for i, rule in enumerate(self.rules):
+                rows = any_fired & (winner == i)
+                if rows.any():
+                    genetic_match[rows] = self._genetic_match(rule, genotypes, athletes)[codes[rows]]
+
+        return pd.DataFrame({
+            'rule_id': pd.array(rule_id, dtype='str'),  # a text column even when no rule fired
+            'alert_type': alert_type,
+            'genetic_match': genetic_match,
+        }, index=df.index)
+
+
+# -------------------------------
+# 4. Alert Presentation
+# -------------------------------
+
+ALERT_TEMPLATES = {
+    'inflammation': {
+        "title": "⚠️ Inflammation/Illness Risk",
+        "cause": "HRV↓({hrv_night:.0f}) + RHR↑({resting_hr:.0f}) + Temp↑({temp_trend_c:.1f}) + SpO₂↓({spo2_night:.1f})",
+        "rec": "Prioritize rest, hydration, anti-inflammatory nutrition. Monitor temperature closely.",
+    },
+    'circadian': {
+        "title": "🌙 Circadian Misalignment",
+        "cause": "HRV↓ + Deep Sleep↓({deep_sleep_pct:.1f}%) + Late Sleep({onset})",
+        "rec": "Advance bedtime by 45min, increase morning light exposure, avoid screens after 9PM.",
+    },
+    'nutrition': {
+        "title": "🥗 Possible Nutrient Gap",
+        "cause": "HRV↓ + REM↓({rem_sleep_pct:.1f}%) with stable temperature",
+        "rec": "Check iron, magnesium, omega-3, B12 status. Increase nutrient-dense foods.",
+    },
+    'airway': {
+        "title": "🌬️ Airway/Respiratory Stress",
+        "cause": "SpO₂={spo2_night:.1f}% + Resp Rate={resp_rate_night:.1f}/min",
+        "rec": "Evaluate sleep environment, nasal breathing. Consider air quality assessment.",
+    },
+    'overtraining': {
+        "title": "🏋️ Overtraining Risk",
+        "cause": "HRV↓({hrv_night:.0f}) + Training Load↓({training_load_pct:.0f}%{acwr})",
+        "rec": "Deload week, prioritize sleep and protein.",
+    },
+    'green': {
+        "title": "🟢 Optimal Recovery State",
+        "cause": "All metrics within target ranges",
+        "rec": "Maintain current training and recovery protocols.",
+    },
+}
+
+
+def alert_title(alert_type: str, rule: Optional[CompiledRule] = None) -> str:
+    """Display title for an alert type, falling back to the rule's cause for custom rules"""
+    template = ALERT_TEMPLATES.get(alert_type)
+    if template is not None:
+        return template["title"]
+    return f"⚠️ {rule.cause if rule and rule.cause else alert_type}"
+
+
+def format_alert(alert_type: str, row: pd.Series, rule: Optional[CompiledRule] = None) -> Dict[str, str]:
+    """Build the dashboard alert dict for one evaluated row"""
+    values = {name: row.get(name, default) for name, default in METRIC_DEFAULTS.items()}
+    values = {name: default if pd.isna(values[name]) else values[name] for name, default in METRIC_DEFAULTS.items()}
+    load = row.get('training_load_pct', np.nan)
+    values['training_load_pct'] = 0 if pd.isna(load) else load
+    values['onset'] = format_clock(row.get('sleep_onset_time')) or 'Late'
+    acwr = row.get('acwr', np.nan)
+    values['acwr'] = '' if acwr is None or pd.isna(acwr) else f", ACWR {acwr:.2f}"
+
+    template = ALERT_TEMPLATES.get(alert_type)
+    if template is None:
+        # Custom rule added to the predictive_rules sheet
+        return {
+            "type": alert_type,
+            "title": alert_title(alert_type, rule),
+            "cause": rule.cause if rule else "",
+            "rec": rule.recommendation if rule else "",
+        }
+    return {
+        "type": alert_type,
+        "title": template["title"],
+        "cause": template["cause"].format(**values),
+        "rec": template["rec"],
+    }
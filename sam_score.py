@@ -0,0 +1,162 @@
+# sam_score.py
+import argparse
+import os
+import sys
+from datetime import datetime
+from typing import Dict, Optional
+
+import pandas as pd
+
+from sam_baselines import baseline_start_dates
+from sam_data import MANIFEST_FILE, TIME_COLUMNS, DataValidationError, format_clock, load_frames, preprocess_frames, read_snapshot
+from sam_genetics import GenotypeStore
+from sam_parallel import map_athletes
+from sam_rules import RuleEngine, format_alert
+from sam_state import INDEX_COLS, READINESS_WINDOW, derived_metrics, latest_derived, latest_per_athlete, rolling_means
+from sam_team import build_team_snapshot
+from sam_zones import ZONE_NAMES, ZoneClassifier
+
+# -------------------------------
+# 1. Scoring
+# -------------------------------
+POOL_MIN_ATHLETES = 2000  # smaller rosters score faster in-process than starting workers
+OUTPUT_FORMATS = ('csv', 'parquet', 'json')
+LEADING_COLUMNS = [
+    'athlete_id', 'name', 'team', 'sport', 'last_date', 'days_of_data',
+    'alert_type', 'rule_id', 'alert_title', 'alert_cause', 'alert_recommendation', 'genetic_match',
+    'readiness_score', 'zones_red', 'zones_yellow', 'zones_green',
+]
+
+
+def score_roster(frames: Dict[str, pd.DataFrame], as_of: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """One row per athlete: latest metrics, derived metrics and zones, the latest day's alert and readiness"""
+    biometrics = frames["biometric_daily"]
+    if as_of is not None:
+        biometrics = biometrics[biometrics['date'] <= as_of]
+    pivot = biometrics.set_index(INDEX_COLS).sort_index()
+    if pivot.empty:
+        return pd.DataFrame(columns=LEADING_COLUMNS)
+
+    # The last day's alert and the trailing readiness means only need each athlete's last few days,
+    # scored against baselines and loads over the full history
+    recent = pivot.groupby(level='athlete_id').tail(max(READINESS_WINDOW, 2))
+    derived = derived_metrics(pivot, baseline_start_dates(frames["athlete_profiles"]))
+    engine = RuleEngine(frames["predictive_rules"])
+    evaluated = engine.evaluate(recent, GenotypeStore(frames["genetic_profiles"]), derived=derived)
+    last_alert = evaluated.groupby(level='athlete_id').tail(1)
+    zones = ZoneClassifier(frames["sam_metrics_config"])
+
+    team = build_team_snapshot(
+        frames["athlete_profiles"], pivot, latest_per_athlete(pivot), rolling_means(recent),
+        last_alert.reset_index(), zones, engine,
+    )
+
+    # Same cause/recommendation text as the dashboard's alert card
+    last_rows = recent.groupby(level='athlete_id').tail(1)
+    last_rows = pd.concat([last_rows, derived.reindex(last_rows.index)], axis=1)
+    texts = pd.DataFrame([
+        format_alert(alert_type, row, engine.by_id.get(rule_id))
+        for (_, row), alert_type, rule_id in zip(last_rows.iterrows(), last_alert['alert_type'], last_alert['rule_id'])
+    ], index=last_rows.index.get_level_values('athlete_id').astype(str))
+    texts['genetic_match'] = last_alert['genetic_match'].to_numpy()
+    for source, col in [('cause', 'alert_cause'), ('rec', 'alert_recommendation'), ('genetic_match', 'genetic_match')]:
+        team[col] = texts[source].reindex(team['athlete_id']).to_numpy()
+
+    for metric, codes in zones.classify_frame(team).items():
+        team[f'zone_{metric}'] = codes.map(ZONE_NAMES)
+    latest = latest_derived(derived)
+    latest.index = latest.index.astype(str)
+    for col in latest.columns:
+        team[col] = latest[col].reindex(team['athlete_id']).to_numpy()
+
+    leading = [col for col in LEADING_COLUMNS if col in team.columns]
+    return team[leading + [col for col in team.columns if col not in leading]]
+
+
+def _score_chunk(biometrics: pd.DataFrame, payload) -> pd.DataFrame:
+    frames, as_of = payload
+    athletes = biometrics['athlete_id'].astype(str).unique()
+    chunk = dict(frames, biometric_daily=biometrics)
+    for name in ("genetic_profiles", "athlete_profiles"):
+        df = frames[name]
+        chunk[name] = df[df['athlete_id'].astype(str).isin(athletes)] if 'athlete_id' in df.columns else df
+    return score_roster(chunk, as_of)
+
+
+def score_parallel(frames: Dict[str, pd.DataFrame], workers: int, as_of: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """Score roster partitions in a process pool (athletes are independent)
+
+    Biometrics reach the workers through shared memory; the small sheets are sent once per worker.
+    """
+    config = {name: df for name, df in frames.items() if name != "biometric_daily"}
+    parts = map_athletes(frames["biometric_daily"], _score_chunk, (config, as_of), workers)
+    parts = [part for part in parts if not part.empty]
+    if not parts:
+        return pd.DataFrame(columns=LEADING_COLUMNS)
+    return pd.concat(parts, ignore_index=True)
+
+
+# -------------------------------
+# 2. Input / Output
+# -------------------------------
+
+def load_input(path: str, use_snapshot: bool = True) -> Dict[str, pd.DataFrame]:
+    """Workbook path, snapshot directory, or a directory of raw per-sheet Parquet files"""
+    if os.path.isdir(path):
+        frames = read_snapshot(path)
+        if not os.path.exists(os.path.join(path, MANIFEST_FILE)):
+            frames = preprocess_frames(frames)  # e.g. templateGenerator --output <dir>
+        return frames
+    return load_frames(path, use_snapshot=use_snapshot)
+
+
+def write_scores(scores: pd.DataFrame, output: str, fmt: Optional[str] = None) -> None:
+    fmt = fmt or os.path.splitext(output)[1].lstrip('.').lower()
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format '{fmt}'; use one of {OUTPUT_FORMATS}")
+    scores = scores.assign(**{col: scores[col].map(format_clock) for col in TIME_COLUMNS if col in scores.columns})
+    if fmt == 'csv':
+        scores.to_csv(output, index=False)
+    elif fmt == 'parquet':
+        scores.to_parquet(output, index=False)
+    else:
+        scores.to_json(output, orient='records', date_format='iso', default_handler=str, force_ascii=False, indent=2)
+
+
+def _as_of_date(value: str) -> pd.Timestamp:
+    """--as-of argument as a Timestamp; argparse reports a malformed date as a usage error"""
+    try:
+        return pd.Timestamp(datetime.strptime(value, "%Y-%m-%d"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a YYYY-MM-DD date, got {value!r}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Score every athlete's zones, alert and readiness without Streamlit")
+    parser.add_argument("input", help="workbook (.xlsx) or snapshot / Parquet sheet directory")
+    parser.add_argument("-o", "--output", default="sam_scores.csv", help="output file (.csv, .parquet or .json)")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, help="override the format implied by --output")
+    parser.add_argument("--as-of", type=_as_of_date, help="score as of this date (YYYY-MM-DD); later days are ignored")
+    parser.add_argument("--workers", type=int, default=0,
+                        help=f"worker processes (0 = all CPUs for rosters of {POOL_MIN_ATHLETES}+ athletes, else 1)")
+    parser.add_argument("--no-snapshot", action="store_true", help="always re-parse the workbook")
+    args = parser.parse_args(argv)
+
+    try:
+        frames = load_input(args.input, use_snapshot=not args.no_snapshot)
+    except (DataValidationError, KeyError, FileNotFoundError, ValueError) as e:
+        print(f"❌ Could not load {args.input}: {e}", file=sys.stderr)
+        return 2
+
+    n_athletes = frames["biometric_daily"]['athlete_id'].nunique()
+    workers = args.workers or ((os.cpu_count() or 1) if n_athletes >= POOL_MIN_ATHLETES else 1)
+    scores = score_parallel(frames, workers, args.as_of) if workers > 1 else score_roster(frames, args.as_of)
+
+    write_scores(scores, args.output, args.format)
+    counts = scores['alert_type'].value_counts().to_dict() if not scores.empty else {}
+    print(f"✅ Scored {len(scores):,} athletes -> {args.output} (alerts: {counts})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,408 @@
+# sam_sql.py
+import datetime
+import json
+import os
+import sqlite3
+import threading
+import weakref
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from sam_data import SHEET_NAMES, file_sha256
+
+try:
+    import duckdb
+except ImportError:  # DuckDB backend unavailable; SQLite (stdlib) still works
+    duckdb = None
+
+# -------------------------------
+# 1. Database Layout
+# -------------------------------
+SQL_BACKENDS = ('sqlite', 'duckdb')
+SQL_FILENAMES = {'sqlite': 'sam.sqlite', 'duckdb': 'sam.duckdb'}
+SQL_SCHEMA_VERSION = 2  # bump when the layout below changes so stale databases are rebuilt
+META_TABLE = '_sam_meta'
+ROW_COLUMN = '_row'  # insertion order of biometric rows; each data version reads up to its own high-water mark
+CONFIG_TABLES = [name for name in SHEET_NAMES if name != "biometric_daily"]
+DATE_KIND = 'date'  # object columns holding datetime.date values (e.g. baseline_start_date)
+
+
+# Live SqlBiometrics views per (database, table) in this process: a replaced table generation
+# is only dropped once no view (i.e. no published snapshot a session may still hold) reads it
+_PINS: Dict[Tuple[str, str], int] = {}
+_PINS_LOCK = threading.Lock()
+
+
+def _pin(key: Tuple[str, str]) -> None:
+    with _PINS_LOCK:
+        _PINS[key] = _PINS.get(key, 0) + 1
+
+
+def _unpin(key: Tuple[str, str]) -> None:
+    with _PINS_LOCK:
+        if _PINS.get(key, 0) > 1:
+            _PINS[key] -= 1
+        else:
+            _PINS.pop(key, None)
+
+
+def sql_path_for(snapshot_dir: str, backend: str) -> str:
+    """Default database location: inside the snapshot folder next to the workbook"""
+    return os.path.join(snapshot_dir, SQL_FILENAMES[backend])
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _column_kinds(df: pd.DataFrame) -> Dict[str, str]:
+    """Dtype name per column, so values read back from SQL are cast to exactly the loaded types"""
+    kinds = {}
+    for col in df.columns:
+        dtype = df[col].dtype
+        if dtype == object and df[col].map(lambda v: isinstance(v, datetime.date)).any():
+            kinds[col] = DATE_KIND
+        else:
+            kinds[col] = str(dtype)
+    return kinds
+
+
+def _to_sql_values(df: pd.DataFrame, kinds: Dict[str, str]) -> pd.DataFrame:
+    """Frame with SQL-friendly values: string athlete ids, ISO timestamps/dates"""
+    out = {}
+    for col in df.columns:
+        values = df[col]
+        if col == 'athlete_id':
+            values = values.astype(str)
+        elif pd.api.types.is_datetime64_any_dtype(values):
+            values = values.dt.strftime('%Y-%m-%d %H:%M:%S').astype(object)  # sorts like the timestamps
+        elif kinds.get(col) == DATE_KIND:
+            values = values.map(lambda v: v.isoformat() if isinstance(v, datetime.date) else None).astype(object)
+        out[col] = values
+    return pd.DataFrame(out, index=df.index)
+
+
+def _sqlite_type(values: pd.Series) -> str:
+    if pd.api.types.is_bool_dtype(values) or pd.api.types.is_integer_dtype(values):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(values):
+        return "REAL"
+    return "TEXT"
+
+
+def _restore(df: pd.DataFrame, kinds: Dict[str, str]) -> pd.DataFrame:
+    """Cast columns read from SQL back to their recorded dtypes"""
+    for col, kind in kinds.items():
+        if col not in df.columns:
+            continue
+        if kind == DATE_KIND:
+            df[col] = pd.to_datetime(df[col], errors='coerce').dt.date
+        elif kind.startswith('datetime64'):
+            df[col] = pd.to_datetime(df[col]).astype(kind)
+        elif kind == 'object':
+            df[col] = df[col].astype(object).where(df[col].notna(), None)
+        else:
+            df[col] = df[col].astype(kind)
+    return df
+
+
+# -------------------------------
+# 2. Embedded Store
+# -------------------------------
+
+class SqlStore:
+    """Workbook sheets in an embedded SQL database (SQLite, or DuckDB when installed)
+
+    biometric_daily is indexed on (athlete_id, date) so per-athlete slices and
+    aggregates run in the database instead of over in-memory frames. Every thread
+    gets its own connection; writes are serialized by the caller.
+    """
+
+    def __init__(self, path: str, backend: str = 'sqlite'):
+        if backend not in SQL_BACKENDS:
+            raise ValueError(f"Unknown SQL backend '{backend}'; use one of {SQL_BACKENDS}")
+        if backend == 'duckdb' and duckdb is None:
+            raise ImportError("The duckdb backend needs the duckdb package (pip install duckdb)")
+        self.path = path
+        self.backend = backend
+        self._key = os.path.abspath(path)
+        self._local = threading.local()
+        self._duckdb = None
+        self._connect_lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._execute(f"CREATE TABLE IF NOT EXISTS {META_TABLE} (key VARCHAR PRIMARY KEY, value VARCHAR)")
+
+    def _connection(self):
+        con = getattr(self._local, 'con', None)
+        if con is None:
+            if self.backend == 'sqlite':
+                con = sqlite3.connect(self.path, isolation_level=None)  # autocommit; see _transaction
+                con.execute("PRAGMA journal_mode=WAL")  # readers never block on a writer
+            else:
+                with self._connect_lock:
+                    if self._duckdb is None:
+                        self._duckdb = duckdb.connect(self.path)  # one database handle per process
+                con = self._duckdb.cursor()
+            self._local.con = con
+        return con
+
+    def close(self) -> None:
+        """Close this thread's connection (and the DuckDB handle)"""
+        con = getattr(self._local, 'con', None)
+        if con is not None:
+            con.close()
+            self._local.con = None
+        if self._duckdb is not None:
+            self._duckdb.close()
+            self._duckdb = None
+
+    def _execute(self, sql: str, params: Iterable = ()) -> List[tuple]:
+        return self._connection().execute(sql, list(params)).fetchall()
+
+    def query(self, sql: str, params: Iterable = ()) -> pd.DataFrame:
+        """Result of one SELECT as a DataFrame"""
+        con = self._connection()
+        if self.backend == 'sqlite':
+            return pd.read_sql_query(sql, con, params=list(params))
+        return con.execute(sql, list(params)).df()
+
+    def _write(self, table: str, df: pd.DataFrame, replace: bool) -> None:
+        con = self._connection()
+        if self.backend == 'sqlite':
+            # Plain DDL + executemany: pandas.to_sql would commit mid-transaction
+            if replace:
+                con.execute(f"DROP TABLE IF EXISTS {_quote(table)}")
+                columns = ", ".join(f"{_quote(col)} {_sqlite_type(df[col])}" for col in df.columns)
+                con.execute(f"CREATE TABLE {_quote(table)} ({columns})")
+            marks = ", ".join("?" * len(df.columns))
+            values = df.astype(object).where(df.notna(), None)
+            con.executemany(f"INSERT INTO {_quote(table)} VALUES ({marks})", values.itertuples(index=False, name=None))
+            return
+        con.register('_sam_frame', df)
+        try:
+            if replace:
+                con.execute(f"CREATE OR REPLACE TABLE {_quote(table)} AS SELECT * FROM _sam_frame")
+            else:
+                con.execute(f"INSERT INTO {_quote(table)} SELECT * FROM _sam_frame")
+        finally:
+            con.unregister('_sam_frame')
+
+    def _transaction(self) -> '_Transaction':
+        return _Transaction(self._connection())
+
+    def get_meta(self, key: str, default=None):
+        rows = self._execute(f"SELECT value FROM {META_TABLE} WHERE key = ?", [key])
+        return json.loads(rows[0][0]) if rows else default
+
+    def set_meta(self, key: str, value) -> None:
+        self._execute(f"INSERT OR REPLACE INTO {META_TABLE} (key, value) VALUES (?, ?)", [key, json.dumps(value, default=str)])
+
+    def is_current(self, path: str) -> bool:
+        """Whether the database holds this version of the workbook (mtime/size, then content hash)"""
+        fingerprint = self.get_meta('fingerprint')
+        if not fingerprint or self.get_meta('schema_version') != SQL_SCHEMA_VERSION or self.get_meta('biometrics') is None:
+            return False
+        stat = os.stat(path)
+        if fingerprint.get('mtime_ns') == stat.st_mtime_ns and fingerprint.get('size') == stat.st_size:
+            return True
+        if fingerprint.get('sha256') != file_sha256(path):
+            return False
+        self.set_meta('fingerprint', dict(fingerprint, mtime_ns=stat.st_mtime_ns, size=stat.st_size))
+        return True
+
+    def write_frames(self, frames: Dict[str, pd.DataFrame], fingerprint: Optional[Dict] = None) -> 'SqlBiometrics':
+        """Replace every sheet; biometric rows go to a new table generation"""
+        with self._transaction():
+            self._write_config(frames, CONFIG_TABLES)
+            view = self._write_generation(frames["biometric_daily"], dict(frames["biometric_daily"].attrs), fingerprint)
+        self.drop_unused_generations()
+        return view
+
+    def rewrite_biometrics(self, biometrics: pd.DataFrame, attrs: Dict,
+                           fingerprint: Optional[Dict] = None) -> 'SqlBiometrics':
+        """Replace the biometric rows (e.g. after existing days were superseded) with a new table generation"""
+        with self._transaction():
+            view = self._write_generation(biometrics, attrs, fingerprint)
+        self.drop_unused_generations()
+        return view
+
+    def _write_generation(self, biometrics: pd.DataFrame, attrs: Dict, fingerprint: Optional[Dict]) -> 'SqlBiometrics':
+        generation = int(self.get_meta('generation', 0)) + 1
+        table = f"biometric_daily_{generation}"
+        kinds = _column_kinds(biometrics)
+        rows = _to_sql_values(biometrics, kinds).reset_index(drop=True)
+        rows[ROW_COLUMN] = np.arange(len(rows), dtype=np.int64)
+        self._write(table, rows, replace=True)
+        self._execute(f"CREATE INDEX {_quote(f'idx_{table}_athlete_date')} ON {_quote(table)} (athlete_id, date)")
+        view = SqlBiometrics(self, table, len(rows), list(biometrics.columns), kinds, attrs)
+        previous = self.get_meta('biometrics')
+        retired = self._retired()
+        if previous is not None and previous['table'] != table:
+            retired.append(previous['table'])
+        self.set_meta('retired', retired)
+        self._publish(view, fingerprint)
+        self.set_meta('generation', generation)
+        self.set_meta('schema_version', SQL_SCHEMA_VERSION)
+        return view
+
+    def _write_config(self, frames: Dict[str, pd.DataFrame], names: List[str]) -> None:
+        for name in names:
+            kinds = _column_kinds(frames[name])
+            self._write(name, _to_sql_values(frames[name], kinds), replace=True)
+            if 'athlete_id' in frames[name].columns:
+                self._execute(f"CREATE INDEX IF NOT EXISTS {_quote(f'idx_{name}_athlete')} ON {_quote(name)} (athlete_id)")
+            self.set_meta(f'kinds:{name}', kinds)
+
+    def write_config(self, frames: Dict[str, pd.DataFrame], fingerprint: Dict) -> None:
+        """Replace some configuration sheets (e.g. an edited zone table) and stamp the new workbook version"""
+        with self._transaction():
+            self._write_config(frames, [name for name in CONFIG_TABLES if name in frames])
+            self.set_meta('fingerprint', fingerprint)
+
+    def append_biometrics(self, view: 'SqlBiometrics', new_rows: pd.DataFrame, attrs: Dict,
+                          fingerprint: Optional[Dict] = None) -> 'SqlBiometrics':
+        """Insert new biometric rows after the view's high-water mark and return the extended view"""
+        rows = _to_sql_values(new_rows[view.columns], view.kinds).reset_index(drop=True)
+        rows[ROW_COLUMN] = np.arange(view.rows, view.rows + len(rows), dtype=np.int64)
+        extended = SqlBiometrics(self, view.table, view.rows + len(rows), view.columns, view.kinds, dict(attrs))
+        with self._transaction():
+            # Rows of an abandoned append (e.g. a reload that failed half-way) are beyond every mark; clear them first
+            self._execute(f"DELETE FROM {_quote(view.table)} WHERE {ROW_COLUMN} >= ?", [view.rows])
+            self._write(view.table, rows, replace=False)
+            self._publish(extended, fingerprint)
+        self.drop_unused_generations()
+        return extended
+
+    def _publish(self, view: 'SqlBiometrics', fingerprint: Optional[Dict]) -> None:
+        self.set_meta('biometrics', {'table': view.table, 'rows': view.rows, 'columns': view.columns,
+                                     'kinds': view.kinds, 'attrs': view.attrs})
+        if fingerprint is not None:
+            self.set_meta('fingerprint', fingerprint)
+
+    def _retired(self) -> List[str]:
+        """Replaced biometric tables not dropped yet (every earlier generation in databases that predate the list)"""
+        retired = self.get_meta('retired')
+        if retired is None:
+            current = int(self.get_meta('generation', 0))
+            retired = [f'biometric_daily_{old}' for old in range(1, current)]
+        return list(retired)
+
+    def drop_unused_generations(self) -> List[str]:
+        """Drop replaced biometric tables that no live view in this process reads any more; returns them"""
+        retired = self._retired()
+        with _PINS_LOCK:
+            dropped = [table for table in retired if (self._key, table) not in _PINS]
+        for table in dropped:
+            self._execute(f"DROP TABLE IF EXISTS {_quote(table)}")
+        if dropped or self.get_meta('retired') is None:
+            self.set_meta('retired', [table for table in retired if table not in dropped])
+        return dropped
+
+    def biometrics(self) -> Optional['SqlBiometrics']:
+        """View of the most recently written biometric rows"""
+        meta = self.get_meta('biometrics')
+        if meta is None:
+            return None
+        return SqlBiometrics(self, meta['table'], meta['rows'], meta['columns'], meta['kinds'], meta['attrs'])
+
+    def read_frames(self) -> Dict[str, pd.DataFrame]:
+        """All sheets with their loaded dtypes (biometric_daily in its original row order)"""
+        frames = {
+            name: _restore(self.query(f"SELECT * FROM {_quote(name)}"), self.get_meta(f'kinds:{name}', {}))
+            for name in CONFIG_TABLES
+        }
+        frames["biometric_daily"] = self.biometrics().to_frame()
+        return frames
+
+
+class _Transaction:
+    """BEGIN/COMMIT around a block (ROLLBACK on error) on one connection"""
+
+    def __init__(self, con):
+        self.con = con
+
+    def __enter__(self):
+        self.con.execute("BEGIN TRANSACTION")
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        self.con.execute("ROLLBACK" if exc_type is not None else "COMMIT")
+
+
+# -------------------------------
+# 3. Versioned Biometrics View
+# -------------------------------
+
+class SqlBiometrics:
+    """biometric_daily rows [0, rows) of one table generation, queried on demand
+
+    A view is fixed when its data version is published: later appends land
+    beyond its high-water mark and a full rewrite goes to a new table, so
+    readers of an older version keep seeing exactly their rows. The table of a
+    replaced generation is dropped only after its last view is released.
+    """
+
+    def __init__(self, store: SqlStore, table: str, rows: int, columns: List[str], kinds: Dict[str, str], attrs: Dict):
+        self.store = store
+        self.table = table
+        self.rows = rows
+        self.columns = columns
+        self.kinds = kinds
+        self.attrs = attrs
+        # The table generation stays in the database for as long as this view is alive
+        key = (store._key, table)
+        _pin(key)
+        weakref.finalize(self, _unpin, key)
+
+    def __copy__(self) -> 'SqlBiometrics':
+        return SqlBiometrics(self.store, self.table, self.rows, self.columns, self.kinds, self.attrs)
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def _select(self, where: str = "", params: Iterable = (), order: str = ROW_COLUMN) -> pd.DataFrame:
+        columns = ", ".join(_quote(col) for col in self.columns)
+        sql = f"SELECT {columns} FROM {_quote(self.table)} WHERE {ROW_COLUMN} < ?{where} ORDER BY {order}"
+        df = self.store.query(sql, [self.rows, *params])
+        if df.empty:
+            df = pd.DataFrame({col: pd.Series(dtype=object) for col in self.columns})
+        return _restore(df, self.kinds)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Full biometric_daily frame in original row order (a whole-table scan)"""
+        df = self._select()
+        df.attrs = dict(self.attrs)
+        return df
+
+    def athletes_frame(self, athlete_ids: Iterable) -> pd.DataFrame:
+        """Flat rows of a few athletes, by athlete then date (index range scans)"""
+        ids = [str(aid) for aid in athlete_ids]
+        if not ids:
+            return self._select(" AND 1 = 0")
+        marks = ", ".join("?" * len(ids))
+        return self._select(f" AND athlete_id IN ({marks})", ids, order=f"athlete_id, date, {ROW_COLUMN}")
+
+    def athlete_frame(self, athlete_id) -> pd.DataFrame:
+        """One athlete's days indexed by date, like pivot.loc[athlete_id]"""
+        df = self._select(" AND athlete_id = ?", [str(athlete_id)], order=f"date, {ROW_COLUMN}")
+        metrics = [col for col in self.columns if col not in ('athlete_id', 'date')]
+        return df.set_index(pd.DatetimeIndex(df['date'], name='date'))[metrics]
+
+    def day_summary(self) -> pd.DataFrame:
+        """Last date and number of days per athlete, aggregated in the database"""
+        df = self.store.query(
+            f"SELECT athlete_id, MAX(date) AS max, COUNT(*) AS size FROM {_quote(self.table)} "
+            f"WHERE {ROW_COLUMN} < ? GROUP BY athlete_id",
+            [self.rows],
+        )
+        df['max'] = pd.to_datetime(df['max']).astype(self.kinds.get('date', 'datetime64[ns]'))
+        df['size'] = df['size'].astype(np.int64)
+        return df.set_index(df['athlete_id'].astype(str).rename('athlete_id'))[['max', 'size']]
+
+    def append(self, new_rows: pd.DataFrame, attrs: Dict, fingerprint: Optional[Dict] = None) -> 'SqlBiometrics':
+        return self.store.append_biometrics(self, new_rows, attrs, fingerprint)
+
+    def rewrite(self, biometrics: pd.DataFrame, attrs: Dict, fingerprint: Optional[Dict] = None) -> 'SqlBiometrics':
+        return self.store.rewrite_biometrics(biometrics, attrs, fingerprint)
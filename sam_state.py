@@ -0,0 +1,523 @@
+# sam_state.py
+import copy
+import os
+import threading
+from types import MappingProxyType
+from typing import Dict, List, Mapping, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from sam_alerts import append_alerts_history, build_alerts_history, sync_alerts_history, write_alerts_history
+from sam_data import (
+    SHEET_NAMES,
+    DataValidationError,
+    load_frames,
+    pyarrow,
+    read_appended_rows,
+    read_sheets,
+    snapshot_dir_for,
+    workbook_fingerprint,
+    workbook_version,
+    write_snapshot,
+)
+from sam_baselines import baseline_start_dates, compute_baselines
+from sam_compact import CompactBiometrics, memory_report
+from sam_genetics import GenotypeStore
+from sam_ingest import INGEST_DIRNAME, WearableIngester
+from sam_load import compute_load_metrics
+from sam_records import RecordTable
+from sam_rules import RuleEngine
+from sam_sql import SqlBiometrics, SqlStore, sql_path_for
+from sam_team import athlete_day_summary, build_team_snapshot
+from sam_telemetry import count, timer
+from sam_zones import ZoneClassifier
+
+# -------------------------------
+# 1. Derived Per-Athlete Tables
+# -------------------------------
+READINESS_WINDOW = 3  # days averaged by the readiness forecast
+ROLLING_METRICS = ['hrv_night', 'resting_hr', 'sleep_duration_h']
+INDEX_COLS = ['athlete_id', 'date']
+CONFIG_SHEETS = [name for name in SHEET_NAMES if name != "biometric_daily"]
+# Sheets every alert depends on; an edit there rebuilds the biometrics state (zones and profiles only republish)
+ALERT_SHEETS = ['predictive_rules', 'genetic_profiles']
+
+
+def latest_per_athlete(pivot: pd.DataFrame) -> pd.DataFrame:
+    """Last non-null value of every metric per athlete"""
+    return pivot.groupby(level='athlete_id').last()
+
+
+def last_row_per_athlete(pivot: pd.DataFrame) -> pd.DataFrame:
+    """Each athlete's most recent day as-is (NaNs kept), with its date as a column"""
+    return pivot.groupby(level='athlete_id').tail(1).reset_index(level='date')
+
+
+def rolling_means(pivot: pd.DataFrame, window: int = READINESS_WINDOW) -> pd.DataFrame:
+    """Trailing per-athlete means over the last `window` days, aligned to pivot"""
+    cols = [m for m in ROLLING_METRICS if m in pivot.columns]
+    if pivot.empty:
+        return pd.DataFrame(columns=cols, index=pivot.index)
+    rolled = pivot[cols].groupby(level='athlete_id').rolling(window, min_periods=1).mean()
+    return rolled.droplevel(0)
+
+
+def derived_metrics(pivot: pd.DataFrame, baseline_starts: Optional[pd.Series] = None) -> pd.DataFrame:
+    """Per-day baseline z-scores and training-load metrics, aligned to the sorted pivot"""
+    return pd.concat([compute_baselines(pivot, baseline_starts), compute_load_metrics(pivot)], axis=1)
+
+
+def latest_derived(derived: pd.DataFrame) -> pd.DataFrame:
+    """Each athlete's derived metrics on their most recent day"""
+    return derived.groupby(level='athlete_id', observed=True).tail(1).droplevel('date')
+
+
+def _conform(new_rows: pd.DataFrame, like: pd.DataFrame) -> pd.DataFrame:
+    """Validate appended rows and cast them to the dtypes of the existing frame"""
+    missing = [col for col in INDEX_COLS if col not in new_rows.columns]
+    if missing:
+        raise DataValidationError(f"Missing columns in appended biometric rows: {missing}")
+    new_rows = new_rows.dropna(subset=INDEX_COLS).copy()
+    for col in like.columns:
+        if col not in new_rows.columns:
+            new_rows[col] = np.nan
+        elif col not in INDEX_COLS and pd.api.types.is_numeric_dtype(like[col]):
+            new_rows[col] = pd.to_numeric(new_rows[col], errors='coerce').astype(like[col].dtype)
+    new_rows['athlete_id'] = new_rows['athlete_id'].astype(like['athlete_id'].dtype)
+    new_rows['date'] = new_rows['date'].astype(like['date'].dtype)
+    return new_rows[list(like.columns)]
+
+
+class BiometricsState:
+    """Biometrics frames plus per-athlete derived tables for one data version
+
+    With compact=True the flat frame and pivot are held only as CompactBiometrics
+    and expanded on demand; with an SqlBiometrics view (rows already written to
+    the database) they are released and per-athlete slices, appends and day
+    aggregates run in SQL. The derived tables are unaffected. Per-day derived
+    metrics (baseline z-scores, training load) feed the alert history; only each
+    athlete's latest ones are kept.
+    """
+
+    def __init__(self, biometrics_df: pd.DataFrame, engine: RuleEngine, genotypes: Optional[GenotypeStore] = None,
+                 alerts_dir: Optional[str] = None, compact: bool = False,
+                 baseline_starts: Optional[pd.Series] = None, sql: Optional[SqlBiometrics] = None):
+        self._biometrics_df = biometrics_df
+        self.engine = engine
+        self.genotypes = genotypes
+        self.baseline_starts = baseline_starts
+        with timer('state.pivot'):
+            self._pivot = biometrics_df.set_index(INDEX_COLS).sort_index()
+        self.store: Optional[Union[CompactBiometrics, SqlBiometrics]] = None
+        with timer('state.latest'):
+            self.latest = latest_per_athlete(self._pivot)
+            self.last_rows = last_row_per_athlete(self._pivot)
+            self.rolling = rolling_means(self._pivot)
+        with timer('state.derived'):
+            derived = derived_metrics(self._pivot, baseline_starts)
+            self.derived = latest_derived(derived)
+        with timer('state.alerts_history'):
+            if alerts_dir is not None:
+                self.alerts_history = sync_alerts_history(self._pivot, engine, genotypes, alerts_dir, derived)
+            else:
+                self.alerts_history = build_alerts_history(self._pivot, engine, genotypes, derived)
+        if sql is not None:
+            self._use_sql(sql)
+        elif compact:
+            with timer('state.compact'):
+                self._compact()
+
+    @classmethod
+    def _assemble(cls, **parts) -> 'BiometricsState':
+        state = cls.__new__(cls)
+        state.__dict__.update(parts)
+        return state
+
+    def _compact(self) -> None:
+        """Swap the flat frame and pivot for the compact store"""
+        self.store = CompactBiometrics(self._biometrics_df)
+        self._biometrics_df = self._pivot = None
+
+    def _use_sql(self, view: SqlBiometrics) -> None:
+        """Release the flat frame and pivot; rows are read back from the database view"""
+        self.store = view
+        self._biometrics_df = self._pivot = None
+
+    @property
+    def compact(self) -> bool:
+        return isinstance(self.store, CompactBiometrics)
+
+    @property
+    def in_sql(self) -> bool:
+        return isinstance(self.store, SqlBiometrics)
+
+    @property
+    def biometrics_df(self) -> pd.DataFrame:
+        return self._biometrics_df if self.store is None else self.store.to_frame()
+
+    @property
+    def pivot(self) -> pd.DataFrame:
+        if self.store is None:
+            return self._pivot
+        return self.store.to_frame().set_index(INDEX_COLS).sort_index()
+
+    @property
+    def attrs(self) -> Dict:
+        """Source-row bookkeeping of the flat frame (read-only: use with_attrs)"""
+        return self._biometrics_df.attrs if self.store is None else self.store.attrs
+
+    def with_attrs(self, **updates) -> 'BiometricsState':
+        """Same data with updated bookkeeping; this (possibly published) state is left untouched"""
+        if all(self.attrs.get(key) == value for key, value in updates.items()):
+            return self
+        state = self._assemble(**self.__dict__)
+        if self.store is None:
+            state._biometrics_df = self._biometrics_df.copy(deep=False)
+            state._biometrics_df.attrs = dict(self.attrs, **updates)
+        else:
+            state.store = copy.copy(self.store)
+            state.store.attrs = dict(self.attrs, **updates)
+        return state
+
+    def athlete_frame(self, athlete_id) -> pd.DataFrame:
+        """One athlete's days indexed by date (empty when the athlete has no data)"""
+        if self.store is not None:
+            return self.store.athlete_frame(athlete_id)
+        if athlete_id not in self._pivot.index.get_level_values(0):
+            return pd.DataFrame(columns=self._pivot.columns)
+        return self._pivot.loc[athlete_id].sort_index()
+
+    def memory_report(self) -> Dict:
+        return memory_report(self.biometrics_df, self.store if self.compact else None)
+
+    def day_summary(self) -> pd.DataFrame:
+        """Last date and day count per athlete (aggregated in the database when rows live there)"""
+        if self.in_sql:
+            return self.store.day_summary()
+        return athlete_day_summary(self.pivot)
+
+    def with_rows(self, new_rows: pd.DataFrame) -> Tuple['BiometricsState', List[str]]:
+        """New state with appended athlete-days; derived tables recomputed only for affected athletes
+
+        A row for an athlete-day that already exists replaces it (the last row wins,
+        as in a full load); rows identical to the existing day are ignored.
+        """
+        if new_rows.empty:
+            return self, []
+        source_attrs = dict(new_rows.attrs)
+        if self.in_sql:
+            # Only the athletes receiving rows are read back; the rest stays in the database
+            current = self.store.athletes_frame(new_rows['athlete_id'].dropna().astype(str).unique())
+            current_pivot = current.set_index(INDEX_COLS).sort_index()
+        else:
+            current, current_pivot = self.biometrics_df, self.pivot  # expanded once in compact mode
+        new_rows = _conform(new_rows, current)
+        new_rows = new_rows.drop_duplicates(INDEX_COLS, keep='last')
+        new_values = new_rows.set_index(INDEX_COLS)
+        existing = current_pivot.reindex(new_values.index)
+        unchanged = ((existing == new_values) | (existing.isna() & new_values.isna())).fillna(False).all(axis=1)
+        unchanged &= new_values.index.isin(current_pivot.index)
+        new_rows, new_values = new_rows[~unchanged.to_numpy()], new_values[~unchanged.to_numpy()]
+        if new_rows.empty:
+            return self, []
+
+        replaced = current_pivot.index.isin(new_values.index)
+        pivot = pd.concat([current_pivot[~replaced], new_values]).sort_index()
+        affected = sorted(new_rows['athlete_id'].astype(str).unique())
+        affected_pivot = pivot[pivot.index.get_level_values(0).isin(affected)]
+        if replaced.any():
+            # Superseded days are dropped from the flat rows too (a new table generation in SQL mode)
+            flat = self.store.to_frame() if self.in_sql else current
+            flat = flat[~pd.MultiIndex.from_frame(flat[INDEX_COLS]).isin(new_values.index)]
+        if self.in_sql:
+            attrs = dict(self.attrs, **source_attrs)
+            if replaced.any():
+                store = self.store.rewrite(pd.concat([flat, new_rows], ignore_index=True), attrs)
+            else:
+                store = self.store.append(new_rows, attrs)
+            biometrics_df = pivot = None
+        else:
+            store = None
+            biometrics_df = pd.concat([flat if replaced.any() else current, new_rows], ignore_index=True)
+            biometrics_df.attrs = dict(self.attrs, **source_attrs)
+
+        latest = pd.concat([self.latest.drop(affected, errors='ignore'), latest_per_athlete(affected_pivot)]).sort_index()
+        last_rows = pd.concat([self.last_rows.drop(affected, errors='ignore'), last_row_per_athlete(affected_pivot)]).sort_index()
+        rolling = pd.concat([
+            self.rolling[~self.rolling.index.get_level_values(0).isin(affected)],
+            rolling_means(affected_pivot),
+        ]).sort_index()
+        derived = derived_metrics(affected_pivot, self.baseline_starts)
+        latest_derived_rows = pd.concat([self.derived.drop(affected, errors='ignore'), latest_derived(derived)]).sort_index()
+
+        # Back-filled days change every later day's deviations, so those athletes are rescored in full
+        previous = current_pivot[current_pivot.index.get_level_values(0).isin(affected)]
+        last_dates = previous.index.to_frame(index=False).groupby('athlete_id')['date'].max()
+        first_new = new_rows.groupby('athlete_id')['date'].min()
+        backfilled = [aid for aid, day in first_new.items() if aid in last_dates.index and day <= last_dates[aid]]
+        history = self.alerts_history
+        if backfilled:
+            history = history[~history['athlete_id'].isin(backfilled)]
+        history = append_alerts_history(history, affected_pivot, self.engine, self.genotypes, derived)
+
+        state = self._assemble(
+            _biometrics_df=biometrics_df,
+            engine=self.engine,
+            genotypes=self.genotypes,
+            baseline_starts=self.baseline_starts,
+            _pivot=pivot,
+            store=store,
+            latest=latest,
+            last_rows=last_rows,
+            rolling=rolling,
+            derived=latest_derived_rows,
+            alerts_history=history,
+        )
+        if self.compact:
+            state._compact()
+        return state, affected
+
+
+def athlete_records(biometrics: BiometricsState) -> RecordTable:
+    """Last day's metrics, derived metrics and alert per athlete, for allocation-free per-athlete reads"""
+    rows = biometrics.last_rows.copy()
+    rows.index = rows.index.astype(str)
+    rows = rows.join(biometrics.derived.set_axis(biometrics.derived.index.astype(str)))
+    history = biometrics.alerts_history
+    if not history.empty:
+        last_alert = history.sort_values(['athlete_id', 'date']).drop_duplicates('athlete_id', keep='last')
+        last_alert = last_alert.set_index(last_alert['athlete_id'].astype(str))
+        rows['alert_type'] = last_alert['alert_type'].reindex(rows.index)
+        rows['rule_id'] = last_alert['rule_id'].reindex(rows.index)
+    return RecordTable(rows)
+
+
+# -------------------------------
+# 2. Incrementally Refreshed Workbook
+# -------------------------------
+
+class DataSnapshot(NamedTuple):
+    """One published data version; every table in it is shared by all sessions and read-only
+
+    Readers hold on to a snapshot for a whole script run, so a refresh that
+    publishes a newer one never mixes versions mid-page. Never modify the
+    frames in place: copy first (with Copy-on-Write, column selections and
+    slices are already lazy copies).
+    """
+    version: Optional[str]
+    frames: Optional[Mapping[str, pd.DataFrame]]
+    biometrics: Optional[BiometricsState]
+    zones: Optional[ZoneClassifier]
+    team: pd.DataFrame
+    records: RecordTable
+    sha256: Optional[str] = None  # content hash of the workbook version loaded
+
+    @property
+    def genotypes(self) -> GenotypeStore:
+        return self.biometrics.genotypes if self.biometrics is not None else GenotypeStore()
+
+
+EMPTY_SNAPSHOT = DataSnapshot(None, None, None, None, pd.DataFrame(), RecordTable(pd.DataFrame()))
+
+
+class WorkbookState:
+    """Versioned workbook store that appends newly added biometric days instead of reloading everything
+
+    Each load builds a complete DataSnapshot off to the side and publishes it
+    with a single reference assignment, so readers see either the old or the
+    new version, never a mix. With compact=True biometric_daily lives only in
+    the compact store of the biometrics; with sql_backend ('sqlite' or 'duckdb')
+    every sheet is also kept in an embedded database next to the snapshot and
+    biometric_daily is read from it on demand. Either way frames then holds just
+    the configuration sheets.
+
+    With ingest_dir, wearable exports dropped there are ingested on each refresh
+    and their athlete-days applied on top of the workbook rows, an ingested record
+    replacing the workbook row of the same day (and later records earlier ones);
+    the version then ends in '+<ingested parts>'.
+    """
+
+    def __init__(self, path: str, snapshot_dir: Optional[str] = None, compact: bool = False,
+                 sql_backend: Optional[str] = None, ingest_dir: Optional[str] = None):
+        self.path = path
+        self.snapshot_dir = snapshot_dir or snapshot_dir_for(path)
+        self.compact = compact
+        self.sql = SqlStore(sql_path_for(self.snapshot_dir, sql_backend), sql_backend) if sql_backend else None
+        self.ingester = WearableIngester(ingest_dir, os.path.join(self.snapshot_dir, INGEST_DIRNAME)) if ingest_dir else None
+        self.snapshot: DataSnapshot = EMPTY_SNAPSHOT
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> Optional[str]:
+        return self.snapshot.version
+
+    @property
+    def frames(self) -> Optional[Mapping[str, pd.DataFrame]]:
+        return self.snapshot.frames
+
+    @property
+    def biometrics(self) -> Optional[BiometricsState]:
+        return self.snapshot.biometrics
+
+    @property
+    def zones(self) -> Optional[ZoneClassifier]:
+        return self.snapshot.zones
+
+    @property
+    def team(self) -> pd.DataFrame:
+        return self.snapshot.team
+
+    @property
+    def records(self) -> RecordTable:
+        return self.snapshot.records
+
+    @property
+    def genotypes(self) -> GenotypeStore:
+        return self.snapshot.genotypes
+
+    def _alerts_dir(self) -> Optional[str]:
+        return self.snapshot_dir if pyarrow is not None else None
+
+    def _publish(self, frames: Dict[str, pd.DataFrame], biometrics: BiometricsState, version: str,
+                 sha256: Optional[str] = None) -> None:
+        """Build the per-version shared tables, then swap the whole snapshot in at once"""
+        zones = ZoneClassifier(frames["sam_metrics_config"])
+        with timer('state.team_snapshot'):
+            team = build_team_snapshot(
+                frames["athlete_profiles"], None, biometrics.latest, biometrics.rolling,
+                biometrics.alerts_history, zones, biometrics.engine, day_summary=biometrics.day_summary(),
+            )
+        records = athlete_records(biometrics)
+        if self.compact or self.sql is not None:
+            frames = {name: df for name, df in frames.items() if name != "biometric_daily"}
+        self.snapshot = DataSnapshot(version, MappingProxyType(dict(frames)), biometrics, zones, team, records, sha256)
+
+    def _with_ingested(self, biometrics: BiometricsState, parts: int) -> Tuple[BiometricsState, List[str]]:
+        """Append the rows of ingested parts not yet applied to these biometrics"""
+        start = biometrics.attrs.get('ingested_parts', 0)
+        if self.ingester is None or start == parts:
+            return biometrics, []
+        if start > parts:  # ingestion restarted from scratch: re-apply everything, unchanged days are skipped
+            start = 0
+        rows = self.ingester.read_parts(start, parts)
+        rows.attrs['ingested_parts'] = parts
+        with timer('state.with_rows'):
+            biometrics, affected = biometrics.with_rows(rows)
+        return biometrics.with_attrs(ingested_parts=parts), affected
+
+    def _overlaps_ingested(self, rows: pd.DataFrame) -> bool:
+        """Whether workbook rows re-append athlete-days that ingested records already replaced"""
+        applied = self.snapshot.biometrics.attrs.get('ingested_parts', 0)
+        if self.ingester is None or not applied or rows.empty:
+            return False
+        ingested = self.ingester.read_parts(0, applied, columns=INDEX_COLS)
+        keys = pd.MultiIndex.from_frame(rows[INDEX_COLS].astype({'athlete_id': str}))
+        return bool(keys.isin(pd.MultiIndex.from_frame(ingested.astype({'athlete_id': str}))).any())
+
+    def _full_load(self, version: str, parts: int = 0) -> List[str]:
+        view = None
+        fingerprint = workbook_fingerprint(self.path)
+        if self.sql is not None and self.sql.is_current(self.path):
+            with timer('load.sql_read'):
+                frames = self.sql.read_frames()  # appended days since the last Parquet snapshot are only here
+            view = self.sql.biometrics()
+        else:
+            frames = load_frames(self.path, self.snapshot_dir)
+            if self.sql is not None:
+                with timer('load.sql_write'):
+                    view = self.sql.write_frames(frames, fingerprint)
+        biometrics = BiometricsState(
+            frames["biometric_daily"],
+            RuleEngine(frames["predictive_rules"]),
+            GenotypeStore(frames["genetic_profiles"]),
+            alerts_dir=self._alerts_dir(),
+            compact=self.compact,
+            baseline_starts=baseline_start_dates(frames["athlete_profiles"]),
+            sql=view,
+        )
+        # The Parquet snapshot mirrors the workbook alone, so ingested days are re-applied on top
+        biometrics, _ = self._with_ingested(biometrics, parts)
+        self._publish(frames, biometrics, version, fingerprint['sha256'])
+        return list(biometrics.latest.index.astype(str))
+
+    def _incremental_load(self, version: str, parts: int = 0, workbook_changed: bool = True) -> Optional[List[str]]:
+        """Append new workbook rows and ingested parts, re-reading only what changed; None when a full reload is required"""
+        current = self.snapshot
+        fingerprint = workbook_fingerprint(self.path)
+        if fingerprint['sha256'] == current.sha256:
+            workbook_changed = False  # touched or re-saved without edits: no sheet is re-read
+        biometrics, affected = current.biometrics, []
+        config: Dict[str, pd.DataFrame] = {}
+        if workbook_changed:
+            attrs = current.biometrics.attrs
+            with timer('load.appended_rows'):
+                new_rows = read_appended_rows(self.path, attrs.get('source_rows', 0), attrs.get('source_digest'))
+            if new_rows is None:
+                return None  # a consumed row was edited or removed (its digest differs): full reload
+            if self._overlaps_ingested(new_rows):
+                return None  # ingested records of those days must stay on top, as in a full load
+
+            # Config sheets are small; only the edited ones are replaced
+            config = {name: df for name, df in read_sheets(self.path, CONFIG_SHEETS).items()
+                      if not df.equals(current.frames[name])}
+            if any(name in config for name in ALERT_SHEETS):
+                return None
+            if 'athlete_profiles' in config and not baseline_start_dates(config['athlete_profiles']).equals(biometrics.baseline_starts):
+                return None
+
+            with timer('state.with_rows'):
+                biometrics, affected = biometrics.with_rows(new_rows)
+            biometrics = biometrics.with_attrs(**new_rows.attrs)
+        biometrics, ingested = self._with_ingested(biometrics, parts)
+        affected = sorted(set(affected) | set(ingested))
+        if config:
+            count('refresh.config_sheets', len(config))
+            affected = list(biometrics.latest.index.astype(str))  # zones or profile details of everyone may differ
+        if biometrics is current.biometrics and not config:
+            # The workbook may have changed, but every consumed biometric_daily row matched its
+            # digest, appended rows repeat existing days and no other sheet differs: same data
+            self.snapshot = current._replace(version=version, sha256=fingerprint['sha256'])
+            return affected
+        if biometrics.in_sql:
+            # The database already holds the new rows and is the durable copy; no full Parquet rewrite
+            frames = dict(current.frames, **config)
+            if config:
+                self.sql.write_config(config, fingerprint)
+            else:
+                self.sql.set_meta('fingerprint', fingerprint)
+        else:
+            frames = dict(current.frames, **config, biometric_daily=biometrics.biometrics_df)
+        if pyarrow is not None:
+            try:
+                if not biometrics.in_sql:
+                    write_snapshot(frames, self.snapshot_dir, fingerprint)
+                write_alerts_history(biometrics.alerts_history, self.snapshot_dir, biometrics.engine, biometrics.genotypes)
+            except Exception:
+                pass  # Read-only deployment: the next cold start re-parses the workbook
+        self._publish(frames, biometrics, version, fingerprint['sha256'])
+        return affected
+
+    def refresh(self) -> List[str]:
+        """Bring the state up to date with the workbook (and ingested exports); returns athletes whose data changed"""
+        workbook = workbook_version(self.path)
+        parts = self.ingester.poll() if self.ingester is not None else 0
+        version = f"{workbook}+{parts}" if self.ingester is not None else workbook
+        if version == self.version:
+            return []
+        with self._lock:
+            if version == self.version:
+                return []
+            if self.frames is not None:
+                workbook_changed = self.version.partition('+')[0] != workbook
+                try:
+                    with timer('refresh.incremental'):
+                        affected = self._incremental_load(version, parts, workbook_changed)
+                except DataValidationError:
+                    affected = None
+                if affected is not None:
+                    count('refresh.incremental')
+                    return affected
+            count('refresh.full')
+            with timer('refresh.full'):
+                return self._full_load(version, parts)
@@ -0,0 +1,199 @@
+# sam_team.py
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from sam_rules import RuleEngine, alert_title
+from sam_zones import ZONE_GREEN, ZONE_RED, ZONE_YELLOW, ZoneClassifier
+
+# -------------------------------
+# 1. Readiness Scoring
+# -------------------------------
+MIN_FORECAST_DAYS = 3
+
+
+def readiness_score(recent_hrv, recent_rhr, recent_sleep) -> np.ndarray:
+    """Readiness % from trailing HRV, RHR and sleep means (scalar or array inputs)"""
+    hrv = np.asarray(recent_hrv, dtype=np.float64)
+    rhr = np.asarray(recent_rhr, dtype=np.float64)
+    sleep = np.asarray(recent_sleep, dtype=np.float64)
+    hrv_score = np.where(hrv > 45, 1.0, np.where(hrv > 35, 0.5, 0.0))
+    rhr_score = np.where(rhr < 65, 1.0, np.where(rhr < 75, 0.5, 0.0))
+    sleep_score = np.where(sleep > 7.5, 1.0, np.where(sleep > 6.5, 0.5, 0.0))
+    return (hrv_score + rhr_score + sleep_score) / 3 * 100
+
+
+# -------------------------------
+# 2. Team Snapshot
+# -------------------------------
+
+def athlete_day_summary(pivot: pd.DataFrame) -> pd.DataFrame:
+    """Last date ('max') and number of days ('size') per athlete, indexed by string id"""
+    dates = pivot.index.to_frame(index=False)
+    dates['athlete_id'] = dates['athlete_id'].astype(str)
+    return dates.groupby('athlete_id')['date'].agg(['max', 'size'])
+
+
+def build_team_snapshot(athletes_df: pd.DataFrame, pivot: Optional[pd.DataFrame], latest: pd.DataFrame,
+                        rolling: pd.DataFrame, alerts_history: pd.DataFrame,
+                        zone_classifier: ZoneClassifier, engine: Optional[RuleEngine] = None,
+                        day_summary: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """One row per athlete with biometric data: profile, latest metrics, alert, zones and readiness
+
+    Pass a precomputed day_summary (e.g. aggregated in SQL) instead of the pivot to skip the scan.
+    """
+    if latest.empty:
+        return pd.DataFrame()
+
+    team = latest.copy()
+    team.index = team.index.astype(str)
+    team.index.name = 'athlete_id'
+
+    # Per-athlete day counts and last date
+    per_athlete = day_summary if day_summary is not None else athlete_day_summary(pivot)
+    team['last_date'] = per_athlete['max']
+    team['days_of_data'] = per_athlete['size']
+
+    # Profile fields (athletes without a profile are kept but flagged)
+    profiles = athletes_df.drop_duplicates('athlete_id').copy()
+    profiles['athlete_id'] = profiles['athlete_id'].astype(str)
+    profiles = profiles.set_index('athlete_id')
+    profile_cols = [c for c in profiles.columns if c not in team.columns]
+    team = team.join(profiles[profile_cols])
+    for col in profile_cols:
+        if pd.api.types.is_integer_dtype(profiles[col]):
+            team[col] = team[col].astype('Int64')  # stay integer when some profiles are missing
+    team['has_profile'] = team.index.isin(profiles.index)
+
+    # Alert of each athlete's most recent day
+    if not alerts_history.empty:
+        last_alert = alerts_history.sort_values(['athlete_id', 'date']).drop_duplicates('athlete_id', keep='last')
+        last_alert = last_alert.set_index(last_alert['athlete_id'].astype(str))
+        team['alert_type'] = last_alert['alert_type'].reindex(team.index).fillna('green')
+        team['rule_id'] = last_alert['rule_id'].reindex(team.index)
+    else:
+        team['alert_type'] = 'green'
+        team['rule_id'] = None
+    rules = engine.by_id if engine is not None else {}
+    titles = {
+        (alert_type, rule_id): alert_title(alert_type, rules.get(rule_id))
+        for alert_type, rule_id in zip(team['alert_type'], team['rule_id'])
+    }
+    team['alert_title'] = [titles[key] for key in zip(team['alert_type'], team['rule_id'])]
+
+    # Zone counts over the latest metric values
+    zones = zone_classifier.classify_frame(team).to_numpy()
+    team['zones_red'] = (zones == ZONE_RED).sum(axis=1)
+    team['zones_yellow'] = (zones == ZONE_YELLOW).sum(axis=1)
+    team['zones_green'] = (zones == ZONE_GREEN).sum(axis=1)
+    team['worst_zone'] = np.select(
+        [team['zones_red'] > 0, team['zones_yellow'] > 0, team['zones_green'] > 0], ['red', 'yellow', 'green'], 'none'
+    )
+
+    # Readiness from trailing means of each athlete's last day
+    recent = rolling.groupby(level='athlete_id').tail(1).droplevel('date')
+    recent.index = recent.index.astype(str)
+    for metric, col in [('hrv_night', 'recent_hrv'), ('resting_hr', 'recent_rhr'), ('sleep_duration_h', 'recent_sleep')]:
+        team[col] = recent[metric].reindex(team.index) if metric in recent.columns else np.nan
+    team['readiness_score'] = readiness_score(team['recent_hrv'], team['recent_rhr'], team['recent_sleep'])
+    team.loc[team['days_of_data'] < MIN_FORECAST_DAYS, 'readiness_score'] = np.nan
+
+    return team.reset_index()
+
+
+# -------------------------------
+# 3. Roster Filtering & Paging
+# -------------------------------
+# Lower sorts first: high-priority alerts, then those to monitor, then the rest
+ALERT_PRIORITY = {
+    "inflammation": 0, "airway": 0,
+    "circadian": 1, "nutrition": 1, "overtraining": 1,
+    "error": 2, "no_data": 2,
+    "green": 3,
+}
+ZONE_FILTERS = ['red', 'yellow', 'green', 'none']  # values of the worst_zone column
+
+# Sort label -> (column, ascending) keys; athlete_id breaks ties so pages are stable
+ROSTER_SORTS = {
+    "Athlete": [('athlete_id', True)],
+    "Name": [('name', True), ('athlete_id', True)],
+    "Alert priority": [('alert_type', True), ('athlete_id', True)],
+    "Readiness (lowest first)": [('readiness_score', True), ('athlete_id', True)],
+    "Red zones (most first)": [('zones_red', False), ('zones_yellow', False), ('athlete_id', True)],
+    "Last data (oldest first)": [('last_date', True), ('athlete_id', True)],
+}
+
+
+def filter_team(team: pd.DataFrame, alert_types: Iterable[str] = (), sports: Iterable[str] = (),
+                teams: Iterable[str] = (), zones: Iterable[str] = (), profiled_only: bool = True) -> pd.DataFrame:
+    """Team snapshot rows matching every non-empty filter"""
+    if team.empty:
+        return team
+    mask = np.ones(len(team), dtype=bool)
+    if profiled_only and 'has_profile' in team.columns:
+        mask &= team['has_profile'].to_numpy(dtype=bool)
+    for col, allowed in (('alert_type', alert_types), ('sport', sports), ('team', teams), ('worst_zone', zones)):
+        allowed = list(allowed)
+        if allowed and col in team.columns:
+            mask &= team[col].astype(str).isin([str(value) for value in allowed]).to_numpy()
+    return team[mask]
+
+
+def _sort_key(values: pd.Series) -> pd.Series:
+    if values.name == 'alert_type':
+        return values.map(ALERT_PRIORITY).fillna(len(ALERT_PRIORITY))
+    return values
+
+
+def sort_team(team: pd.DataFrame, by: str = "Athlete") -> pd.DataFrame:
+    """Team snapshot ordered by one of ROSTER_SORTS (missing values last)"""
+    keys = [(col, ascending) for col, ascending in ROSTER_SORTS[by] if col in team.columns]
+    if team.empty or not keys:
+        return team
+    columns, ascending = zip(*keys)
+    return team.sort_values(list(columns), ascending=list(ascending), key=_sort_key, na_position='last', kind='stable')
+
+
+def roster_page(team: pd.DataFrame, page: int, page_size: int) -> Tuple[pd.DataFrame, int, int]:
+    """Rows of one 1-based page, the page actually shown (clamped) and the page count"""
+    pages = max(1, -(-len(team) // page_size))
+    page = min(max(int(page), 1), pages)
+    start = (page - 1) * page_size
+    return team.iloc[start:start + page_size], page, pages
+
+
+# -------------------------------
+# 4. Roster Cards
+# -------------------------------
+ROSTER_PAGE_SIZES = [24, 48, 96]
+ALERT_COLORS = {
+    "inflammation": "#E74C3C", "airway": "#E74C3C",
+    "circadian": "#F39C12", "nutrition": "#F39C12", "overtraining": "#F39C12",
+    "green": "#28A745", "error": "#6C757D", "no_data": "#6C757D"
+}
+ALERT_ICONS = {
+    "inflammation": "🔴", "airway": "🔴",
+    "circadian": "🟡", "nutrition": "🟡", "overtraining": "🟡",
+    "green": "🟢", "error": "⚪", "no_data": "⚪"
+}
+
+
+def athlete_card_html(row: Dict[str, Any]) -> str:
+    """Markup of one roster card from a team snapshot row (as from to_dict('records'))"""
+    color = ALERT_COLORS.get(row['alert_type'], "#6C757D")
+    icon = ALERT_ICONS.get(row['alert_type'], "⚪")
+    title = row['alert_title'].replace('🔴', '').replace('🟡', '').replace('🟢', '').replace('❌', '').replace('📊', '').strip()
+    return f"""
+    <div class='athlete-card'>
+        <h4 style='margin-bottom: 0.5rem; color: #2C3E50;'>{row['name']}</h4>
+        <p style='color: #6c757d; margin-bottom: 1rem;'>{row['sport']} | Age {row['age']}</p>
+        <div style='display: flex; justify-content: space-between; margin-bottom: 1rem; color: #495057;'>
+            <span><strong>HRV:</strong> {row.get('hrv_night', 'N/A'):.0f} ms</span>
+            <span><strong>Sleep:</strong> {row.get('sleep_duration_h', 'N/A'):.1f}h</span>
+        </div>
+        <div class='status-indicator' style='color: {color};'>
+            {icon} {title}
+        </div>
+    </div>
+    """
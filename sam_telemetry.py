@@ -0,0 +1,141 @@
+# sam_telemetry.py
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+# -------------------------------
+# 1. Timers and Counters
+# -------------------------------
+METRIC_PREFIX = "sam"
+LOG_MAX_BYTES = 5 * 2 ** 20
+LOG_BACKUPS = 3
+
+
+class Telemetry:
+    """Thread-safe stage timers (calls, total, max, last seconds) and event counters"""
+
+    def __init__(self):
+        self._timers: Dict[str, List[float]] = {}
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            stats = self._timers.get(name)
+            if stats is None:
+                self._timers[name] = [1, seconds, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                stats[2] = max(stats[2], seconds)
+                stats[3] = seconds
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def timers(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                name: {'calls': int(calls), 'total_s': total, 'max_s': peak, 'last_s': last}
+                for name, (calls, total, peak, last) in sorted(self._timers.items())
+            }
+
+    def counters(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(sorted(self._counters.items()))
+
+
+# Process-wide totals, plus the script run (if any) active in the current thread
+TELEMETRY = Telemetry()
+_current_run: ContextVar[Optional[Telemetry]] = ContextVar('sam_telemetry_run', default=None)
+
+
+def observe(name: str, seconds: float) -> None:
+    """Record one timing in the process totals and the active run"""
+    TELEMETRY.observe(name, seconds)
+    run = _current_run.get()
+    if run is not None:
+        run.observe(name, seconds)
+
+
+@contextmanager
+def timer(name: str) -> Iterator[None]:
+    """Time a block into the process totals and the active run"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start)
+
+
+def count(name: str, n: int = 1) -> None:
+    """Increment an event counter in the process totals and the active run"""
+    TELEMETRY.count(name, n)
+    run = _current_run.get()
+    if run is not None:
+        run.count(name, n)
+
+
+def begin_run() -> Telemetry:
+    """Start collecting this thread's timings separately, e.g. for one Streamlit script run
+
+    Replaces the thread's previous run, so a run that stops early needs no cleanup.
+    """
+    run = Telemetry()
+    _current_run.set(run)
+    return run
+
+
+# -------------------------------
+# 2. Exporters
+# -------------------------------
+
+def _label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_text(telemetry: Telemetry, gauges: Optional[Dict[str, float]] = None) -> str:
+    """Prometheus text exposition format (for the node_exporter textfile collector)"""
+    timers, counters = telemetry.timers(), telemetry.counters()
+    lines = []
+    for metric, field, kind, help_text in (
+        ('stage_calls_total', 'calls', 'counter', 'Timed calls per dashboard stage'),
+        ('stage_seconds_total', 'total_s', 'counter', 'Seconds spent per dashboard stage'),
+        ('stage_seconds_max', 'max_s', 'gauge', 'Slowest call per dashboard stage'),
+    ):
+        lines += [f"# HELP {METRIC_PREFIX}_{metric} {help_text}", f"# TYPE {METRIC_PREFIX}_{metric} {kind}"]
+        lines += [f'{METRIC_PREFIX}_{metric}{{stage="{_label(name)}"}} {stats[field]:.6g}' for name, stats in timers.items()]
+    lines += [f"# HELP {METRIC_PREFIX}_events_total Dashboard events", f"# TYPE {METRIC_PREFIX}_events_total counter"]
+    lines += [f'{METRIC_PREFIX}_events_total{{event="{_label(name)}"}} {value}' for name, value in counters.items()]
+    for name, value in (gauges or {}).items():
+        lines += [f"# TYPE {METRIC_PREFIX}_{name} gauge", f"{METRIC_PREFIX}_{name} {value:.6g}"]
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path: str, text: str) -> None:
+    """Replace the metrics file atomically so a scrape never reads a partial file"""
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as fh:
+        fh.write(text)
+    os.replace(tmp, path)
+
+
+class RunLog:
+    """Rotating JSON-lines log with one record per script run, for trend analysis"""
+
+    def __init__(self, path: str, max_bytes: int = LOG_MAX_BYTES, backups: int = LOG_BACKUPS):
+        self.path = path
+        # Driven directly rather than through a logger, so app logging config never mutes or duplicates it
+        self._handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding='utf-8')
+        self._handler.setFormatter(logging.Formatter('%(message)s'))
+
+    def write(self, run: Telemetry, **fields) -> None:
+        record = {'ts': time.time(), **fields, 'timers': run.timers(), 'counters': run.counters()}
+        self._handler.handle(logging.makeLogRecord({'msg': json.dumps(record, default=str)}))
@@ -0,0 +1,61 @@
+# sam_watch.py
+import threading
+from typing import List, Optional
+
+from sam_state import WorkbookState
+from sam_telemetry import count, timer
+
+# -------------------------------
+# 1. Background Source Watcher
+# -------------------------------
+WATCH_INTERVAL_S = 2.0
+
+
+class SourceWatcher:
+    """Daemon thread that refreshes a WorkbookState as soon as its sources change
+
+    Each tick is the state's own cheap check: workbook mtime/size/inode and new
+    records in the ingest drop folder. On a change the refresh re-reads only what
+    changed (appended rows, edited config sheets, nothing when the content hash
+    is unchanged) and publishes a new snapshot, so script runs find it already
+    built. Errors are kept for inspection; the next script run's own refresh
+    reports them.
+    """
+
+    def __init__(self, state: WorkbookState, interval: float = WATCH_INTERVAL_S):
+        self.state = state
+        self.interval = interval
+        self.last_error: Optional[Exception] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='sam-source-watcher', daemon=True)
+
+    def start(self) -> 'SourceWatcher':
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        self._thread.join(timeout)
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive()
+
+    def check(self) -> List[str]:
+        """Refresh once; returns athletes whose data changed"""
+        before = self.state.version
+        try:
+            with timer('watch.check'):
+                affected = self.state.refresh()
+        except Exception as e:
+            self.last_error = e
+            count('watch.errors')
+            return []
+        self.last_error = None
+        if self.state.version != before:
+            count('watch.changes')
+        return affected
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check()
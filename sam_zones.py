@@ -0,0 +1,132 @@
+# sam_zones.py
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# -------------------------------
+# 1. Zone Codes
+# -------------------------------
+ZONE_NO_CONFIG = -2
+ZONE_NO_DATA = -1
+ZONE_UNKNOWN = 0
+ZONE_GREEN = 1
+ZONE_YELLOW = 2
+ZONE_RED = 3
+
+ZONE_LABELS = {
+    ZONE_NO_CONFIG: "⚪ No Config",
+    ZONE_NO_DATA: "⚪ No Data",
+    ZONE_UNKNOWN: "⚪ Unknown",
+    ZONE_GREEN: "🟢 Green",
+    ZONE_YELLOW: "🟡 Yellow",
+    ZONE_RED: "🔴 Red",
+}
+
+# Plain names for exports and machine-readable output
+ZONE_NAMES = {
+    ZONE_NO_CONFIG: "no_config",
+    ZONE_NO_DATA: "no_data",
+    ZONE_UNKNOWN: "unknown",
+    ZONE_GREEN: "green",
+    ZONE_YELLOW: "yellow",
+    ZONE_RED: "red",
+}
+
+# Bands in precedence order: the first band containing a value wins
+BAND_PRECEDENCE = [
+    ("red_low", "red_high", ZONE_RED),
+    ("red_low2", "red_high2", ZONE_RED),
+    ("yellow_low", "yellow_high", ZONE_YELLOW),
+    ("yellow_low2", "yellow_high2", ZONE_YELLOW),
+    ("green_low", "green_high", ZONE_GREEN),
+]
+
+
+def normalize_metric_name(name: str) -> str:
+    """Map display names like 'Hrv Night' onto config keys like 'hrv_night'"""
+    return str(name).strip().lower().replace(" ", "_")
+
+
+class ZoneCube(NamedTuple):
+    """Dense athlete × date × metric zone codes"""
+    values: np.ndarray
+    athletes: pd.Index
+    dates: pd.DatetimeIndex
+    metrics: List[str]
+
+
+# -------------------------------
+# 2. Compiled Classifier
+# -------------------------------
+
+class ZoneClassifier:
+    """Red/yellow/green bands from sam_metrics_config compiled to NumPy interval tables"""
+
+    def __init__(self, metrics_config: pd.DataFrame):
+        self._bands: Dict[str, tuple] = {}
+        if metrics_config is None or 'metric_name' not in metrics_config.columns:
+            return
+        for _, row in metrics_config.iterrows():
+            metric = normalize_metric_name(row['metric_name'])
+            if metric in self._bands:
+                continue  # First config row wins, as with the per-value lookup
+            lows, highs, codes = [], [], []
+            for low_col, high_col, code in BAND_PRECEDENCE:
+                low, high = row.get(low_col, np.nan), row.get(high_col, np.nan)
+                if pd.isna(low) or pd.isna(high):
+                    continue
+                lows.append(float(low))
+                highs.append(float(high))
+                codes.append(code)
+            self._bands[metric] = (
+                np.array(lows, dtype=np.float64),
+                np.array(highs, dtype=np.float64),
+                np.array(codes, dtype=np.int8),
+            )
+
+    @property
+    def metrics(self) -> List[str]:
+        return list(self._bands)
+
+    def __contains__(self, metric_name: str) -> bool:
+        return normalize_metric_name(metric_name) in self._bands
+
+    def classify(self, values, metric_name: str) -> np.ndarray:
+        """Zone code for every value of one metric (any array-like shape)"""
+        values = np.asarray(values, dtype=np.float64)
+        bands = self._bands.get(normalize_metric_name(metric_name))
+        if bands is None:
+            out = np.full(values.shape, ZONE_NO_CONFIG, dtype=np.int8)
+        else:
+            # Paint lowest-precedence bands first so higher ones overwrite them
+            out = np.full(values.shape, ZONE_UNKNOWN, dtype=np.int8)
+            for low, high, code in zip(*(b[::-1] for b in bands)):
+                out[(values >= low) & (values <= high)] = code
+        out[np.isnan(values)] = ZONE_NO_DATA
+        return out
+
+    def classify_frame(self, df: pd.DataFrame, metrics: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Zone codes for each configured metric column, aligned to df's index"""
+        if metrics is None:
+            metrics = [m for m in self._bands if m in df.columns]
+        return pd.DataFrame(
+            {m: self.classify(df[m].to_numpy(dtype=np.float64, na_value=np.nan), m) for m in metrics},
+            index=df.index,
+            columns=list(metrics),
+        )
+
+    def zone_cube(self, pivot: pd.DataFrame, metrics: Optional[Sequence[str]] = None) -> ZoneCube:
+        """Classify an (athlete_id, date)-indexed frame into a dense int8 cube"""
+        zones = self.classify_frame(pivot, metrics)
+        athlete_codes, athletes = pd.factorize(pivot.index.get_level_values(0), sort=True)
+        date_codes, dates = pd.factorize(pivot.index.get_level_values(1), sort=True)
+        cube = np.full((len(athletes), len(dates), zones.shape[1]), ZONE_NO_DATA, dtype=np.int8)
+        cube[athlete_codes, date_codes, :] = zones.to_numpy(dtype=np.int8)
+        return ZoneCube(cube, pd.Index(athletes, name='athlete_id'), pd.DatetimeIndex(dates, name='date'), list(zones.columns))
+
+    def status(self, value, metric_name: str) -> str:
+        """Display label for a single value"""
+        if value is None or pd.isna(value):
+            return ZONE_LABELS[ZONE_NO_DATA]
+        return ZONE_LABELS[int(self.classify(value, metric_name))]
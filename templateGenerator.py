@@ -1,12 +1,18 @@
 # create_expanded_template.py
-import pandas as pd
+import argparse
+import os
+from datetime import datetime
+from typing import Dict, Optional
+
 import numpy as np
-from datetime import datetime, timedelta
-import random
-from datetime import time
+import pandas as pd
+
+DEFAULT_OUTPUT = "SAM_Recovery_Data_Template_Expanded.xlsx"
+EXCEL_MAX_ROWS = 1_048_575  # data rows per sheet below the header
+CYCLE_DAYS = 14  # events and drifts repeat over a two-week training block
 
 # -------------------------------
-# 1. Athlete Profiles (7 athletes)
+# 1. Athlete Profiles (7 template athletes)
 # -------------------------------
 
 athlete_data = [
@@ -19,15 +25,10 @@ athlete_data = [
     {"athlete_id": "austin", "name": "Austin Cole", "age": 30, "sex": "M", "sport": "Ultra Runner", "team": "Team Apex", "baseline_start_date": "2025-03-01", "notes": "Long-distance recovery focus"},
 ]
 
-athletes_df = pd.DataFrame(athlete_data)
-
 # -------------------------------
 # 2. Genetic Profiles (from your spec)
 # -------------------------------
 
-genetic_data = []
-
-# Define genetic profiles per athlete
 genetic_profiles = {
     "alex": {
         "COMT": ("rs4680", "AA", "Slow (high stress reactivity)"),
@@ -94,27 +95,11 @@ genetic_profiles = {
     },
 }
 
-for athlete_id, genes in genetic_profiles.items():
-    for gene, (rsid, genotype, interpretation) in genes.items():
-        genetic_data.append({
-            "athlete_id": athlete_id,
-            "gene": gene,
-            "rsid": rsid,
-            "genotype": genotype,
-            "interpretation": interpretation
-        })
-
-genetics_df = pd.DataFrame(genetic_data)
-
 # -------------------------------
-# 3. Biometric Daily Data (14 days × 7 athletes)
+# 3. Biometric Baselines and Events
 # -------------------------------
 
-np.random.seed(42)
-biometric_data = []
-start_date = datetime(2025, 4, 1)
-
-# Baseline values per athlete (genetically adjusted)
+# Baseline values per template athlete (genetically adjusted)
 baselines = {
     "alex": {"rhr": 50, "hrv": 90, "spo2": 98, "temp": 36.6, "deep": 22, "rem": 23, "light": 40, "duration": 8.0, "rr": 13, "load": 95},
     "jordan": {"rhr": 52, "hrv": 85, "spo2": 97, "temp": 36.7, "deep": 20, "rem": 22, "light": 45, "duration": 7.5, "rr": 14, "load": 90},
@@ -124,106 +109,151 @@ baselines = {
     "riley": {"rhr": 56, "hrv": 78, "spo2": 96, "temp": 36.9, "deep": 18, "rem": 20, "light": 48, "duration": 6.8, "rr": 16, "load": 94},
     "austin": {"rhr": 50, "hrv": 88, "spo2": 98, "temp": 36.6, "deep": 21, "rem": 22, "light": 43, "duration": 7.8, "rr": 14, "load": 85},
 }
+BASELINE_KEYS = ["rhr", "hrv", "spo2", "temp", "deep", "rem", "light", "duration", "rr", "load"]
+CLONE_JITTER = 0.03  # relative spread of baselines for athletes beyond the 7 templates
+
+# Event windows as (first_day, last_day) within each training block
+TRAVEL_DAYS = (8, 10)
+ILLNESS_DAYS = (11, CYCLE_DAYS - 1)
+OVERTRAINING_DAYS = (12, CYCLE_DAYS - 1)
+RECOVERY_DAYS = (5, CYCLE_DAYS - 1)
+CIRCADIAN_SHIFT_DAY = 5
+
+TRAVEL_ATHLETES = ["alex", "casey"]
+ILLNESS_ATHLETES = ["jordan"]
+OVERTRAINING_ATHLETES = ["riley"]
+RECOVERY_ATHLETES = ["taylor"]
+
+# "HH:MM" label for every minute of the day, indexed by minute
+CLOCK_LABELS = np.array([f"{m // 60:02d}:{m % 60:02d}" for m in range(24 * 60)], dtype=object)
 
-# Simulate 14 days
-for days_offset in range(14):
-    current_date = start_date + timedelta(days=days_offset)
-
-    for athlete_id in athletes_df['athlete_id']:
-        base = baselines[athlete_id]
-        genetic = genetic_profiles[athlete_id]
-
-        # Add realistic events
-        is_travel_week = days_offset >= 8 and days_offset <= 10 and athlete_id in ["alex", "casey"]
-        is_illness = days_offset >= 11 and athlete_id == "jordan"
-        is_overtrained = days_offset >= 12 and athlete_id == "riley"
-        is_recovering = days_offset >= 5 and athlete_id == "taylor"
-
-        # Noise
-        noise = np.random.normal(0, 1.5)
-
-        # Resting HR
-        rhr = base["rhr"] + noise
-        if is_illness:
-            rhr += 8
-        elif is_overtrained:
-            rhr += 6
-
-        # HRV
-        hrv = base["hrv"] - 0.5 * days_offset + noise * 2
-        if is_illness:
-            hrv -= 15
-        elif is_overtrained:
-            hrv -= 20
-        elif is_recovering:
-            hrv += 10
-
-        # SpO2
-        spo2 = base["spo2"] - 0.2 * days_offset + np.random.normal(0, 0.5)
-        if is_illness:
-            spo2 -= 3
-
-        # Temp
-        temp = base["temp"] + 0.05 * days_offset + np.random.normal(0, 0.1)
-        if is_illness:
-            temp += 0.6
-
-        # Sleep
-        deep = np.random.normal(base["deep"], 2)
-        rem = np.random.normal(base["rem"], 2)
-        light = 100 - deep - rem
-        duration = base["duration"] + np.random.normal(0, 0.5)
-        if is_travel_week:
-            duration -= 1.5
-            deep -= 5
-
-        # Respiratory Rate
-        rr = base["rr"] + np.random.normal(0, 1)
-        if is_illness:
-            rr += 3
-
-        # Load
-        load = base["load"] + np.random.normal(0, 5)
-        if is_overtrained:
-            load -= 25
-
-        # Adjust load for travel
-        # Sleep Onset (simulate circadian delay for long PER3)
-        if genetic["PER3"][1] == "long" or genetic["CLOCK"][1] == "AA":
-            if days_offset >= 5:
-                # Pick hour from [23, 0, 1]
-                sleep_onset_hour = random.choice([23, 0, 1])
-            else:
-                sleep_onset_hour = random.randint(21, 22)
-        else:
-            sleep_onset_hour = random.randint(21, 23)
-
-        sleep_onset = f"{sleep_onset_hour % 24:02d}:{random.choice(['30', '45', '15'])}"
-
-        wake_time = f"{(sleep_onset_hour + int(duration)) % 24:02d}:{random.choice(['00', '15', '30'])}"
-
-        biometric_data.append({
-            "athlete_id": athlete_id,
-            "date": current_date,
-            "resting_hr": max(40, min(100, round(rhr, 1))),
-            "avg_hr_day": round(rhr + 15 + np.random.normal(0, 2), 1),
-            "hrv_night": max(50, min(200, round(hrv, 1))),
-            "spo2_night": max(85, min(100, round(spo2, 1))),
-            "deep_sleep_pct": max(5, min(40, round(deep, 1))),
-            "rem_sleep_pct": max(10, min(35, round(rem, 1))),
-            "light_sleep_pct": max(30, min(70, round(light, 1))),
-            "sleep_duration_h": max(4, min(12, round(duration, 1))),
-            "resp_rate_night": max(8, min(30, round(rr, 1))),
-            "temp_trend_c": max(35.0, min(40.0, round(temp, 1))),
-            "training_load_pct": max(0, min(100, round(load, 1))),
-            "sleep_onset_time": sleep_onset,
-            "wake_time": wake_time
-        })
-
-biometrics_df = pd.DataFrame(biometric_data)
 
 # -------------------------------
-# 4. SAM Metrics Config (from spec)
+# 4. Vectorized Generator
+# -------------------------------
+
+def build_athletes(n_athletes: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Profiles for n athletes cloned round-robin from the templates; first 7 keep their ids"""
+    templates = pd.DataFrame(athlete_data)
+    template_idx = np.arange(n_athletes) % len(templates)
+    athletes = templates.iloc[template_idx].reset_index(drop=True)
+    clones = np.arange(n_athletes) >= len(templates)
+    if clones.any():
+        suffix = pd.Series(np.arange(n_athletes), dtype=str).str.zfill(len(str(n_athletes - 1)))
+        athletes.loc[clones, "athlete_id"] = athletes["athlete_id"][clones] + "_" + suffix[clones]
+        athletes.loc[clones, "name"] = athletes["name"][clones] + " " + suffix[clones]
+        athletes.loc[clones, "age"] = athletes["age"][clones] + rng.integers(-3, 4, clones.sum())
+    athletes["template_idx"] = template_idx
+    return athletes
+
+
+def build_genetics(athletes: pd.DataFrame) -> pd.DataFrame:
+    """Genetic profile rows for every athlete, copied from its template"""
+    template = pd.DataFrame([
+        {"template_id": athlete_id, "gene": gene, "rsid": rsid, "genotype": genotype, "interpretation": interpretation}
+        for athlete_id, genes in genetic_profiles.items()
+        for gene, (rsid, genotype, interpretation) in genes.items()
+    ])
+    ids = pd.DataFrame({"athlete_id": athletes["athlete_id"], "template_id": [athlete_data[i]["athlete_id"] for i in athletes["template_idx"]]})
+    genetics = ids.merge(template, on="template_id", how="inner", sort=False)
+    return genetics.drop(columns="template_id")[["athlete_id", "gene", "rsid", "genotype", "interpretation"]]
+
+
+def _event_mask(template_ids: np.ndarray, members, window, phase: np.ndarray) -> np.ndarray:
+    """(days, athletes) mask of an event for the given template athletes"""
+    first, last = window
+    return ((phase >= first) & (phase <= last))[:, None] & np.isin(template_ids, members)[None, :]
+
+
+def build_biometrics(athletes: pd.DataFrame, n_days: int, start_date: datetime, rng: np.random.Generator) -> pd.DataFrame:
+    """Daily biometrics for every athlete, ordered by date then athlete"""
+    n = len(athletes)
+    shape = (n_days, n)
+    template_idx = athletes["template_idx"].to_numpy()
+    template_ids = np.array([athlete_data[i]["athlete_id"] for i in template_idx], dtype=object)
+
+    base_table = np.array([[baselines[a["athlete_id"]][k] for k in BASELINE_KEYS] for a in athlete_data], dtype=np.float64)
+    base = base_table[template_idx]
+    clones = np.arange(n) >= len(athlete_data)
+    base[clones] *= 1 + CLONE_JITTER * rng.standard_normal((clones.sum(), len(BASELINE_KEYS)))
+    b = {key: base[:, i][None, :] for i, key in enumerate(BASELINE_KEYS)}
+
+    phase = (np.arange(n_days) % CYCLE_DAYS).astype(np.float64)
+    drift = phase[:, None]
+    is_travel = _event_mask(template_ids, TRAVEL_ATHLETES, TRAVEL_DAYS, phase)
+    is_illness = _event_mask(template_ids, ILLNESS_ATHLETES, ILLNESS_DAYS, phase)
+    is_overtrained = _event_mask(template_ids, OVERTRAINING_ATHLETES, OVERTRAINING_DAYS, phase) & ~is_illness
+    is_recovering = _event_mask(template_ids, RECOVERY_ATHLETES, RECOVERY_DAYS, phase) & ~is_illness & ~is_overtrained
+
+    noise = rng.normal(0, 1.5, shape)
+    rhr = b["rhr"] + noise + 8 * is_illness + 6 * is_overtrained
+    hrv = b["hrv"] - 0.5 * drift + noise * 2 - 15 * is_illness - 20 * is_overtrained + 10 * is_recovering
+    spo2 = b["spo2"] - 0.2 * drift + rng.normal(0, 0.5, shape) - 3 * is_illness
+    temp = b["temp"] + 0.05 * drift + rng.normal(0, 0.1, shape) + 0.6 * is_illness
+
+    deep = rng.normal(0, 2, shape) + b["deep"]
+    rem = rng.normal(0, 2, shape) + b["rem"]
+    light = 100 - deep - rem
+    duration = b["duration"] + rng.normal(0, 0.5, shape) - 1.5 * is_travel
+    deep = deep - 5 * is_travel
+    rr = b["rr"] + rng.normal(0, 1, shape) + 3 * is_illness
+    load = b["load"] + rng.normal(0, 5, shape) - 25 * is_overtrained
+    avg_hr = rhr + 15 + rng.normal(0, 2, shape)
+
+    # Sleep onset: circadian delay for long PER3 / CLOCK AA carriers later in the block
+    delayed_chrono = np.array([
+        genetic_profiles[a["athlete_id"]]["PER3"][1] == "long" or genetic_profiles[a["athlete_id"]]["CLOCK"][1] == "AA"
+        for a in athlete_data
+    ])[template_idx][None, :]
+    shifted = delayed_chrono & (phase[:, None] >= CIRCADIAN_SHIFT_DAY)
+    onset_hour = np.where(
+        shifted, rng.choice([23, 24, 25], shape),
+        np.where(delayed_chrono, rng.integers(21, 23, shape), rng.integers(21, 24, shape)),
+    )
+    onset_minute = rng.choice([30, 45, 15], shape)
+    wake_hour = onset_hour + duration.astype(np.int64)
+    wake_minute = rng.choice([0, 15, 30], shape)
+
+    def clip(values, low, high):
+        return np.clip(np.round(values, 1), low, high).ravel()
+
+    return pd.DataFrame({
+        "athlete_id": np.tile(athletes["athlete_id"].to_numpy(dtype=object), n_days),
+        "date": np.repeat(pd.date_range(start_date, periods=n_days, freq="D").to_numpy(), n),
+        "resting_hr": clip(rhr, 40, 100),
+        "avg_hr_day": np.round(avg_hr, 1).ravel(),
+        "hrv_night": clip(hrv, 50, 200),
+        "spo2_night": clip(spo2, 85, 100),
+        "deep_sleep_pct": clip(deep, 5, 40),
+        "rem_sleep_pct": clip(rem, 10, 35),
+        "light_sleep_pct": clip(light, 30, 70),
+        "sleep_duration_h": clip(duration, 4, 12),
+        "resp_rate_night": clip(rr, 8, 30),
+        "temp_trend_c": clip(temp, 35.0, 40.0),
+        "training_load_pct": clip(load, 0, 100),
+        "sleep_onset_time": CLOCK_LABELS[((onset_hour % 24) * 60 + onset_minute).ravel()],
+        "wake_time": CLOCK_LABELS[((wake_hour % 24) * 60 + wake_minute).ravel()],
+    })
+
+
+def generate_dataset(n_athletes: int = len(athlete_data), n_days: int = CYCLE_DAYS, seed: Optional[int] = 42,
+                     start_date: datetime = datetime(2025, 4, 1)) -> Dict[str, pd.DataFrame]:
+    """All five workbook sheets for a synthetic roster of n_athletes over n_days"""
+    if n_athletes < 1 or n_days < 1:
+        raise ValueError("n_athletes and n_days must be positive")
+    rng = np.random.default_rng(seed)
+    athletes = build_athletes(n_athletes, rng)
+    return {
+        "athlete_profiles": athletes.drop(columns="template_idx"),
+        "genetic_profiles": build_genetics(athletes),
+        "biometric_daily": build_biometrics(athletes, n_days, start_date, rng),
+        "sam_metrics_config": metrics_config.copy(),
+        "predictive_rules": rules_df.copy(),
+    }
+
+
+# -------------------------------
+# 5. SAM Metrics Config (from spec)
 # -------------------------------
 
 metrics_config = pd.DataFrame([
@@ -241,7 +271,7 @@ metrics_config = pd.DataFrame([
 ])
 
 # -------------------------------
-# 5. Predictive Rules (from spec)
+# 6. Predictive Rules (from spec)
 # -------------------------------
 
 rules_df = pd.DataFrame([
@@ -253,14 +283,39 @@ rules_df = pd.DataFrame([
 ])
 
 # -------------------------------
-# 6. Write to Excel
+# 7. Write Output
 # -------------------------------
 
-with pd.ExcelWriter("SAM_Recovery_Data_Template_Expanded.xlsx", engine="openpyxl") as writer:
-    athletes_df.to_excel(writer, sheet_name="athlete_profiles", index=False)
-    genetics_df.to_excel(writer, sheet_name="genetic_profiles", index=False)
-    biometrics_df.to_excel(writer, sheet_name="biometric_daily", index=False)
-    metrics_config.to_excel(writer, sheet_name="sam_metrics_config", index=False)
-    rules_df.to_excel(writer, sheet_name="predictive_rules", index=False)
-
-print("✅ Expanded Excel template created: SAM_Recovery_Data_Template_Expanded.xlsx")
\ No newline at end of file
+def write_dataset(frames: Dict[str, pd.DataFrame], output: str = DEFAULT_OUTPUT) -> str:
+    """Write an .xlsx workbook, or one Parquet file per sheet when output is a directory"""
+    if output.lower().endswith(".xlsx"):
+        too_big = [name for name, df in frames.items() if len(df) > EXCEL_MAX_ROWS]
+        if too_big:
+            raise ValueError(f"Sheets exceed Excel's row limit: {too_big}; write to a Parquet directory instead")
+        with pd.ExcelWriter(output, engine="openpyxl") as writer:
+            for name, df in frames.items():
+                df.to_excel(writer, sheet_name=name, index=False)
+    else:
+        os.makedirs(output, exist_ok=True)
+        for name, df in frames.items():
+            df.to_parquet(os.path.join(output, f"{name}.parquet"), index=False)
+    return output
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic SAM recovery workbook")
+    parser.add_argument("--athletes", type=int, default=len(athlete_data), help="number of athletes")
+    parser.add_argument("--days", type=int, default=CYCLE_DAYS, help="number of days per athlete")
+    parser.add_argument("--seed", type=int, default=42, help="random seed")
+    parser.add_argument("--start-date", default="2025-04-01", help="first date (YYYY-MM-DD)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help=".xlsx path or Parquet output directory")
+    args = parser.parse_args(argv)
+
+    frames = generate_dataset(args.athletes, args.days, args.seed, datetime.strptime(args.start_date, "%Y-%m-%d"))
+    write_dataset(frames, args.output)
+    print(f"✅ Expanded template created: {args.output} "
+          f"({args.athletes} athletes × {args.days} days, {len(frames['biometric_daily']):,} biometric rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# tests/test_baselines.py
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from sam_baselines import (BASELINE_METRICS, ROLLING_WINDOWS, SINCE_BASELINE, SINCE_BASELINE_MIN_DAYS, compute_baselines,
+                           z_column)
+
+
+def _random_pivot(seed: int) -> pd.DataFrame:
+    """Athlete-days with calendar gaps and missing values"""
+    rng = np.random.default_rng(seed)
+    parts = []
+    for i, n_days in enumerate((90, 60, 5, 120)):
+        dates = pd.date_range('2025-01-01', periods=n_days * 2)
+        dates = dates[np.sort(rng.choice(len(dates), n_days, replace=False))]
+        parts.append(pd.DataFrame(
+            rng.normal(60, 8, (n_days, len(BASELINE_METRICS))), columns=BASELINE_METRICS,
+            index=pd.MultiIndex.from_product([[f"a{i}"], dates], names=['athlete_id', 'date'])))
+    pivot = pd.concat(parts)
+    return pivot.mask(rng.random(pivot.shape) < 0.1)
+
+
+def _reference(pivot: pd.DataFrame, starts: pd.Series) -> pd.DataFrame:
+    """Per-athlete pandas rolling and expanding statistics over earlier days only"""
+    out = {}
+    for athlete_id, days in pivot.groupby(level='athlete_id'):
+        days = days.droplevel('athlete_id')
+        for metric in BASELINE_METRICS:
+            values = days[metric]
+            for window, (offset, min_periods) in ROLLING_WINDOWS.items():
+                rolling = values.rolling(offset, closed='left', min_periods=max(min_periods, 2))
+                z = (values - rolling.mean()) / rolling.std()
+                out.setdefault(z_column(metric, window), []).append(z)
+            start = starts.get(athlete_id, days.index.min())
+            since = values.where(values.index >= start)
+            expanding = since.expanding(min_periods=SINCE_BASELINE_MIN_DAYS)
+            z = (values - expanding.mean().shift(1)) / expanding.std().shift(1)
+            out.setdefault(z_column(metric, SINCE_BASELINE), []).append(z.where(values.index >= start))
+    frames = {col: pd.concat(parts).to_numpy() for col, parts in out.items()}
+    return pd.DataFrame(frames, index=pivot.index)
+
+
+class BaselineZScoreTest(unittest.TestCase):
+    """Windowed z-scores must match pandas rolling statistics per athlete"""
+
+    def test_matches_pandas_rolling(self):
+        pivot = _random_pivot(seed=2)
+        starts = pd.Series(pd.to_datetime(['2025-02-01', '2024-01-01']), index=['a0', 'a1'])
+        z = compute_baselines(pivot, starts)
+        expected = _reference(pivot, starts)[z.columns]
+        self.assertEqual(z.index.tolist(), pivot.index.tolist())
+        self.assertTrue((z.dtypes == np.float32).all())
+        np.testing.assert_allclose(z.to_numpy(np.float64), expected.to_numpy(), rtol=1e-4, atol=1e-5)
+        self.assertGreater(int(z.notna().sum().min()), 0)
+
+    def test_unsorted_pivot_is_scored_in_order(self):
+        pivot = _random_pivot(seed=3)
+        pd.testing.assert_frame_equal(compute_baselines(pivot.sample(frac=1.0, random_state=1)), compute_baselines(pivot))
+
+    def test_constant_window_and_short_history(self):
+        dates = pd.date_range('2025-01-01', periods=20)
+        pivot = pd.DataFrame({'hrv_night': [55.1] * 19 + [60.0]},
+                             index=pd.MultiIndex.from_product([['a'], dates], names=['athlete_id', 'date']))
+        z = compute_baselines(pivot)
+        self.assertEqual(list(z.columns), [z_column('hrv_night', w) for w in ('7d', '28d', SINCE_BASELINE)])
+        self.assertTrue(z.isna().all().all())  # no spread in any window, so no score
+        self.assertTrue(compute_baselines(pivot.iloc[:0]).empty)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+# tests/test_compact.py
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import templateGenerator
+from sam_compact import CompactBiometrics, memory_report
+from sam_data import preprocess_frames
+
+
+def _sorted(df: pd.DataFrame) -> pd.DataFrame:
+    out = df.sort_values(['athlete_id', 'date'], kind='stable').reset_index(drop=True)
+    out.attrs = dict(df.attrs)
+    return out
+
+
+class CompactRoundTripTest(unittest.TestCase):
+    """Expansion must restore the typed frame exactly, attrs included"""
+
+    @classmethod
+    def setUpClass(cls):
+        frames = preprocess_frames(templateGenerator.generate_dataset(12, 40, 3))
+        cls.biometrics = frames["biometric_daily"]
+
+    def test_generated_dataset(self):
+        shuffled = self.biometrics.sample(frac=1.0, random_state=5)
+        shuffled.attrs = dict(self.biometrics.attrs)
+        compact = CompactBiometrics(shuffled)
+        expected = _sorted(shuffled)
+        pd.testing.assert_frame_equal(compact.to_frame(), expected)
+        self.assertEqual(compact.to_frame().attrs, self.biometrics.attrs)
+        self.assertEqual(len(compact), len(expected))
+
+        pivot = expected.set_index(['athlete_id', 'date'])
+        for athlete_id in expected['athlete_id'].unique()[:3]:
+            with self.subTest(athlete_id=athlete_id):
+                pd.testing.assert_frame_equal(compact.athlete_frame(athlete_id), pivot.loc[athlete_id])
+        self.assertTrue(compact.athlete_frame('nobody').empty)
+
+    def test_encodings_fall_back_losslessly(self):
+        rng = np.random.default_rng(11)
+        df = pd.DataFrame({
+            'athlete_id': pd.array(['b', 'a', 'b', 'a'], dtype='str'),
+            'date': pd.to_datetime(['2025-04-01', '2025-04-01', '2025-04-02', '2025-04-02']),
+            'hrv_night': [61.5, np.nan, 70.25, 44.0],  # scaled int16
+            'steps': [12000.0, 4000.5, 90000.0, 0.0],  # too large for int16 at its scale: float32
+            'noise': rng.normal(size=4),  # not float32-exact: kept as is
+            'sleep_onset_time': pd.array([660, None, 700, 5], dtype='Int16'),
+            'note': pd.array(['ok', None, 'sore', 'ok'], dtype='str'),
+            'flag': [True, False, True, False],
+        })
+        df.attrs = {'source_rows': 4}
+        compact = CompactBiometrics(df)
+        kinds = {col: column[0] for col, column in compact._data.items()}
+        self.assertEqual(kinds, {'hrv_night': 'int16', 'steps': 'float32', 'noise': 'raw', 'sleep_onset_time': 'int16',
+                                 'note': 'category', 'flag': 'raw'})
+        pd.testing.assert_frame_equal(compact.to_frame(), _sorted(df))
+        self.assertEqual(compact.to_frame().attrs, {'source_rows': 4})
+
+    def test_intraday_timestamps_are_kept(self):
+        df = pd.DataFrame({
+            'athlete_id': pd.array(['a', 'a'], dtype='str'),
+            'date': pd.to_datetime(['2025-04-01 06:30', '2025-04-02 00:00']),
+            'hrv_night': [50.0, 52.0],
+        })
+        pd.testing.assert_frame_equal(CompactBiometrics(df).to_frame(), df)
+
+    def test_memory_report(self):
+        report = memory_report(self.biometrics)
+        self.assertEqual(report['athlete_days'], len(self.biometrics))
+        self.assertGreater(report['reduction'], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
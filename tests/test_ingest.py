@@ -0,0 +1,142 @@
+# tests/test_ingest.py
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+from sam_data import DataValidationError
+from sam_ingest import WearableIngester, map_fields, read_export
+
+
+class ReadExportTest(unittest.TestCase):
+    """Chunks of an export must end on record boundaries and resume from their offsets"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "export.csv")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def write(self, text: str, mode: str = 'w') -> None:
+        with open(self.path, mode, encoding='utf-8', newline='') as fh:
+            fh.write(text)
+
+    def test_quoted_line_breaks(self):
+        self.write('athlete,"day\nof record",notes,rmssd\n'
+                   'alex,2025-04-01,"felt\nfine",61\n'
+                   'alex,2025-04-02,"said ""tired""\nafter\nthe game",55\n'
+                   'jordan,2025-04-01,plain,70\n')
+        chunks = list(read_export(self.path, chunk_rows=1))
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(chunks[-1][1], os.path.getsize(self.path))
+        records = pd.concat([chunk for chunk, _ in chunks], ignore_index=True)
+        pd.testing.assert_frame_equal(records, pd.read_csv(self.path, dtype=str))
+
+    def test_open_quote_waits_for_the_rest_of_the_record(self):
+        self.write('athlete,day,notes,rmssd\nalex,2025-04-01,plain,61\nalex,2025-04-02,"still\n')
+        chunks = list(read_export(self.path))
+        self.assertEqual(len(chunks), 1)
+        offset = chunks[-1][1]
+        self.assertEqual(chunks[0][0]['rmssd'].tolist(), ['61'])
+
+        self.write('typing",55\n', mode='a')
+        chunks = list(read_export(self.path, offset))
+        self.assertEqual(chunks[0][0]['notes'].tolist(), ['still\ntyping'])
+        self.assertEqual(chunks[0][0]['rmssd'].tolist(), ['55'])
+
+
+class MapFieldsTest(unittest.TestCase):
+    """Export fields map onto biometric_daily columns, repeated athlete-days keeping their last record"""
+
+    def test_aliases_units_and_repeats(self):
+        raw = pd.DataFrame({
+            'User ID': ['alex', 'alex', ' jordan ', None, 'alex'],
+            'bedtime_start': ['2025-04-01T23:40:00+02:00', '2025-04-02T00:15:00', '2025-04-01T22:00:00', '2025-04-01', 'x'],
+            'sleep.rmssd': ['61', '58', 'n/a', '70', '1'],
+            'total_sleep_duration': [27000, 28800, 25200, 0, 0],
+            'summary_date': ['2025-04-01', '2025-04-01', '2025-04-01', '2025-04-01', 'not a day'],
+        })
+        mapped = map_fields(raw)
+        self.assertEqual(mapped['athlete_id'].tolist(), ['alex', 'jordan'])
+        self.assertEqual(mapped['date'].tolist(), [pd.Timestamp('2025-04-01')] * 2)
+        self.assertEqual(mapped['hrv_night'].tolist()[0], 58)  # the later of alex's two records
+        self.assertTrue(pd.isna(mapped['hrv_night'].tolist()[1]))
+        self.assertEqual(mapped['sleep_duration_h'].tolist(), [8.0, 7.0])
+
+    def test_missing_key_fields(self):
+        with self.assertRaises(DataValidationError):
+            map_fields(pd.DataFrame({'day': ['2025-04-01'], 'rmssd': [61]}))
+
+
+class WearableIngesterTest(unittest.TestCase):
+    """Parts are committed in ingestion order, so the last record of an athlete-day is read last"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.drop = os.path.join(self.tmp, "drop")
+        self.out = os.path.join(self.tmp, "ingested")
+        os.makedirs(self.drop)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def write_export(self, name: str, lines, mode: str = 'w', header: bool = True) -> str:
+        path = os.path.join(self.drop, name)
+        with open(path, mode, encoding='utf-8') as fh:
+            fh.write(("athlete,day,rmssd\n" if header else "") + "".join(line + "\n" for line in lines))
+        return path
+
+    def latest(self, ingester: WearableIngester) -> dict:
+        rows = ingester.read_parts().drop_duplicates(['athlete_id', 'date'], keep='last')
+        return {(a, str(d.date())): v for a, d, v in zip(rows['athlete_id'], rows['date'], rows['hrv_night'])}
+
+    def test_last_record_wins_within_and_across_chunks(self):
+        self.write_export("a.csv", ["alex,2025-04-01,21", "alex,2025-04-01,22", "alex,2025-04-02,30", "alex,2025-04-01,23"])
+        ingester = WearableIngester(self.drop, self.out, chunk_rows=2)
+        self.assertEqual(ingester.poll(), 2)
+        self.assertEqual(len(ingester.read_parts(0, 1)), 1)  # the chunk's own repeat collapsed to its last record
+        self.assertEqual(self.latest(ingester), {('alex', '2025-04-01'): 23, ('alex', '2025-04-02'): 30})
+
+    def test_last_record_wins_across_exports_and_polls(self):
+        self.write_export("b.csv", ["alex,2025-04-01,40"])
+        self.write_export("a.csv", ["alex,2025-04-01,21", "jordan,2025-04-01,50"])
+        ingester = WearableIngester(self.drop, self.out)
+        ingester.poll()
+        self.assertEqual(self.latest(ingester)[('alex', '2025-04-01')], 40)  # exports are read in name order
+
+        self.write_export("a.csv", ["jordan,2025-04-01,55"], mode='a', header=False)
+        self.assertEqual(ingester.poll(), 3)  # only the appended record is read again
+        self.assertEqual(len(ingester.read_parts(2)), 1)
+        self.assertEqual(self.latest(ingester)[('jordan', '2025-04-01')], 55)
+        self.assertEqual(ingester.poll(), 3)
+
+        resumed = WearableIngester(self.drop, self.out)  # checkpoint survives a restart
+        self.assertEqual(resumed.poll(), 3)
+
+        os.replace(self.write_export("new.tmp", ["alex,2025-04-01,45"]), os.path.join(self.drop, "b.csv"))
+        self.assertEqual(resumed.poll(), 4)  # a replaced export is read from the start
+        self.assertEqual(self.latest(resumed)[('alex', '2025-04-01')], 45)
+
+        self.write_export("b.csv", ["alex,2025-04-01,4"])  # truncated in place
+        self.assertEqual(resumed.poll(), 5)
+        self.assertEqual(self.latest(resumed)[('alex', '2025-04-01')], 4)
+
+    def test_errors_are_kept_until_the_export_reads(self):
+        bad = self.write_export("a.jsonl", ['{"day": "2025-04-01", "rmssd": 50}'], header=False)  # no athlete field
+        self.write_export("b.csv", ["alex,2025-04-01,21"])
+        ingester = WearableIngester(self.drop, self.out)
+        self.assertEqual(ingester.poll(), 1)
+        self.assertEqual(list(ingester.errors), [bad])
+        self.assertIsInstance(ingester.errors[bad], DataValidationError)
+
+        self.write_export("a.jsonl", ['{"user_id": "jordan", "day": "2025-04-01", "rmssd": 50}'], header=False)
+        self.assertEqual(ingester.poll(), 2)
+        self.assertEqual(ingester.errors, {})
+        self.assertEqual(self.latest(ingester)[('jordan', '2025-04-01')], 50)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+# tests/test_load.py
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from sam_load import (ACUTE_SPAN, CHRONIC_MIN_DAYS, CHRONIC_SPAN, LOAD_COLUMNS, LOAD_METRIC, MONOTONY_DAYS,
+                      compute_load_metrics)
+
+
+def _pivot(loads: dict) -> pd.DataFrame:
+    """Sorted athlete × date pivot from {athlete_id: Series of load by date}"""
+    pivot = pd.concat({athlete_id: series.rename(LOAD_METRIC).to_frame() for athlete_id, series in loads.items()},
+                      names=['athlete_id', 'date'])
+    return pivot.sort_index()
+
+
+def _reference(pivot: pd.DataFrame) -> pd.DataFrame:
+    """Per-athlete pandas EWMAs and rolling week on an asfreq('D') calendar"""
+    parts = []
+    for athlete_id, days in pivot[LOAD_METRIC].groupby(level='athlete_id'):
+        days = days.droplevel('athlete_id')
+        daily = days.asfreq('D')
+        acute = daily.ewm(span=ACUTE_SPAN, adjust=False).mean()
+        chronic = daily.ewm(span=CHRONIC_SPAN, adjust=False, min_periods=CHRONIC_MIN_DAYS).mean()
+        week = daily.rolling(MONOTONY_DAYS, min_periods=MONOTONY_DAYS)
+        monotony = (week.mean() / week.std()).where(week.std() > 0)
+        out = pd.DataFrame({
+            'load_acute': acute,
+            'load_chronic': chronic,
+            'acwr': (acute / chronic).where(chronic > 0),
+            'load_monotony': monotony,
+            'load_strain': week.mean() * MONOTONY_DAYS * monotony,
+        }).loc[days.index]
+        parts.append(pd.concat({athlete_id: out}, names=['athlete_id', 'date']))
+    return pd.concat(parts)
+
+
+class LoadMetricsTest(unittest.TestCase):
+    """Missing calendar days decay the EWMAs and break the monotony week"""
+
+    def test_matches_calendar_reference(self):
+        rng = np.random.default_rng(6)
+        loads = {}
+        for athlete_id, n_days in (('alex', 120), ('blake', 40), ('casey', 3)):
+            dates = pd.date_range('2025-01-01', periods=n_days)
+            keep = np.sort(rng.choice(n_days, max(int(n_days * 0.7), 2), replace=False))
+            series = pd.Series(rng.uniform(20, 120, len(keep)), index=dates[keep])
+            loads[athlete_id] = series.mask(rng.random(len(series)) < 0.05)
+        pivot = _pivot(loads)
+        metrics = compute_load_metrics(pivot)
+        self.assertEqual(list(metrics.columns), LOAD_COLUMNS)
+        self.assertTrue(metrics.index.equals(pivot.index))
+        pd.testing.assert_frame_equal(metrics, _reference(pivot), check_index_type=False, rtol=1e-12)
+
+    def test_gap_decays_and_breaks_the_week(self):
+        dates = pd.date_range('2025-03-01', periods=20).delete([12, 13])
+        pivot = _pivot({'alex': pd.Series(np.linspace(40, 80, len(dates)), index=dates)})
+        metrics = compute_load_metrics(pivot).loc['alex']
+        alpha = 2 / (ACUTE_SPAN + 1)
+        before, after = metrics['load_acute'].loc['2025-03-12'], metrics['load_acute'].loc['2025-03-15']
+        # Two missing days weigh only the day after the gap against the pre-gap EWMA, decayed as if three days passed
+        load = pivot.loc[('alex', pd.Timestamp('2025-03-15')), LOAD_METRIC]
+        expected = (before * (1 - alpha) ** 3 + alpha * load) / ((1 - alpha) ** 3 + alpha)
+        self.assertAlmostEqual(after, expected)
+        weekly = metrics['load_monotony']
+        self.assertTrue(weekly.loc['2025-03-07':'2025-03-12'].notna().all())
+        self.assertTrue(weekly.loc['2025-03-15':'2025-03-20'].isna().all())  # each of these weeks spans the gap
+
+    def test_acwr_needs_chronic_history(self):
+        dates = pd.date_range('2025-03-01', periods=10)
+        pivot = _pivot({'alex': pd.Series(60.0, index=dates)})
+        metrics = compute_load_metrics(pivot).loc['alex']
+        self.assertTrue(metrics['acwr'].iloc[:CHRONIC_MIN_DAYS - 1].isna().all())
+        np.testing.assert_allclose(metrics['acwr'].iloc[CHRONIC_MIN_DAYS - 1:], 1.0)
+        self.assertTrue(metrics['load_monotony'].isna().all())  # a perfectly flat week has no monotony
+
+    def test_without_load_column(self):
+        index = pd.MultiIndex.from_tuples([('alex', pd.Timestamp('2025-03-01'))], names=['athlete_id', 'date'])
+        metrics = compute_load_metrics(pd.DataFrame({'hrv_night': [50.0]}, index=index))
+        self.assertEqual(list(metrics.columns), LOAD_COLUMNS)
+        self.assertTrue(metrics.isna().all().all())
+
+
+if __name__ == "__main__":
+    unittest.main()
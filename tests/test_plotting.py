@@ -0,0 +1,112 @@
+# tests/test_plotting.py
+import math
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from sam_plotting import aggregate_periods, downsample_series, lttb_indices
+
+
+def _reference_lttb(x: list, y: list, threshold: int) -> list:
+    """Point-by-point Largest-Triangle-Three-Buckets as originally published"""
+    n = len(x)
+    every = (n - 2) / (threshold - 2)
+    kept, a = [0], 0
+    for i in range(threshold - 2):
+        avg_start, avg_end = math.floor((i + 1) * every) + 1, min(math.floor((i + 2) * every) + 1, n)
+        avg_x = sum(x[avg_start:avg_end]) / (avg_end - avg_start)
+        avg_y = sum(y[avg_start:avg_end]) / (avg_end - avg_start)
+        best, best_area = None, -1.0
+        for j in range(math.floor(i * every) + 1, math.floor((i + 1) * every) + 1):
+            area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        kept.append(best)
+        a = best
+    kept.append(n - 1)
+    return kept
+
+
+class DownsampleTest(unittest.TestCase):
+    """LTTB keeps the endpoints and returns exactly the requested number of points"""
+
+    def setUp(self):
+        rng = np.random.default_rng(4)
+        index = pd.date_range('2020-01-01', periods=3000, freq='D')
+        self.series = pd.Series(np.cumsum(rng.normal(size=len(index))), index=index)
+
+    def test_matches_reference(self):
+        x = np.arange(500, dtype=np.float64) ** 1.1
+        y = np.sin(x / 7) + np.random.default_rng(1).normal(scale=0.2, size=len(x))
+        for threshold in (3, 4, 17, 100, 499):
+            with self.subTest(threshold=threshold):
+                self.assertEqual(lttb_indices(x, y, threshold).tolist(), _reference_lttb(x.tolist(), y.tolist(), threshold))
+
+    def test_endpoints_and_length(self):
+        for max_points in (3, 10, 800, 2999):
+            with self.subTest(max_points=max_points):
+                out = downsample_series(self.series, max_points)
+                self.assertEqual(len(out), max_points)
+                self.assertEqual(out.index[0], self.series.index[0])
+                self.assertEqual(out.index[-1], self.series.index[-1])
+                self.assertTrue(out.index.is_monotonic_increasing and out.index.is_unique)
+                pd.testing.assert_series_equal(out, self.series.loc[out.index])
+
+    def test_short_series_unchanged(self):
+        short = self.series.iloc[:50].copy()
+        short.iloc[3] = np.nan
+        self.assertIs(downsample_series(short, 50), short)
+        self.assertIs(downsample_series(self.series, len(self.series)), self.series)
+
+    def test_missing_values_dropped_before_downsampling(self):
+        gappy = self.series.copy()
+        gappy.iloc[::2] = np.nan
+        out = downsample_series(gappy, 800)
+        self.assertEqual(len(out), 800)
+        self.assertFalse(out.isna().any())
+        self.assertEqual(out.index[-1], gappy.dropna().index[-1])
+        self.assertEqual(len(downsample_series(gappy, 1600)), 1500)  # few enough once gaps are dropped
+
+
+class AggregatePeriodsTest(unittest.TestCase):
+    """Bars fall back to the finest period that fits, with per-period means"""
+
+    def test_short_history_stays_daily(self):
+        df = pd.DataFrame({'deep': np.arange(30.0)}, index=pd.date_range('2025-01-01', periods=30))
+        out, label = aggregate_periods(df, ['deep'], max_bars=30)
+        self.assertEqual(label, 'Daily')
+        pd.testing.assert_frame_equal(out, df)
+
+    def test_coarsens_to_fit(self):
+        index = pd.date_range('2024-01-01', '2025-12-31')
+        df = pd.DataFrame({'deep': np.arange(len(index), dtype=float), 'rem': 1.0}, index=index)
+        df.loc['2024-03', 'rem'] = np.nan
+        cases = [(120, 'Weekly'), (24, 'Monthly'), (8, 'Quarterly'), (2, 'Yearly')]
+        for max_bars, label in cases:
+            with self.subTest(max_bars=max_bars):
+                out, got = aggregate_periods(df, ['deep', 'rem'], max_bars=max_bars)
+                self.assertEqual(got, label)
+                self.assertLessEqual(len(out), max_bars)
+        monthly, _ = aggregate_periods(df, ['deep', 'rem'], max_bars=24)
+        self.assertEqual(monthly.index[0], pd.Timestamp('2024-01-01'))
+        self.assertEqual(monthly.loc['2024-02-01', 'deep'], df.loc['2024-02', 'deep'].mean())
+        self.assertTrue(np.isnan(monthly.loc['2024-03-01', 'rem']))
+
+    def test_weeks_start_on_monday(self):
+        df = pd.DataFrame({'deep': 1.0}, index=pd.date_range('2025-01-01', periods=200))  # a Wednesday
+        weekly, label = aggregate_periods(df, ['deep'], max_bars=50)
+        self.assertEqual(label, 'Weekly')
+        self.assertEqual(weekly.index[0], pd.Timestamp('2024-12-30'))
+        self.assertTrue((weekly.index.dayofweek == 0).all())
+
+    def test_empty_periods_dropped(self):
+        index = pd.date_range('2024-01-01', periods=60).append(pd.date_range('2025-01-01', periods=60))
+        df = pd.DataFrame({'deep': 1.0}, index=index)
+        weekly, _ = aggregate_periods(df, ['deep'], max_bars=30)
+        self.assertFalse(weekly['deep'].isna().any())
+        self.assertLessEqual(len(weekly), 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+# tests/test_rules.py
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import templateGenerator
+from sam_data import preprocess_frames
+from sam_genetics import GenotypeStore
+from sam_rules import DEFAULT_RULES, LATE_SLEEP_MINUTES, METRIC_DEFAULTS, RuleEngine, compute_conditions
+
+# The per-row rules the dashboard used before the engine (no baselines or training load)
+LEGACY_RULES = DEFAULT_RULES[DEFAULT_RULES['rule_id'] != 'overtraining']
+
+
+def _value(row: pd.Series, name: str):
+    value = row.get(name, np.nan)
+    return METRIC_DEFAULTS.get(name, np.nan) if pd.isna(value) else value
+
+
+def _legacy_alert(days: pd.DataFrame) -> str:
+    """The original generate_alert on an athlete's history up to one day
+
+    Sleep onsets compare in minutes since noon, so onsets past midnight count as
+    late; the original compared clock times and missed them.
+    """
+    latest = days.iloc[-1]
+    hrv, rhr = _value(latest, 'hrv_night'), _value(latest, 'resting_hr')
+    if len(days) >= 2:
+        prev = days.iloc[-2]
+        prev_hrv, prev_rhr = _value(prev, 'hrv_night'), _value(prev, 'resting_hr')
+        hrv_drop = (prev_hrv - hrv) / prev_hrv > 0.15 if prev_hrv > 0 else False
+        rhr_rise = (rhr - prev_rhr) / prev_rhr > 0.05 if prev_rhr > 0 else False
+    else:
+        hrv_drop, rhr_rise = hrv < 40, rhr > 70
+    temp_high = _value(latest, 'temp_trend_c') >= 37.0
+    spo2_low = _value(latest, 'spo2_night') <= 94
+    deep_low = _value(latest, 'deep_sleep_pct') < 17
+    rem_low = _value(latest, 'rem_sleep_pct') < 16
+    resp_high = _value(latest, 'resp_rate_night') >= 17
+    sleep_late = _value(latest, 'sleep_onset_time') > LATE_SLEEP_MINUTES
+    if hrv_drop and rhr_rise and temp_high and spo2_low:
+        return 'inflammation'
+    if hrv_drop and deep_low and sleep_late:
+        return 'circadian'
+    if hrv_drop and rem_low and not temp_high:
+        return 'nutrition'
+    if spo2_low and resp_high:
+        return 'airway'
+    return 'green'
+
+
+def _random_days(n_athletes: int, n_days: int, seed: int) -> pd.DataFrame:
+    """Values spread across the rule thresholds, with gaps"""
+    rng = np.random.default_rng(seed)
+    n = n_athletes * n_days
+    index = pd.MultiIndex.from_product(
+        [[f"a{i:02d}" for i in range(n_athletes)], pd.date_range('2025-01-01', periods=n_days)], names=['athlete_id', 'date'])
+    df = pd.DataFrame({
+        'hrv_night': rng.uniform(20, 90, n),
+        'resting_hr': rng.uniform(45, 80, n),
+        'temp_trend_c': rng.uniform(36.2, 37.6, n),
+        'spo2_night': rng.uniform(90, 99, n),
+        'deep_sleep_pct': rng.uniform(10, 25, n),
+        'rem_sleep_pct': rng.uniform(10, 25, n),
+        'resp_rate_night': rng.uniform(12, 20, n),
+        'sleep_onset_time': rng.uniform(9 * 60, 14 * 60, n),  # 21:00 to 02:00
+    }, index=index)
+    return df.mask(rng.random(df.shape) < 0.05)
+
+
+class LegacyParityTest(unittest.TestCase):
+    """Without baselines or loads the engine must reproduce the per-row rules on every day"""
+
+    def assert_matches_legacy(self, pivot: pd.DataFrame) -> None:
+        engine = RuleEngine(LEGACY_RULES)
+        alerts = engine.evaluate(pivot)['alert_type']
+        expected = [
+            _legacy_alert(days.iloc[:i + 1])
+            for _, days in pivot.groupby(level='athlete_id', sort=True)
+            for i in range(len(days))
+        ]
+        self.assertEqual(alerts.tolist(), expected)
+        return alerts
+
+    def test_random_days(self):
+        alerts = self.assert_matches_legacy(_random_days(12, 40, seed=3))
+        self.assertEqual(set(alerts), {'inflammation', 'circadian', 'nutrition', 'airway', 'green'})
+
+    def test_generated_dataset(self):
+        frames = preprocess_frames(templateGenerator.generate_dataset(20, 45, 3))
+        pivot = frames["biometric_daily"].set_index(['athlete_id', 'date']).sort_index()
+        self.assert_matches_legacy(pivot.drop(columns='training_load_pct'))
+
+
+class RuleEngineTest(unittest.TestCase):
+    """Rule compilation, precedence and genetic context"""
+
+    def test_unknown_terms_never_fire(self):
+        engine = RuleEngine(pd.DataFrame([
+            {'rule_id': 'airway_stress', 'metric_drop': 'SpO₂↓ + snoring↑', 'genetic_condition': 'Any'},
+        ]))
+        self.assertEqual([rule.rule_id for rule in engine.skipped], ['airway_stress'])
+        days = pd.DataFrame({'spo2_night': [90.0], 'resp_rate_night': [20.0]},
+                            index=pd.DatetimeIndex(['2025-01-01'], name='date'))
+        result = engine.evaluate(days, athlete_id='alex')
+        self.assertEqual(result['alert_type'].tolist(), ['green'])
+        self.assertTrue(pd.api.types.is_string_dtype(result['rule_id']) and result['rule_id'].isna().all())
+
+    def test_precedence_and_genetic_match(self):
+        engine = RuleEngine(LEGACY_RULES)
+        days = pd.DataFrame({
+            'hrv_night': [80.0, 40.0], 'resting_hr': [50.0, 60.0], 'temp_trend_c': [36.5, 37.2],
+            'spo2_night': [97.0, 93.0], 'resp_rate_night': [14.0, 18.0],
+        }, index=pd.DatetimeIndex(['2025-01-01', '2025-01-02'], name='date'))
+        self.assertTrue(engine.fired(days).iloc[-1][['inflammation', 'airway_stress']].all())
+        genotypes = GenotypeStore(pd.DataFrame([{'athlete_id': 'alex', 'gene': 'NOS3', 'rsid': 'rs1', 'genotype': 'TT'}]))
+        result = engine.evaluate(days, genotypes, 'alex').iloc[-1]
+        self.assertEqual((result['rule_id'], result['alert_type']), ('inflammation', 'inflammation'))
+        self.assertTrue(result['genetic_match'])  # 'Any' genotype
+
+    def test_conditions_follow_each_athlete(self):
+        pivot = _random_days(3, 5, seed=1)
+        conditions = compute_conditions(pivot)
+        first_days = pivot.index.get_level_values('date') == pivot.index.get_level_values('date').min()
+        # An athlete's first day is judged on absolute thresholds, never against another athlete's last day
+        expected = pivot['hrv_night'].fillna(METRIC_DEFAULTS['hrv_night'])[first_days] < 40
+        self.assertEqual(conditions.loc[first_days, 'hrv_drop'].tolist(), expected.tolist())
+
+
+if __name__ == "__main__":
+    unittest.main()
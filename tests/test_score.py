@@ -0,0 +1,75 @@
+# tests/test_score.py
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+import templateGenerator
+from sam_data import preprocess_frames
+from sam_parallel import SharedBiometrics, athlete_chunks, read_athletes
+from sam_score import main, score_parallel, score_roster
+
+TEMPLATE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "SAM_Recovery_Data_Template.xlsx")
+
+
+class ParallelScoringTest(unittest.TestCase):
+    """Roster partitions scored in worker processes must equal one in-process pass"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.frames = preprocess_frames(templateGenerator.generate_dataset(24, 40, 3))
+
+    def test_matches_serial(self):
+        for as_of in (None, pd.Timestamp('2025-04-20')):
+            with self.subTest(as_of=as_of):
+                serial = score_roster(self.frames, as_of)
+                parallel = score_parallel(self.frames, 2, as_of)
+                self.assertEqual(len(serial), 24)
+                pd.testing.assert_frame_equal(parallel, serial.reset_index(drop=True))
+
+    def test_shared_block_round_trip(self):
+        biometrics = self.frames["biometric_daily"].sample(frac=1.0, random_state=2)
+        expected = biometrics.sort_values(['athlete_id', 'date'], kind='stable').reset_index(drop=True)
+        with SharedBiometrics(biometrics) as shared:
+            chunks = athlete_chunks(len(shared.spec.athletes), 5)
+            self.assertEqual([first for first, _ in chunks[1:]], [last for _, last in chunks[:-1]])
+            self.assertEqual((chunks[0][0], chunks[-1][1]), (0, 24))
+            parts = [read_athletes(shared.spec, first, last) for first, last in chunks]
+        pd.testing.assert_frame_equal(pd.concat(parts, ignore_index=True), expected)
+
+    def test_more_chunks_than_athletes(self):
+        self.assertEqual(athlete_chunks(3, 8), [(0, 1), (1, 2), (2, 3)])
+        self.assertEqual(athlete_chunks(0, 4), [])
+
+
+class ScoreCommandTest(unittest.TestCase):
+    """Command-line entry point"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_rejects_malformed_as_of(self):
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr), self.assertRaises(SystemExit) as exit_:
+            main([TEMPLATE, '--as-of', '2025-13-01'])
+        self.assertEqual(exit_.exception.code, 2)
+        self.assertIn('expected a YYYY-MM-DD date', stderr.getvalue())
+
+    def test_writes_scores(self):
+        output = os.path.join(self.tmp, "scores.csv")
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(main([TEMPLATE, '-o', output, '--no-snapshot', '--workers', '1']), 0)
+        scores = pd.read_csv(output)
+        self.assertEqual(list(scores.columns[:3]), ['athlete_id', 'name', 'team'])
+        self.assertTrue(scores['athlete_id'].is_unique)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+# tests/test_sql.py
+import gc
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+from sam_data import read_workbook
+from sam_sql import SqlStore
+
+TEMPLATE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "SAM_Recovery_Data_Template.xlsx")
+
+
+class TableGenerationTest(unittest.TestCase):
+    """A replaced biometric table must stay readable for as long as a view of it is alive"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.frames = read_workbook(TEMPLATE)
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.store = SqlStore(os.path.join(self.tmp, "sam.sqlite"))
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def tables(self):
+        rows = self.store._execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        return {name for (name,) in rows if name.startswith('biometric_daily_')}
+
+    def test_pinned_generations_survive_rewrites(self):
+        biometrics = self.frames["biometric_daily"]
+        pinned = self.store.write_frames(self.frames)
+        expected = pinned.to_frame()
+        view = pinned
+        for _ in range(3):
+            view = view.rewrite(biometrics.iloc[:-1], dict(view.attrs))
+        gc.collect()
+        self.store.drop_unused_generations()
+        # Three generations later the first view (e.g. a session's snapshot) still reads its rows
+        pd.testing.assert_frame_equal(pinned.to_frame(), expected)
+        self.assertEqual(self.tables(), {pinned.table, view.table})
+
+        table = pinned.table
+        del pinned
+        gc.collect()
+        self.assertEqual(self.store.drop_unused_generations(), [table])
+        self.assertEqual(self.tables(), {view.table})
+        self.assertEqual(len(view.to_frame()), len(biometrics) - 1)
+
+    def test_released_generations_are_dropped_on_the_next_write(self):
+        biometrics = self.frames["biometric_daily"]
+        view = self.store.write_frames(self.frames)
+        first = view.table
+        view = view.rewrite(biometrics.iloc[:-1], dict(view.attrs))
+        self.assertIn(first, self.tables())  # still pinned while the rewrite ran
+        gc.collect()
+        view = view.append(biometrics.iloc[-1:], dict(view.attrs))
+        self.assertEqual(self.tables(), {view.table})
+        self.assertEqual(len(view.to_frame()), len(biometrics))
+
+
+if __name__ == "__main__":
+    unittest.main()
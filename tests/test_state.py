@@ -0,0 +1,189 @@
+# tests/test_state.py
+import os
+import shutil
+import tempfile
+import unittest
+
+import openpyxl
+import pandas as pd
+
+from sam_state import WorkbookState
+from sam_telemetry import TELEMETRY
+from sam_watch import SourceWatcher
+
+TEMPLATE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "SAM_Recovery_Data_Template.xlsx")
+SQL_BACKENDS = (None, 'sqlite')
+
+
+def _plain(df: pd.DataFrame) -> pd.DataFrame:
+    """Object values with None for every missing marker, so None/NaN/NA compare equal"""
+    return df.astype(object).where(df.notna(), None)
+
+
+def _history(state: WorkbookState) -> pd.DataFrame:
+    history = state.biometrics.alerts_history.drop(columns='input_hash', errors='ignore')
+    return _plain(history.sort_values(['athlete_id', 'date'], ignore_index=True))
+
+
+class StateTestCase(unittest.TestCase):
+    """Temporary workbook copies, compared against cold loads in fresh snapshot folders"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def fresh_copy(self) -> None:
+        self.tmp = tempfile.mkdtemp(dir=self.root)
+        self.path = os.path.join(self.tmp, "workbook.xlsx")
+        shutil.copy(TEMPLATE, self.path)
+
+    def edit_sheet(self, edit) -> None:
+        workbook = openpyxl.load_workbook(self.path)
+        sheet = workbook["biometric_daily"]
+        edit(sheet, [cell.value for cell in sheet[1]])
+        workbook.save(self.path)
+
+    def assert_matches_cold_load(self, state: WorkbookState, sql_backend, **options) -> None:
+        cold = WorkbookState(self.path, snapshot_dir=tempfile.mkdtemp(dir=self.tmp), sql_backend=sql_backend, **options)
+        cold.refresh()
+        pd.testing.assert_frame_equal(state.biometrics.pivot, cold.biometrics.pivot)
+        pd.testing.assert_frame_equal(state.biometrics.latest, cold.biometrics.latest)
+        pd.testing.assert_frame_equal(state.biometrics.derived, cold.biometrics.derived)
+        pd.testing.assert_frame_equal(_history(state), _history(cold))
+        pd.testing.assert_frame_equal(_plain(state.team), _plain(cold.team))
+
+
+
+class IncrementalRefreshTest(StateTestCase):
+    """An incrementally refreshed state must equal a cold load of the same workbook"""
+
+    def run_scenario(self, edit, expect_affected=None, incremental=True) -> None:
+        for sql_backend in SQL_BACKENDS:
+            with self.subTest(sql_backend=sql_backend):
+                self.fresh_copy()
+                snapshot_dir = os.path.join(self.tmp, "snapshot")
+                state = WorkbookState(self.path, snapshot_dir=snapshot_dir, sql_backend=sql_backend)
+                state.refresh()
+                published = state.snapshot
+                published_attrs = dict(published.biometrics.attrs)
+                self.edit_sheet(edit)
+                full_loads = TELEMETRY.counters().get('refresh.full', 0)
+                affected = state.refresh()
+                # Appends are read incrementally; edits of consumed rows fall back to a full reload
+                self.assertEqual(TELEMETRY.counters().get('refresh.full', 0) == full_loads, incremental)
+                self.assertEqual(published.biometrics.attrs, published_attrs)
+                if expect_affected is not None:
+                    self.assertIn(expect_affected, affected)
+                self.assert_matches_cold_load(state, sql_backend)
+                # A cold start reusing the same snapshot folder must not serve stale results either
+                restarted = WorkbookState(self.path, snapshot_dir=snapshot_dir, sql_backend=sql_backend)
+                restarted.refresh()
+                self.assert_matches_cold_load(restarted, sql_backend)
+
+    def test_appended_days(self):
+        def append(sheet, header):
+            last = [cell.value for cell in sheet[sheet.max_row]]
+            for athlete_id in ('alex', 'newbie'):
+                row = list(last)
+                row[header.index('athlete_id')] = athlete_id
+                row[header.index('date')] = pd.Timestamp('2025-05-01').to_pydatetime()
+                sheet.append(row)
+        self.run_scenario(append, 'newbie')
+
+    def test_edited_value(self):
+        def edit(sheet, header):
+            athletes = [row[header.index('athlete_id')] for row in sheet.iter_rows(min_row=2, values_only=True)]
+            row = max(i for i, aid in enumerate(athletes, start=2) if aid == 'alex')
+            sheet.cell(row, header.index('hrv_night') + 1).value = 20
+        self.run_scenario(edit, 'alex', incremental=False)
+
+    def test_repeated_identical_day(self):
+        def repeat(sheet, header):
+            sheet.append([cell.value for cell in sheet[2]])
+        self.run_scenario(repeat)
+
+    def test_reappended_day_replaces_existing(self):
+        def reappend(sheet, header):
+            row = [cell.value for cell in sheet[2]]
+            row[header.index('hrv_night')] = 20
+            sheet.append(row)
+        self.run_scenario(reappend)
+
+
+class WatcherTest(StateTestCase):
+    """A watcher tick after an in-place edit must publish the edited data, never the previous snapshot"""
+
+    def watch_edit(self, edit, sheet_name="biometric_daily"):
+        for sql_backend in SQL_BACKENDS:
+            with self.subTest(sql_backend=sql_backend):
+                self.fresh_copy()
+                state = WorkbookState(self.path, snapshot_dir=os.path.join(self.tmp, "snapshot"), sql_backend=sql_backend)
+                state.refresh()
+                before = state.snapshot
+                workbook = openpyxl.load_workbook(self.path)
+                edit(workbook[sheet_name])
+                workbook.save(self.path)
+                affected = SourceWatcher(state).check()
+                self.assertNotEqual(state.snapshot.sha256, before.sha256)
+                self.assert_matches_cold_load(state, sql_backend)
+                yield state, before, affected
+
+    def test_in_place_edit(self):
+        def edit(sheet):
+            sheet.cell(sheet.max_row, 3).value = 20
+        for state, before, affected in self.watch_edit(edit):
+            self.assertTrue(affected)
+            self.assertIsNot(state.biometrics, before.biometrics)
+
+    def test_edit_outside_read_data(self):
+        def edit(sheet):
+            sheet.parent.create_sheet("notes")["A1"] = "not read by the dashboard"
+        for state, before, affected in self.watch_edit(edit):
+            self.assertEqual(affected, [])
+            self.assertIs(state.biometrics, before.biometrics)
+
+
+class IngestOrderTest(StateTestCase):
+    """Ingested records replace earlier records of the same athlete-day, and the workbook's"""
+
+    def write_export(self, name: str, lines) -> None:
+        with open(os.path.join(self.drop, name), 'w', encoding='utf-8') as fh:
+            fh.write("athlete,day,rmssd\n" + "".join(line + "\n" for line in lines))
+
+    def hrv(self, state: WorkbookState, day: str) -> float:
+        return state.biometrics.pivot.loc[('alex', pd.Timestamp(day)), 'hrv_night']
+
+    def test_last_record_wins(self):
+        for sql_backend in SQL_BACKENDS:
+            with self.subTest(sql_backend=sql_backend):
+                self.fresh_copy()
+                self.drop = os.path.join(self.tmp, "drop")
+                os.makedirs(self.drop)
+                state = WorkbookState(self.path, snapshot_dir=os.path.join(self.tmp, "snapshot"),
+                                      sql_backend=sql_backend, ingest_dir=self.drop)
+                self.write_export("a.csv", ["alex,2025-04-01,21", "alex,2025-05-01,30", "alex,2025-05-01,31"])
+                state.refresh()
+                self.assertEqual(self.hrv(state, '2025-04-01'), 21)
+                self.assertEqual(self.hrv(state, '2025-05-01'), 31)
+
+                self.write_export("b.csv", ["alex,2025-05-01,40"])
+                self.write_export("c.jsonl", ['{"day": "2025-05-02", "rmssd": 50}'])  # no athlete field
+                state.refresh()
+                self.assertEqual(self.hrv(state, '2025-05-01'), 40)
+                self.assertIn(os.path.join(self.drop, "c.jsonl"), state.ingester.errors)
+                self.assert_matches_cold_load(state, sql_backend, ingest_dir=self.drop)
+
+                def reappend(sheet, header):
+                    row = [cell.value for cell in sheet[2]]
+                    row[header.index('hrv_night')] = 25
+                    sheet.append(row)
+                self.edit_sheet(reappend)
+                state.refresh()
+                self.assertEqual(self.hrv(state, '2025-04-01'), 21)
+                self.assert_matches_cold_load(state, sql_backend, ingest_dir=self.drop)
+
+
+if __name__ == "__main__":
+    unittest.main()
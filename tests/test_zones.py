@@ -0,0 +1,92 @@
+# tests/test_zones.py
+import os
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from sam_data import read_workbook
+from sam_zones import (ZONE_GREEN, ZONE_LABELS, ZONE_NO_CONFIG, ZONE_NO_DATA, ZONE_RED, ZONE_UNKNOWN, ZONE_YELLOW,
+                       ZoneClassifier)
+
+TEMPLATE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "SAM_Recovery_Data_Template.xlsx")
+REFERENCE_BANDS = [
+    (ZONE_RED, [('red_low', 'red_high'), ('red_low2', 'red_high2')]),
+    (ZONE_YELLOW, [('yellow_low', 'yellow_high'), ('yellow_low2', 'yellow_high2')]),
+    (ZONE_GREEN, [('green_low', 'green_high')]),
+]
+
+
+def _reference_status(value: float, metric_name: str, thresholds: pd.DataFrame) -> str:
+    """The dashboard's original per-value lookup: red bands, then yellow, then green"""
+    if pd.isna(value):
+        return ZONE_LABELS[ZONE_NO_DATA]
+    matching_rows = thresholds[thresholds['metric_name'] == metric_name]
+    if matching_rows.empty:
+        return ZONE_LABELS[ZONE_NO_CONFIG]
+    row = matching_rows.iloc[0]
+    for code, bands in REFERENCE_BANDS:
+        for low, high in bands:
+            low, high = row.get(low, np.nan), row.get(high, np.nan)
+            if not (pd.isna(low) or pd.isna(high)) and low <= value <= high:
+                return ZONE_LABELS[code]
+    return ZONE_LABELS[ZONE_UNKNOWN]
+
+
+class ZonePrecedenceTest(unittest.TestCase):
+    """Overlapping bands resolve red over yellow over green, bounds inclusive"""
+
+    def setUp(self):
+        self.config = pd.DataFrame([
+            {'metric_name': 'hrv_night', 'red_low': 0, 'red_high': 40, 'yellow_low': 30, 'yellow_high': 50,
+             'green_low': 45, 'green_high': 100, 'red_low2': 150, 'red_high2': 200},
+            {'metric_name': 'hrv_night', 'red_low': 0, 'red_high': 100},  # later duplicate rows are ignored
+            {'metric_name': 'resting_hr', 'green_low': 40, 'green_high': 60},
+        ])
+        self.zones = ZoneClassifier(self.config)
+
+    def test_overlaps(self):
+        values = [35, 40, 40.5, 47, 50, 50.5, 100, 120, 150, 200, np.nan]
+        expected = [ZONE_RED, ZONE_RED, ZONE_YELLOW, ZONE_YELLOW, ZONE_YELLOW, ZONE_GREEN, ZONE_GREEN,
+                    ZONE_UNKNOWN, ZONE_RED, ZONE_RED, ZONE_NO_DATA]
+        self.assertEqual(self.zones.classify(values, 'hrv_night').tolist(), expected)
+
+    def test_missing_bands_and_metrics(self):
+        self.assertEqual(self.zones.classify([30, 50, 70], 'resting_hr').tolist(), [ZONE_UNKNOWN, ZONE_GREEN, ZONE_UNKNOWN])
+        self.assertEqual(self.zones.classify([1.0, np.nan], 'spo2_night').tolist(), [ZONE_NO_CONFIG, ZONE_NO_DATA])
+
+    def test_display_names(self):
+        self.assertIn('Hrv Night', self.zones)
+        self.assertEqual(self.zones.status(47, 'Hrv Night'), ZONE_LABELS[ZONE_YELLOW])
+        self.assertEqual(self.zones.status(None, 'Hrv Night'), ZONE_LABELS[ZONE_NO_DATA])
+
+    def test_matches_per_value_lookup(self):
+        thresholds = read_workbook(TEMPLATE)["sam_metrics_config"]
+        zones = ZoneClassifier(thresholds)
+        rng = np.random.default_rng(7)
+        for metric in thresholds['metric_name']:
+            bounds = thresholds.loc[thresholds['metric_name'] == metric].iloc[0]
+            edges = bounds.filter(like='_low').tolist() + bounds.filter(like='_high').tolist()
+            edges = [float(edge) for edge in edges if pd.notna(edge)]
+            values = np.concatenate([edges, np.round(rng.uniform(min(edges) - 5, max(edges) + 5, 200), 1), [np.nan]])
+            with self.subTest(metric=metric):
+                labels = [ZONE_LABELS[code] for code in zones.classify(values, metric)]
+                self.assertEqual(labels, [_reference_status(value, metric, thresholds) for value in values])
+
+
+class ZoneCubeTest(unittest.TestCase):
+    """Athlete × date × metric cube, with missing athlete-days as no data"""
+
+    def test_cube(self):
+        zones = ZoneClassifier(pd.DataFrame([{'metric_name': 'hrv_night', 'green_low': 50, 'green_high': 100}]))
+        index = pd.MultiIndex.from_tuples([
+            ('alex', pd.Timestamp('2025-04-01')), ('alex', pd.Timestamp('2025-04-02')), ('jordan', pd.Timestamp('2025-04-02')),
+        ], names=['athlete_id', 'date'])
+        cube = zones.zone_cube(pd.DataFrame({'hrv_night': [60.0, 20.0, 70.0]}, index=index))
+        self.assertEqual(cube.values.shape, (2, 2, 1))
+        self.assertEqual(list(cube.athletes), ['alex', 'jordan'])
+        self.assertEqual(cube.values[:, :, 0].tolist(), [[ZONE_GREEN, ZONE_UNKNOWN], [ZONE_NO_DATA, ZONE_GREEN]])
+
+
+if __name__ == "__main__":
+    unittest.main()